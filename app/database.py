@@ -1,3 +1,74 @@
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 Base = declarative_base()
+
+class ThreadedSession:
+    """
+    Awaitable facade over a synchronous Session, used when DB_ASYNC is off.
+    Mirrors the subset of the AsyncSession API the routers use and runs each
+    blocking call in the threadpool, so the routers are written once against
+    the async interface.
+    """
+
+    def __init__(self, session: Session):
+        self.sync_session = session
+
+    @property
+    def bind(self):
+        return self.sync_session.bind
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    async def execute(self, statement, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.execute, statement, *args, **kwargs)
+
+    async def scalar(self, statement, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalar, statement, *args, **kwargs)
+
+    async def scalars(self, statement, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalars, statement, *args, **kwargs)
+
+    async def stream(self, statement, *args, **kwargs):
+        result = await run_in_threadpool(self.sync_session.execute, statement, *args, **kwargs)
+        return ThreadedStream(result)
+
+    async def stream_scalars(self, statement, *args, **kwargs):
+        result = await run_in_threadpool(self.sync_session.scalars, statement, *args, **kwargs)
+        return ThreadedStream(result)
+
+    async def get(self, entity, ident, **kwargs):
+        return await run_in_threadpool(self.sync_session.get, entity, ident, **kwargs)
+
+    async def flush(self):
+        await run_in_threadpool(self.sync_session.flush)
+
+    async def commit(self):
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def refresh(self, instance):
+        await run_in_threadpool(self.sync_session.refresh, instance)
+
+    async def close(self):
+        await run_in_threadpool(self.sync_session.close)
+
+class ThreadedStream:
+    """Async counterpart of a sync Result/ScalarResult, fetching each partition in the threadpool."""
+
+    def __init__(self, result):
+        self._result = result
+
+    async def partitions(self, size: int):
+        while True:
+            partition = await run_in_threadpool(self._result.fetchmany, size)
+            if not partition:
+                return
+            yield partition
@@ -1,17 +1,48 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from .routers import materials, shelf, library, search
+from fastapi.concurrency import run_in_threadpool
+from .dependencies import SessionLocal
+from .metrics import MetricsMiddleware
+from .routers import archive, auth, downloads, health, materials, shelf, library, search, metrics
+from .services.jobs import JOB_WORKER_IN_PROCESS, JobWorker
+from .services.tokens import REVOCATION_SYNC_SECONDS, RevocationSync
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    worker = JobWorker(SessionLocal) if JOB_WORKER_IN_PROCESS else None
+    if worker:
+        worker.start()
+    # Picks up logouts and user changes recorded by other workers and scripts
+    revocation_sync = RevocationSync(SessionLocal) if REVOCATION_SYNC_SECONDS > 0 else None
+    if revocation_sync:
+        revocation_sync.start()
+    try:
+        yield
+    finally:
+        if revocation_sync:
+            await run_in_threadpool(revocation_sync.stop)
+        if worker:
+            await run_in_threadpool(worker.stop)
 
 app = FastAPI(
     title="School Online Library API",
     description="A centralized, policy-driven library system.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+app.add_middleware(MetricsMiddleware)
+
 # Include Routers
+app.include_router(auth.router)
 app.include_router(materials.router)
+app.include_router(downloads.router)
 app.include_router(shelf.router)
 app.include_router(library.router)
+app.include_router(archive.router)
 app.include_router(search.router)
+app.include_router(metrics.router)
+app.include_router(health.router)
 
 @app.get("/")
 async def root():
@@ -0,0 +1,246 @@
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Minimal Prometheus-style metrics: counters and histograms kept in-process and
+# rendered in the text exposition format by the /metrics endpoint.
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount: float = 1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues) -> float:
+        return self._values.get(labelvalues, 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines.extend(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in items)
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # Per label set: [per-bucket counts (last is +Inf), sum, count]
+        self._values: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labelvalues)
+            if entry is None:
+                entry = self._values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, *labelvalues) -> int:
+        entry = self._values.get(labelvalues)
+        return entry[2] if entry else 0
+
+    def sum(self, *labelvalues) -> float:
+        entry = self._values.get(labelvalues)
+        return entry[1] if entry else 0.0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, ([*counts], total, count)) for key, (counts, total, count) in self._values.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+                cumulative += bucket_count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+class CallbackMetric:
+    """
+    A gauge or counter whose value is read from `fn` at scrape time. With labelnames,
+    `fn` returns {labelvalues: value} instead of a single value.
+    """
+
+    def __init__(self, name: str, documentation: str, kind: str, fn: Callable[[], float],
+                 labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.fn = fn
+        self.labelnames = tuple(labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        values = self.fn() if self.labelnames else {(): self.fn()}
+        lines.extend(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in sorted(values.items()))
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.register(Counter(
+    "http_requests_total", "HTTP requests by method, route template and status.", ("method", "route", "status")))
+REQUEST_DURATION = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "End-to-end request latency, including streamed bodies.", ("method", "route")))
+REQUEST_STAGE_DURATION = REGISTRY.register(Histogram(
+    "http_request_stage_seconds", "Time per request spent in auth, db, policy and serialize stages.",
+    ("route", "stage")))
+REQUEST_STATEMENTS = REGISTRY.register(Histogram(
+    "db_statements_per_request", "SQL statements executed per request; growth with result size means N+1.",
+    ("route",), buckets=STATEMENT_BUCKETS))
+POLICY_DECISIONS = REGISTRY.register(Counter(
+    "policy_decisions_total", "Policy evaluations by action and outcome.", ("action", "allowed")))
+JOBS = REGISTRY.register(Counter(
+    "jobs_total", "Background jobs run by kind and outcome (done, retry, failed, lost).", ("kind", "outcome")))
+JOB_DURATION = REGISTRY.register(Histogram(
+    "job_duration_seconds", "Background job run time, including failed attempts.", ("kind",)))
+
+class RequestMetrics:
+    """Per-request accumulator, shared by reference with threadpool and greenlet workers."""
+    __slots__ = ("stages", "statements")
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.statements = 0
+
+_current: ContextVar[Optional[RequestMetrics]] = ContextVar("request_metrics", default=None)
+
+@contextmanager
+def track_request():
+    """Collects stage timings and statement counts for code run inside the block."""
+    metrics = RequestMetrics()
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+def add_stage_time(name: str, seconds: float):
+    current = _current.get()
+    if current is not None:
+        current.stages[name] = current.stages.get(name, 0.0) + seconds
+
+@contextmanager
+def stage(name: str):
+    """Times a block into the current request's `name` stage (no-op outside a request)."""
+    if _current.get() is None:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        add_stage_time(name, perf_counter() - start)
+
+def record_policy_decisions(action, allowed: int, denied: int):
+    action = getattr(action, "value", action)
+    if allowed:
+        POLICY_DECISIONS.inc(action, "true", amount=allowed)
+    if denied:
+        POLICY_DECISIONS.inc(action, "false", amount=denied)
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    current = _current.get()
+    if current is not None:
+        current.statements += 1
+        if context is not None:
+            context.metrics_start = perf_counter()
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "metrics_start", None)
+    if start is not None:
+        add_stage_time("db", perf_counter() - start)
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency, per-stage timings and SQL statement
+    counts. Statements are counted by engine events, so they include every query
+    issued while handling the request, in the threadpool or through the async driver.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = perf_counter()
+        with track_request() as metrics:
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                route = _route_label(scope)
+                REQUESTS.inc(scope["method"], route, str(status_code))
+                REQUEST_DURATION.observe(perf_counter() - start, scope["method"], route)
+                REQUEST_STATEMENTS.observe(metrics.statements, route)
+                for name, seconds in metrics.stages.items():
+                    REQUEST_STAGE_DURATION.observe(seconds, route, name)
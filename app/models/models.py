@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Integer, ForeignKey, Enum, DateTime, Index
+from sqlalchemy import Column, String, Integer, BigInteger, Float, ForeignKey, Enum, DateTime, Index, JSON, Text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import enum
@@ -22,12 +22,27 @@ class EnrollmentStatus(str, enum.Enum):
     CARRY_OVER = "carry_over"
     COMPLETED = "completed"
 
+class MaterialStatus(str, enum.Enum):
+    PENDING = "pending"
+    PROCESSING = "processing"
+    READY = "ready"
+    FAILED = "failed"
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
 class Department(Base):
     __tablename__ = "departments"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String, nullable=False)
     code = Column(String, unique=True, nullable=False)
+    # Bumped in the same transaction as any change to the department's materials;
+    # part of the library response cache key, so every process sees the change
+    library_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     users = relationship("User", back_populates="department")
     materials = relationship("Material", back_populates="department")
@@ -62,8 +77,16 @@ class Material(Base):
     level = Column(Integer, nullable=False)
     visibility_scope = Column(Enum(VisibilityScope), nullable=False, index=True)
     file_path = Column(String, nullable=False)
+    filename = Column(String)
+    content_type = Column(String)
+    size_bytes = Column(BigInteger)
+    sha256 = Column(String(64), ForeignKey("blobs.sha256", ondelete="RESTRICT"), index=True)
     uploaded_by = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="RESTRICT"), nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # Post-upload processing (app.services.processing); rows that were never queued are READY
+    status = Column(Enum(MaterialStatus), nullable=False, default=MaterialStatus.READY,
+                    server_default=MaterialStatus.READY.name)
+    # Part of the keyset pagination order (app.services.pagination), so never NULL
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
 
     department = relationship("Department", back_populates="materials")
     uploader = relationship("User", back_populates="uploaded_materials")
@@ -72,6 +95,17 @@ class Material(Base):
         Index("idx_material_dept_level", "department_id", "level"),
     )
 
+class Blob(Base):
+    """Content-addressed file shared by every Material with the same SHA-256."""
+    __tablename__ = "blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    path = Column(String, nullable=False)
+    size_bytes = Column(BigInteger, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 class Course(Base):
     __tablename__ = "courses"
 
@@ -82,7 +116,8 @@ class Course(Base):
     title = Column(String, nullable=False)
 
     department = relationship("Department", back_populates="courses")
-    enrollments = relationship("Enrollment", back_populates="course")
+    # Deleting a course leaves its enrollments to ON DELETE CASCADE
+    enrollments = relationship("Enrollment", back_populates="course", passive_deletes=True)
 
 class Enrollment(Base):
     __tablename__ = "enrollments"
@@ -98,3 +133,79 @@ class Enrollment(Base):
     __table_args__ = (
         Index("idx_enrollment_user_course", "user_id", "course_id"),
     )
+
+class ShelfEntry(Base):
+    """
+    Materialized shelf: one row per (user, material) reachable through the user's active
+    or carry-over enrollments, matched on course_code within the course's department.
+    Maintained by app.services.shelf.
+    """
+    __tablename__ = "shelf_entries"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    material_id = Column(UUID(as_uuid=True), ForeignKey("materials.id", ondelete="CASCADE"), primary_key=True)
+    course_code = Column(String, nullable=False)
+
+    __table_args__ = (
+        Index("idx_shelf_entry_material", "material_id"),
+        Index("idx_shelf_entry_user_course", "user_id", "course_code"),
+    )
+
+class Job(Base):
+    """Durable background job, claimed by workers with SELECT ... FOR UPDATE SKIP LOCKED."""
+    __tablename__ = "jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    kind = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+    status = Column(Enum(JobStatus), nullable=False, default=JobStatus.QUEUED)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    run_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = Column(String)
+    locked_until = Column(DateTime)
+    last_error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index("idx_job_status_run_at", "status", "run_at"),
+    )
+
+class ContentDocument(Base):
+    """Text extracted from a material's file: one row per indexed material (app.services.content_index)."""
+    __tablename__ = "content_documents"
+
+    material_id = Column(UUID(as_uuid=True), ForeignKey("materials.id", ondelete="CASCADE"), primary_key=True)
+    length = Column(Integer, nullable=False)
+    pages = Column(Integer, nullable=False)
+    indexed_at = Column(DateTime, default=datetime.utcnow)
+
+class ContentPosting(Base):
+    """Term frequency of one term in one material's extracted text."""
+    __tablename__ = "content_postings"
+
+    term = Column(String, primary_key=True)
+    material_id = Column(UUID(as_uuid=True), ForeignKey("materials.id", ondelete="CASCADE"), primary_key=True)
+    tf = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("idx_content_posting_material", "material_id"),
+    )
+
+class TokenRevocation(Base):
+    """
+    Shared revocation list (app.services.tokens): a revoked token id, or a user or material
+    whose tokens issued up to `cutoff` are rejected. Times are Unix seconds; rows are only
+    kept until `expires_at`, when no token they could reject is still valid.
+    """
+    __tablename__ = "token_revocations"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    key = Column(String, nullable=False)
+    cutoff = Column(Float, nullable=False)
+    expires_at = Column(Float, nullable=False)
+
+    __table_args__ = (
+        Index("idx_token_revocation_expires_at", "expires_at"),
+    )
@@ -1,6 +1,5 @@
+from dataclasses import dataclass
 from enum import Enum
-from typing import Optional, List
-from pydantic import BaseModel
 
 class Role(str, Enum):
     STUDENT = "student"
@@ -17,18 +16,29 @@ class VisibilityScope(str, Enum):
     DEPARTMENT = "DEPARTMENT"
     GLOBAL_SEARCHABLE = "GLOBAL_SEARCHABLE"
 
-class UserContext(BaseModel):
+# Policy inputs and outputs are frozen slotted dataclasses rather than pydantic models:
+# they are built per request and per evaluated row, and never cross the API boundary.
+
+@dataclass(frozen=True, slots=True)
+class UserContext:
     user_id: str
     role: Role
     department_id: str
     level: int
 
-class MaterialContext(BaseModel):
+    def __post_init__(self):
+        # Built from ORM rows, token claims and cached JSON; normalize like the API would
+        object.__setattr__(self, "role", Role(getattr(self.role, "value", self.role)))
+        object.__setattr__(self, "level", int(self.level))
+
+@dataclass(frozen=True, slots=True)
+class MaterialContext:
     id: str
     department_id: str
     level: int
     visibility_scope: VisibilityScope
 
-class PolicyDecision(BaseModel):
+@dataclass(frozen=True, slots=True)
+class PolicyDecision:
     allowed: bool
     reason: str
@@ -0,0 +1,118 @@
+import hashlib
+import marshal
+import threading
+from typing import NamedTuple, Optional, Tuple
+
+from . import material
+from .base import Action, MaterialContext, Role, UserContext, VisibilityScope
+
+# Highest material level probed when deriving a rule (raised above the user's own level
+# for users at or beyond it); levels above it are treated like it
+LEVEL_CEILING = 1_000_000
+
+class DownloadRule(NamedTuple):
+    """
+    DOWNLOAD decision for one (department, role, level) class: materials of the class's
+    department are allowed up to `max_level` (None: every level), or at any level when
+    their visibility is in `override`.
+    """
+    department_id: str
+    max_level: Optional[int]
+    override: Tuple[VisibilityScope, ...]
+    version: str
+
+    def allows(self, department_id: str, level: int, visibility_scope) -> bool:
+        return department_id == self.department_id and (
+            self.max_level is None or level <= self.max_level or visibility_scope in self.override
+        )
+
+_versions = {}
+
+def policy_version() -> str:
+    """Fingerprint of the current check_material_policy code; rules derived from older code are dropped."""
+    code = material.check_material_policy.__code__
+    version = _versions.get(code)
+    if version is None:
+        version = _versions[code] = hashlib.sha256(marshal.dumps(code)).hexdigest()[:12]
+    return version
+
+def derive_rule(department_id: str, role: Role, level: int, version: str) -> DownloadRule:
+    """
+    Derives a class's rule by probing check_material_policy with synthetic materials in
+    the class's department, assuming (as the policy does) that access never grows with
+    material level.
+    """
+    probe = UserContext(user_id="probe", role=role, department_id=department_id, level=level)
+
+    def allowed(material_level: int, visibility_scope: VisibilityScope) -> bool:
+        context = MaterialContext(id="probe", department_id=department_id, level=material_level,
+                                  visibility_scope=visibility_scope)
+        return material.check_material_policy(probe, Action.DOWNLOAD, context).allowed
+
+    # Probing at the user's own level or below would mistake a level cap for an override
+    ceiling = max(LEVEL_CEILING, level + 1)
+    override = tuple(v for v in VisibilityScope if allowed(ceiling, v))
+    restricted = [v for v in VisibilityScope if v not in override]
+    if not restricted:
+        return DownloadRule(department_id, None, (), version)
+
+    # Largest level still allowed for a restricted visibility; -1 when none is
+    low, high = -1, ceiling
+    while high - low > 1:
+        middle = (low + high) // 2
+        if allowed(middle, restricted[0]):
+            low = middle
+        else:
+            high = middle
+    return DownloadRule(department_id, low, override, version)
+
+class DownloadIndex:
+    """
+    Precomputed DOWNLOAD rules keyed by (department, role, level) rather than by user:
+    a user whose attributes change simply maps to another class on their next
+    (re-cached) UserContext. The whole index is rebuilt lazily when the policy
+    version changes.
+    """
+
+    def __init__(self):
+        self._rules = {}
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def rule(self, user: UserContext) -> DownloadRule:
+        version = policy_version()
+        key = (user.department_id, user.role, user.level)
+        if version == self._version:
+            rule = self._rules.get(key)
+            if rule is not None:
+                self.hits += 1
+                return rule
+
+        rule = derive_rule(user.department_id, user.role, user.level, version)
+        with self._lock:
+            if version != self._version:
+                if self._version is not None:
+                    self.invalidations += 1
+                self._rules = {}
+                self._version = version
+            self._rules[key] = rule
+            self.misses += 1
+        return rule
+
+    def clear(self):
+        with self._lock:
+            self._rules = {}
+            self._version = None
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "size": len(self._rules),
+        }
+
+download_index = DownloadIndex()
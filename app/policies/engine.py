@@ -1,6 +1,10 @@
-from typing import Any
+from typing import Any, List, Mapping
 from .base import UserContext, Action, PolicyDecision, MaterialContext
-from .material import check_material_policy
+from .download_index import download_index
+from .material import check_material_policy, material_predicate
+from ..metrics import record_policy_decisions, stage
+
+UNKNOWN_RESOURCE = PolicyDecision(allowed=False, reason="Unknown resource type or unhandled policy.")
 
 def evaluate(user_context: UserContext, action: Action, resource_context: Any) -> PolicyDecision:
     """
@@ -10,8 +14,36 @@ def evaluate(user_context: UserContext, action: Action, resource_context: Any) -
     
     # Material policies
     if isinstance(resource_context, MaterialContext):
-        return check_material_policy(user_context, action, resource_context)
+        decision = check_material_policy(user_context, action, resource_context)
+        record_policy_decisions(action, int(decision.allowed), int(not decision.allowed))
+        return decision
     
     # Add other resource type evaluations here as the system grows
     
-    return PolicyDecision(allowed=False, reason="Unknown resource type or unhandled policy.")
+    return UNKNOWN_RESOURCE
+
+def evaluate_many(user_context: UserContext, action: Action, materials: Any) -> List[bool]:
+    """
+    Batch evaluation of material policies for list endpoints.
+    `materials` is either a sequence of rows exposing department_id, level and
+    visibility_scope (ORM rows, MaterialContext, named tuples), or a mapping of
+    columnar arrays under those same keys.
+    Returns an allow mask with one bool per material, in input order.
+    DOWNLOAD flags come from the user's precomputed class rule.
+    """
+    with stage("policy"):
+        if action == Action.DOWNLOAD:
+            allows = download_index.rule(user_context).allows
+        else:
+            allows = material_predicate(user_context, action)
+
+        if isinstance(materials, Mapping):
+            rows = zip(materials["department_id"], materials["level"], materials["visibility_scope"])
+        else:
+            rows = ((m.department_id, m.level, m.visibility_scope) for m in materials)
+
+        mask = [allows(str(department_id), level, visibility_scope) for department_id, level, visibility_scope in rows]
+
+    allowed = sum(mask)
+    record_policy_decisions(action, allowed, len(mask) - allowed)
+    return mask
@@ -1,40 +1,88 @@
+from typing import Any, Callable
 from .base import UserContext, MaterialContext, Action, Role, PolicyDecision, VisibilityScope
 
-def check_material_policy(user: UserContext, action: Action, material: MaterialContext) -> PolicyDecision:
-    # Deny by default
-    decision = PolicyDecision(allowed=False, reason="Action not permitted by default.")
+# Decisions are immutable, so every evaluation returns one of these shared instances
+DEFAULT_DENY = PolicyDecision(allowed=False, reason="Action not permitted by default.")
+UPLOAD_ALLOWED = PolicyDecision(allowed=True, reason="Upload allowed for students and librarians within their department.")
+UPLOAD_DENIED = PolicyDecision(allowed=False, reason="Upload restricted to department students and librarians.")
+VIEW_METADATA_ALLOWED = PolicyDecision(allowed=True, reason="Metadata view allowed within department.")
+VIEW_METADATA_DENIED = PolicyDecision(allowed=False, reason="Metadata view restricted to department members.")
+DOWNLOAD_OTHER_DEPARTMENT = PolicyDecision(allowed=False, reason="Download restricted to department materials.")
+DOWNLOAD_ALLOWED = PolicyDecision(allowed=True, reason="Download authorized based on level, visibility, or role.")
+DOWNLOAD_DENIED = PolicyDecision(allowed=False, reason="Insufficient level or visibility for download.")
+DELETE_ALLOWED = PolicyDecision(allowed=True, reason="Delete allowed for admins or department librarians.")
+DELETE_DENIED = PolicyDecision(allowed=False, reason="Delete restricted to admins and department librarians.")
 
+def check_material_policy(user: UserContext, action: Action, material: MaterialContext) -> PolicyDecision:
     # Rule: UPLOAD
     if action == Action.UPLOAD:
         if user.role in [Role.STUDENT, Role.LIBRARIAN] and material.department_id == user.department_id:
-            return PolicyDecision(allowed=True, reason="Upload allowed for students and librarians within their department.")
-        return PolicyDecision(allowed=False, reason="Upload restricted to department students and librarians.")
+            return UPLOAD_ALLOWED
+        return UPLOAD_DENIED
 
     # Rule: VIEW_METADATA
     # Note: Handled as a single action, applying the broader "Department Library" rule if applicable, 
     # but the prompt lists them separately. I will allow if department matches for general metadata view.
     if action == Action.VIEW_METADATA:
         if material.department_id == user.department_id:
-             return PolicyDecision(allowed=True, reason="Metadata view allowed within department.")
-        return PolicyDecision(allowed=False, reason="Metadata view restricted to department members.")
+             return VIEW_METADATA_ALLOWED
+        return VIEW_METADATA_DENIED
 
     # Rule: DOWNLOAD
     if action == Action.DOWNLOAD:
         if material.department_id != user.department_id:
-            return PolicyDecision(allowed=False, reason="Download restricted to department materials.")
+            return DOWNLOAD_OTHER_DEPARTMENT
         
         # Additional conditions for download
         if (material.level <= user.level or 
             material.visibility_scope == VisibilityScope.GLOBAL_SEARCHABLE or 
             user.role in [Role.LIBRARIAN, Role.ADMIN]):
-            return PolicyDecision(allowed=True, reason="Download authorized based on level, visibility, or role.")
+            return DOWNLOAD_ALLOWED
         
-        return PolicyDecision(allowed=False, reason="Insufficient level or visibility for download.")
+        return DOWNLOAD_DENIED
 
     # Rule: DELETE
     if action == Action.DELETE:
         if user.role == Role.ADMIN or (user.role == Role.LIBRARIAN and material.department_id == user.department_id):
-            return PolicyDecision(allowed=True, reason="Delete allowed for admins or department librarians.")
-        return PolicyDecision(allowed=False, reason="Delete restricted to admins and department librarians.")
+            return DELETE_ALLOWED
+        return DELETE_DENIED
+
+    # Deny by default
+    return DEFAULT_DENY
+
+def _deny(department_id, level, visibility_scope) -> bool:
+    return False
+
+def material_predicate(user: UserContext, action: Action) -> Callable[[str, int, Any], bool]:
+    """
+    Row-level equivalent of check_material_policy(...).allowed for a fixed user and action.
+    The user-dependent parts of each rule are resolved once, so the returned callable
+    only looks at the material's department, level and visibility.
+    """
+    user_dept = user.department_id
+
+    if action == Action.UPLOAD:
+        if user.role in [Role.STUDENT, Role.LIBRARIAN]:
+            return lambda department_id, level, visibility_scope: department_id == user_dept
+        return _deny
+
+    if action == Action.VIEW_METADATA:
+        return lambda department_id, level, visibility_scope: department_id == user_dept
+
+    if action == Action.DOWNLOAD:
+        if user.role in [Role.LIBRARIAN, Role.ADMIN]:
+            return lambda department_id, level, visibility_scope: department_id == user_dept
+        user_level = user.level
+        return lambda department_id, level, visibility_scope: (
+            department_id == user_dept
+            and (level <= user_level or visibility_scope == VisibilityScope.GLOBAL_SEARCHABLE)
+        )
+
+    if action == Action.DELETE:
+        if user.role == Role.ADMIN:
+            return lambda department_id, level, visibility_scope: True
+        if user.role == Role.LIBRARIAN:
+            return lambda department_id, level, visibility_scope: department_id == user_dept
+        return _deny
 
-    return decision
+    return _deny
@@ -0,0 +1,38 @@
+import uuid
+from sqlalchemy import and_, or_
+from sqlalchemy.sql.elements import ColumnElement
+
+from .base import UserContext, Action, Role
+from ..models.models import Material, VisibilityScope
+
+def _as_uuid(value: str) -> uuid.UUID:
+    return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+
+def compile_material_policy(user: UserContext, action: Action, material=Material) -> ColumnElement:
+    """
+    Compiles the material rules for a fixed user and action into a SQL boolean expression
+    over the `material` entity, so the decision can be pushed down into the query
+    (as a WHERE clause or a selected column).
+    Must stay in step with check_material_policy; see tests/test_policy_sql.py.
+    """
+    same_department = material.department_id == _as_uuid(user.department_id)
+
+    if action == Action.VIEW_METADATA:
+        return same_department
+
+    if action == Action.DOWNLOAD:
+        if user.role in [Role.LIBRARIAN, Role.ADMIN]:
+            return same_department
+        return and_(
+            same_department,
+            or_(
+                material.level <= user.level,
+                material.visibility_scope == VisibilityScope.GLOBAL_SEARCHABLE
+            )
+        )
+
+    raise ValueError(f"No SQL compilation for action {action}")
+
+def download_allowed_column(user: UserContext, material=Material):
+    """Labelled `download_allowed` column for selecting the DOWNLOAD flag alongside rows."""
+    return compile_material_policy(user, Action.DOWNLOAD, material).label("download_allowed")
@@ -0,0 +1,103 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import iterate_in_threadpool
+from uuid import UUID
+from typing import List, Optional
+
+from ..dependencies import get_current_user, get_read_db
+from ..policies.base import Action, MaterialContext, UserContext
+from ..policies.engine import evaluate, evaluate_many
+from ..models.models import Material
+from ..schemas import ArchiveRequest
+from ..services.archive import MAX_ARCHIVE_ITEMS, ArchiveFile, zip_chunks
+from ..services.http_range import content_disposition
+from ..services.shelf import shelf_query
+
+router = APIRouter(prefix="/archive", tags=["Archive"])
+
+ARCHIVE_COLUMNS = (
+    Material.id, Material.title, Material.course_code, Material.level, Material.visibility_scope,
+    Material.department_id, Material.file_path, Material.filename
+)
+
+def _too_many() -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Archives are limited to {MAX_ARCHIVE_ITEMS} materials; narrow the selection.")
+
+async def _fetch(db: AsyncSession, query) -> list:
+    rows = (await db.execute(
+        query.order_by(Material.level, Material.course_code, Material.title, Material.id).limit(MAX_ARCHIVE_ITEMS + 1)
+    )).all()
+    if len(rows) > MAX_ARCHIVE_ITEMS:
+        raise _too_many()
+    return rows
+
+def _archive_response(user: UserContext, rows: list, filename: str, skipped: List[dict] = None) -> StreamingResponse:
+    """
+    Authorizes DOWNLOAD for every row in one batch and streams the allowed ones as a zip.
+    Denied rows go to the manifest with the policy's reason. Rows are fully fetched before
+    the response starts, so the stream holds no database session.
+    """
+    skipped = list(skipped or [])
+    files = []
+    for row, allowed in zip(rows, evaluate_many(user, Action.DOWNLOAD, rows)):
+        if allowed:
+            files.append(ArchiveFile(str(row.id), row.title, row.course_code, row.level, row.file_path, row.filename))
+        else:
+            decision = evaluate(user, Action.DOWNLOAD, MaterialContext(
+                id=str(row.id), department_id=str(row.department_id), level=row.level,
+                visibility_scope=row.visibility_scope))
+            skipped.append({"id": str(row.id), "title": row.title, "reason": decision.reason})
+    return StreamingResponse(
+        iterate_in_threadpool(zip_chunks(files, skipped)),
+        media_type="application/zip",
+        headers={"Content-Disposition": content_disposition(filename)}
+    )
+
+@router.get("/shelf")
+async def archive_shelf(
+    user: UserContext = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Every downloadable material on the user's shelf as one zip."""
+    rows = await _fetch(db, shelf_query(user, *ARCHIVE_COLUMNS))
+    return _archive_response(user, rows, "shelf.zip")
+
+@router.get("/library/{department_id}")
+async def archive_library(
+    department_id: UUID,
+    level: Optional[int] = Query(None),
+    user: UserContext = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """The department library, or one `level` of it, as one zip."""
+    if str(department_id) != user.department_id:
+        raise HTTPException(status_code=403, detail="Access denied to other department libraries.")
+
+    query = select(*ARCHIVE_COLUMNS).where(Material.department_id == department_id)
+    if level is not None:
+        query = query.where(Material.level == level)
+    rows = await _fetch(db, query)
+    return _archive_response(user, rows, f"library-{level}.zip" if level is not None else "library.zip")
+
+@router.post("")
+async def archive_materials(
+    body: ArchiveRequest,
+    user: UserContext = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    The listed materials as one zip. IDs that do not exist or whose metadata the user
+    may not see are reported in the manifest by ID only, as "Material not found", so
+    the manifest never reveals other departments' titles.
+    """
+    ids = list(dict.fromkeys(body.ids))
+    if len(ids) > MAX_ARCHIVE_ITEMS:
+        raise _too_many()
+    rows = await _fetch(db, select(*ARCHIVE_COLUMNS).where(Material.id.in_(ids))) if ids else []
+    visible = evaluate_many(user, Action.VIEW_METADATA, rows)
+    found = {row.id for row, allowed in zip(rows, visible) if allowed}
+    rows = [row for row in rows if row.id in found]
+    skipped = [{"id": str(id), "reason": "Material not found"} for id in ids if id not in found]
+    return _archive_response(user, rows, "materials.zip", skipped)
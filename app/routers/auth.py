@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from ..dependencies import bearer_token, get_db
+from ..services.tokens import InvalidToken, revoke_token, save_revocation
+
+router = APIRouter(prefix="/auth", tags=["Auth"])
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db)):
+    """
+    Revokes the presented bearer token for the rest of its lifetime: at once in this
+    process, and in the others within REVOCATION_SYNC_SECONDS.
+    """
+    token = bearer_token(authorization)
+    if not token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated",
+                            headers={"WWW-Authenticate": "Bearer"})
+    try:
+        row = revoke_token(token)
+    except InvalidToken as exc:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(exc),
+                            headers={"WWW-Authenticate": "Bearer"})
+    await save_revocation(db, row)
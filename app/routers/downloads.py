@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..dependencies import get_current_user, get_db
+from ..policies.base import Role, UserContext
+from ..services.download_tickets import InvalidTicket, revoke_ticket, validate_ticket
+from ..services.storage import content_etag, stream_file
+from ..services.tokens import save_revocation
+
+router = APIRouter(prefix="/downloads", tags=["Downloads"])
+
+@router.get("/{ticket}", name="download_with_ticket")
+async def download_with_ticket(ticket: str, request: Request):
+    """
+    Serves a file for a ticket from POST /materials/{id}/download-ticket. The ticket is
+    the credential: it is checked by signature, expiry and the in-memory revocation list
+    only, with no database access, and Range/conditional requests are honoured as on
+    /materials/{id}/download.
+    """
+    try:
+        granted = validate_ticket(ticket)
+    except InvalidTicket as exc:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(exc))
+
+    response = await stream_file(
+        granted.key,
+        request.headers,
+        etag=content_etag(granted.sha256),
+        media_type=granted.content_type,
+        filename=granted.filename
+    )
+    if not response:
+        raise HTTPException(status_code=404, detail="File content missing")
+    return response
+
+@router.delete("/{ticket}", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke_download_ticket(
+    ticket: str,
+    user: UserContext = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Revokes a ticket before it expires: at once in this process, and in the others within
+    REVOCATION_SYNC_SECONDS. Allowed for the user it was issued to and for librarians and admins.
+    """
+    try:
+        granted = validate_ticket(ticket)
+    except InvalidTicket as exc:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(exc))
+    if granted.user_id != user.user_id and user.role not in (Role.LIBRARIAN, Role.ADMIN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Ticket was issued to another user.")
+    _, row = revoke_ticket(ticket)
+    await save_revocation(db, row)
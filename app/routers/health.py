@@ -0,0 +1,39 @@
+from fastapi import APIRouter
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from ..dependencies import pool_stats, request_engines
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+def _ping_sync(engine):
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+async def _ping(engine) -> bool:
+    try:
+        if isinstance(engine, AsyncEngine):
+            async with engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+        else:
+            await run_in_threadpool(_ping_sync, engine)
+        return True
+    except Exception:
+        return False
+
+@router.get("/live")
+async def liveness():
+    """The process is serving requests; databases are checked by /health/ready only."""
+    return {"status": "ok"}
+
+@router.get("/ready")
+async def readiness():
+    """Pings the primary and every replica; 503 unless all answer. Includes pool statistics."""
+    databases = {name: await _ping(engine) for name, engine in request_engines().items()}
+    ready = all(databases.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ok" if ready else "unavailable", "databases": databases, "pools": pool_stats()}
+    )
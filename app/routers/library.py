@@ -1,51 +1,111 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
-from typing import Dict, List
+from typing import Optional, Union
 
-from ..dependencies import get_current_user, get_db
-from ..policies.base import UserContext, Action, MaterialContext
-from ..policies.engine import evaluate
+from ..dependencies import get_current_user, get_db, get_read_db
+from ..policies.base import UserContext, Action
+from ..policies.engine import evaluate_many
 from ..models.models import Material
-from ..schemas import DepartmentLibraryResponse, MaterialRead
+from ..schemas import DepartmentLibraryResponse, DepartmentLibrarySummary
+from ..services.library import level_summary_query, split_levels, top_per_level_query
+from ..services.pagination import MAX_PAGE_SIZE, ndjson_response, page_query, split_page
+from ..services.response_cache import (cached_json_response, department_library_version, library_cache,
+                                       library_cache_key)
+from ..services.serialization import MATERIAL_COLUMNS, dumps, json_response, material_dicts
 
 router = APIRouter(prefix="/library", tags=["Library"])
 
-@router.get("/{department_id}", response_model=DepartmentLibraryResponse)
+@router.get("/{department_id}", response_model=Union[DepartmentLibraryResponse, DepartmentLibrarySummary])
 async def get_department_library(
     department_id: UUID,
+    request: Request,
+    cursor: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    stream: bool = Query(False),
+    level: Optional[int] = Query(None),
+    summary: bool = Query(False),
+    per_level_limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
     user: UserContext = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db),
+    primary_db: AsyncSession = Depends(get_db)
 ):
+    """
+    The department's materials grouped by level. `level` narrows any view to one level;
+    summary=true returns per-level counts only and per_level_limit the first N materials
+    of each level (with next_cursors to continue a level), both aggregated in the database
+    so level tabs can be shown first and filled lazily.
+    """
     # Requirement: Ensure user.department_id matches
     if str(department_id) != user.department_id:
         raise HTTPException(status_code=403, detail="Access denied to other department libraries.")
     
-    db_materials = db.query(Material).filter(
-        Material.department_id == department_id
-    ).order_by(Material.level).all()
-    
-    grouped_materials: Dict[int, List[MaterialRead]] = {}
+    query = select(*MATERIAL_COLUMNS).where(Material.department_id == department_id)
+    if level is not None:
+        query = query.where(Material.level == level)
+
+    # Paged and streamed views walk the library in (level, created_at, id) order;
+    # a page only carries the levels it touches.
+    if stream:
+        return ndjson_response(query, user, cursor, limit)
+
+    paginated = cursor is not None or limit is not None
+    if paginated and (summary or per_level_limit):
+        raise HTTPException(status_code=400, detail="cursor/limit cannot be combined with summary or per_level_limit.")
+
+    # Unpaged views are the same for every user of a download class: serve them
+    # from the response cache, keyed on the department's library_version so a change
+    # committed by any process is seen at once.
+    if not paginated:
+        # Reads that fill the cache go to the primary: a lagging replica could return
+        # data older than the version it is cached under and keep serving it
+        db = primary_db
+        version = await department_library_version(db, department_id)
+        cache_key = library_cache_key(department_id, user) + (version, level, summary, per_level_limit)
+        cached = library_cache.get(cache_key)
+        if cached is not None:
+            return cached_json_response(request.headers, cached, hit=True)
+        generation = library_cache.generation(cache_key[0])
+
+    if summary:
+        summary_query = level_summary_query(department_id, user)
+        if level is not None:
+            summary_query = summary_query.where(Material.level == level)
+        levels = [
+            {"level": row.level, "count": row.count, "downloadable": row.downloadable}
+            for row in (await db.execute(summary_query)).all()
+        ]
+        cached = library_cache.set(cache_key, dumps({"department_id": department_id, "levels": levels}), generation)
+        return cached_json_response(request.headers, cached, hit=False)
+
+    if paginated:
+        query = page_query(query, cursor, limit)
+    elif per_level_limit:
+        query = top_per_level_query(query, per_level_limit)
+    else:
+        query = query.order_by(Material.level)
+    db_materials = (await db.execute(query)).all()
+    headers = {}
+    if paginated:
+        db_materials, next_cursor = split_page(db_materials, limit)
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+    elif per_level_limit:
+        db_materials, next_cursors = split_levels(db_materials, per_level_limit)
     
-    for m in db_materials:
-        m_context = MaterialContext(
-            id=str(m.id),
-            department_id=str(m.department_id),
-            level=m.level,
-            visibility_scope=m.visibility_scope
-        )
-        
-        # Check download flag
-        dl_decision = evaluate(user, Action.DOWNLOAD, m_context)
-        
-        m_read = MaterialRead.model_validate(m)
-        m_read.download_allowed = dl_decision.allowed
-        
-        if m.level not in grouped_materials:
-            grouped_materials[m.level] = []
-        grouped_materials[m.level].append(m_read)
-        
-    return DepartmentLibraryResponse(
-        department_id=department_id,
-        levels=grouped_materials
-    )
+    # Check download flags for the whole department in one pass
+    allowed = evaluate_many(user, Action.DOWNLOAD, db_materials)
+
+    grouped_materials = {}
+    for item in material_dicts(db_materials, allowed):
+        grouped_materials.setdefault(item["level"], []).append(item)
+
+    library = {"department_id": department_id, "levels": grouped_materials}
+    if paginated:
+        return json_response(library, headers)
+    if per_level_limit:
+        library["next_cursors"] = next_cursors
+
+    cached = library_cache.set(cache_key, dumps(library), generation)
+    return cached_json_response(request.headers, cached, hit=False)
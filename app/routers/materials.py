@@ -1,13 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status
+import zipfile
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, File, Form, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from uuid import UUID
+from datetime import datetime, timezone
+from pathlib import Path
+from uuid import UUID, uuid4
 
-from ..dependencies import get_current_user, get_db
+from ..dependencies import get_current_user, get_db, get_read_db, get_sync_db
 from ..policies.base import UserContext, Action, MaterialContext, VisibilityScope
 from ..policies.engine import evaluate
-from ..models.models import Material
-from ..schemas import MaterialRead, MaterialCreate
-from ..services.storage import save_file, stream_file
+from ..models.models import Material, MaterialStatus
+from ..schemas import BulkImportResponse, DownloadTicketResponse, MaterialRead, MaterialCreate
+from ..services.blobs import acquire_blob
+from ..services.bulk_import import MAX_IMPORT_BYTES, ZipSource, check_upload_policy, import_materials, parse_manifest
+from ..services.download_tickets import DOWNLOAD_TICKET_TTL, MAX_TICKET_TTL, issue_ticket
+from ..services.processing import queue_material
+from ..services.storage import content_etag, discard_staged, stage_upload, stream_file
 
 router = APIRouter(prefix="/materials", tags=["Materials"])
 
@@ -19,7 +29,7 @@ async def upload_material(
     visibility_scope: VisibilityScope = Form(...),
     file: UploadFile = File(...),
     user: UserContext = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     # Prepare context for policy check
     temp_material_context = MaterialContext(
@@ -33,30 +43,74 @@ async def upload_material(
     if not decision.allowed:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=decision.reason)
 
-    path = save_file(file)
+    staged = await stage_upload(file)
+    try:
+        path = await acquire_blob(db, staged)
+    except BaseException:
+        discard_staged(staged)
+        raise
     
     db_material = Material(
+        id=uuid4(),
         title=title,
         course_code=course_code,
         level=level,
         visibility_scope=visibility_scope,
         file_path=path,
-        department_id=user.department_id,
-        uploaded_by=user.user_id
+        filename=Path(file.filename).name if file.filename else None,
+        content_type=file.content_type,
+        size_bytes=staged.size_bytes,
+        sha256=staged.sha256,
+        department_id=UUID(user.department_id),
+        uploaded_by=UUID(user.user_id),
+        status=MaterialStatus.PENDING
     )
     db.add(db_material)
-    db.commit()
-    db.refresh(db_material)
+    # Verification and content sniffing run on a job worker, committed with the row
+    queue_material(db, db_material.id)
+    await db.commit()
+    await db.refresh(db_material)
     
     return db_material
 
+def _import_archive(db: Session, user: UserContext, entries, archive_path: str) -> BulkImportResponse:
+    try:
+        archive = zipfile.ZipFile(archive_path)
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="Archive is not a valid zip file.")
+    with archive:
+        return import_materials(db, user, entries, ZipSource(archive))
+
+@router.post("/bulk-import", response_model=BulkImportResponse)
+async def bulk_import_materials(
+    manifest: UploadFile = File(...),
+    archive: UploadFile = File(...),
+    user: UserContext = Depends(get_current_user),
+    db: Session = Depends(get_sync_db)
+):
+    """
+    Imports many materials into the caller's department from a CSV or JSON manifest and a
+    zip archive holding the files it names. Items fail individually; see `results`.
+    """
+    check_upload_policy(user)
+    try:
+        entries = parse_manifest(await manifest.read(), manifest.filename or "")
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid manifest: {exc}")
+
+    staged = await stage_upload(archive, MAX_IMPORT_BYTES)
+    try:
+        return await run_in_threadpool(_import_archive, db, user, entries, staged.path)
+    finally:
+        discard_staged(staged)
+
 @router.get("/{id}", response_model=MaterialRead)
 async def get_material_metadata(
     id: UUID,
     user: UserContext = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    db_material = db.query(Material).filter(Material.id == id).first()
+    db_material = await db.scalar(select(Material).where(Material.id == id))
     if not db_material:
         raise HTTPException(status_code=404, detail="Material not found")
     
@@ -81,10 +135,11 @@ async def get_material_metadata(
 @router.get("/{id}/download")
 async def download_material(
     id: UUID,
+    request: Request,
     user: UserContext = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    db_material = db.query(Material).filter(Material.id == id).first()
+    db_material = await db.scalar(select(Material).where(Material.id == id))
     if not db_material:
         raise HTTPException(status_code=404, detail="Material not found")
     
@@ -99,7 +154,48 @@ async def download_material(
     if not decision.allowed:
         raise HTTPException(status_code=403, detail=decision.reason)
     
-    response = stream_file(db_material.file_path)
+    response = await stream_file(
+        db_material.file_path,
+        request.headers,
+        etag=content_etag(db_material.sha256),
+        media_type=db_material.content_type,
+        filename=db_material.filename
+    )
     if not response:
         raise HTTPException(status_code=404, detail="File content missing")
     return response
+
+@router.post("/{id}/download-ticket", response_model=DownloadTicketResponse, status_code=status.HTTP_201_CREATED)
+async def create_download_ticket(
+    id: UUID,
+    request: Request,
+    ttl: int = Query(DOWNLOAD_TICKET_TTL, ge=1, le=MAX_TICKET_TTL),
+    user: UserContext = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Runs the DOWNLOAD check once and returns a signed URL for this user and material.
+    Retries and range requests against the URL skip authentication, the material lookup
+    and the policy check until it expires or is revoked.
+    """
+    db_material = await db.scalar(select(Material).where(Material.id == id))
+    if not db_material:
+        raise HTTPException(status_code=404, detail="Material not found")
+
+    material_context = MaterialContext(
+        id=str(db_material.id),
+        department_id=str(db_material.department_id),
+        level=db_material.level,
+        visibility_scope=db_material.visibility_scope
+    )
+
+    decision = evaluate(user, Action.DOWNLOAD, material_context)
+    if not decision.allowed:
+        raise HTTPException(status_code=403, detail=decision.reason)
+
+    ticket, expires_at = issue_ticket(user, db_material, ttl)
+    return DownloadTicketResponse(
+        ticket=ticket,
+        url=str(request.url_for("download_with_ticket", ticket=ticket)),
+        expires_at=datetime.fromtimestamp(expires_at, timezone.utc)
+    )
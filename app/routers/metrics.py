@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Response
+
+from ..dependencies import pool_stats
+from ..metrics import CONTENT_TYPE, REGISTRY, CallbackMetric
+from ..policies.download_index import download_index
+from ..services.response_cache import library_cache
+from ..services.user_cache import user_context_cache
+
+router = APIRouter(tags=["Metrics"])
+
+# Cache statistics are read from the caches at scrape time
+for prefix, cache in (("user_context_cache", user_context_cache), ("library_response_cache", library_cache),
+                      ("download_rule_index", download_index)):
+    for key, kind in (("hits", "counter"), ("misses", "counter"), ("invalidations", "counter"), ("size", "gauge")):
+        suffix = f"{key}_total" if kind == "counter" else key
+        REGISTRY.register(CallbackMetric(
+            f"{prefix}_{suffix}", f"{prefix.replace('_', ' ').capitalize()} {key}.", kind,
+            lambda cache=cache, key=key: cache.stats()[key]
+        ))
+
+for key, documentation in (("size", "Configured pool size."), ("checked_out", "Connections in use."),
+                           ("overflow", "Connections opened beyond the pool size.")):
+    REGISTRY.register(CallbackMetric(
+        f"db_pool_{key}", documentation, "gauge",
+        lambda key=key: {(name,): stats[key] for name, stats in pool_stats().items()}, labelnames=("engine",)
+    ))
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of request, SQL, policy and cache metrics."""
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
@@ -1,46 +1,86 @@
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from typing import List
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from uuid import UUID
 
-from ..dependencies import get_current_user, get_db
-from ..policies.base import UserContext, Action, MaterialContext
-from ..policies.engine import evaluate
+from ..dependencies import get_current_user, get_read_db
+from ..policies.base import UserContext, Action
+from ..policies.engine import evaluate_many
+from ..policies.sql import compile_material_policy
 from ..models.models import Material
-from ..schemas import MaterialRead
+from ..schemas import ContentSearchHit, MaterialRead
+from ..services.content_index import content_search
+from ..services.search import material_search
+from ..services.pagination import MAX_PAGE_SIZE, ndjson_response, page_query, split_page
+from ..services.serialization import MATERIAL_COLUMNS, json_response, material_dicts
 
 router = APIRouter(prefix="/search", tags=["Search"])
 
 @router.get("/", response_model=List[MaterialRead])
 async def search_materials(
     q: str = Query(..., min_length=1),
+    downloadable_only: bool = Query(False),
+    cursor: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    stream: bool = Query(False),
     user: UserContext = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Search across same department, all levels.
+    Results are ranked by relevance; paged and streamed results follow keyset order instead.
+    With downloadable_only, the DOWNLOAD rule is applied inside the query.
+    Supports the same cursor/limit paging and stream=true NDJSON mode as the shelf.
     """
-    db_materials = db.query(Material).filter(
-        Material.department_id == user.department_id,
-        or_(
-            Material.title.ilike(f"%{q}%"),
-            Material.course_code.ilike(f"%{q}%")
-        )
-    ).all()
+    match, rank = await material_search(db, user.department_id, q)
+    query = select(*MATERIAL_COLUMNS).where(
+        Material.department_id == UUID(user.department_id),
+        match
+    )
+    if downloadable_only:
+        query = query.where(compile_material_policy(user, Action.DOWNLOAD))
+
+    if stream:
+        return ndjson_response(query, user, cursor, limit)
+
+    paginated = cursor is not None or limit is not None
+    if paginated:
+        query = page_query(query, cursor, limit)
+    else:
+        query = query.order_by(rank)
+    db_materials = (await db.execute(query)).all()
+    headers = {}
+    if paginated:
+        db_materials, next_cursor = split_page(db_materials, limit)
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
     
-    results = []
-    for m in db_materials:
-        m_context = MaterialContext(
-            id=str(m.id),
-            department_id=str(m.department_id),
-            level=m.level,
-            visibility_scope=m.visibility_scope
-        )
-        
-        dl_decision = evaluate(user, Action.DOWNLOAD, m_context)
-        
-        m_read = MaterialRead.model_validate(m)
-        m_read.download_allowed = dl_decision.allowed
-        results.append(m_read)
-        
-    return results
+    allowed = evaluate_many(user, Action.DOWNLOAD, db_materials)
+    return json_response(material_dicts(db_materials, allowed), headers)
+
+@router.get("/content", response_model=List[ContentSearchHit])
+async def search_content(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    user: UserContext = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Full-text search over the text extracted from uploaded files (PDF, DOCX, plain text),
+    ranked by BM25. Same department, all levels, like /search. Materials still being
+    processed are not indexed yet.
+    """
+    ranked = await content_search(db, UUID(user.department_id), q, limit)
+    if not ranked:
+        return json_response([])
+    scores = dict(ranked)
+    rows = (await db.execute(select(*MATERIAL_COLUMNS).where(Material.id.in_(scores)))).all()
+    position = {material_id: i for i, (material_id, _) in enumerate(ranked)}
+    rows.sort(key=lambda row: position[row.id])
+
+    allowed = evaluate_many(user, Action.DOWNLOAD, rows)
+    hits = material_dicts(rows, allowed)
+    for hit, row in zip(hits, rows):
+        hit["score"] = scores[row.id]
+    return json_response(hits)
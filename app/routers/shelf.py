@@ -1,41 +1,46 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
-from ..dependencies import get_current_user, get_db
-from ..policies.base import UserContext, Action, MaterialContext
-from ..policies.engine import evaluate
-from ..models.models import Material
+from ..dependencies import get_current_user, get_read_db
+from ..policies.base import UserContext, Action
+from ..policies.engine import evaluate_many
 from ..schemas import MaterialRead
+from ..services.pagination import MAX_PAGE_SIZE, ndjson_response, page_query, split_page
+from ..services.shelf import shelf_query
+from ..services.serialization import MATERIAL_COLUMNS, json_response, material_dicts
 
 router = APIRouter(prefix="/shelf", tags=["Shelf"])
 
 @router.get("/", response_model=List[MaterialRead])
 async def get_shelf(
+    cursor: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    stream: bool = Query(False),
     user: UserContext = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
-    Auto-filter by user's department and level.
+    Materials of the user's active and carry-over courses, read from the materialized
+    shelf_entries table; users without such enrollments get their department and level.
+    Passing cursor/limit pages through the shelf (next page in X-Next-Cursor);
+    stream=true returns NDJSON instead.
     """
-    db_materials = db.query(Material).filter(
-        Material.department_id == user.department_id,
-        Material.level == user.level
-    ).all()
+    query = shelf_query(user, *MATERIAL_COLUMNS)
+
+    if stream:
+        return ndjson_response(query, user, cursor, limit)
+
+    paginated = cursor is not None or limit is not None
+    if paginated:
+        query = page_query(query, cursor, limit)
+    db_materials = (await db.execute(query)).all()
+    headers = {}
+    if paginated:
+        db_materials, next_cursor = split_page(db_materials, limit)
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
     
-    results = []
-    for m in db_materials:
-        m_context = MaterialContext(
-            id=str(m.id),
-            department_id=str(m.department_id),
-            level=m.level,
-            visibility_scope=m.visibility_scope
-        )
-        # For shelf, download is checked for the flag
-        dl_decision = evaluate(user, Action.DOWNLOAD, m_context)
-        
-        m_read = MaterialRead.model_validate(m)
-        m_read.download_allowed = dl_decision.allowed
-        results.append(m_read)
-        
-    return results
+    # For shelf, download is checked for the flag
+    allowed = evaluate_many(user, Action.DOWNLOAD, db_materials)
+    return json_response(material_dicts(db_materials, allowed), headers)
@@ -2,6 +2,7 @@ from pydantic import BaseModel, ConfigDict
 from uuid import UUID
 from datetime import datetime
 from typing import List, Optional
+from .models.models import MaterialStatus
 from .policies.base import Role, VisibilityScope
 
 class MaterialBase(BaseModel):
@@ -19,14 +20,58 @@ class MaterialRead(MaterialBase):
     id: UUID
     uploaded_by: UUID
     created_at: datetime
+    size_bytes: Optional[int] = None
+    sha256: Optional[str] = None
+    status: MaterialStatus = MaterialStatus.READY
     download_allowed: bool = False
 
+class ContentSearchHit(MaterialRead):
+    """A /search/content result: the material and its BM25 score against the query."""
+    score: float
+
+class DownloadTicketResponse(BaseModel):
+    """A pre-authorized download: GET `url` (no credentials needed) until `expires_at`."""
+    ticket: str
+    url: str
+    expires_at: datetime
+
+class ArchiveRequest(BaseModel):
+    """Materials to zip with POST /archive."""
+    ids: List[UUID]
+
+class BulkImportItem(MaterialCreate):
+    """One manifest entry: material metadata plus the file's path inside the directory or zip."""
+    file: str
+    content_type: Optional[str] = None
+
+class BulkImportResult(BaseModel):
+    index: int
+    file: Optional[str] = None
+    id: Optional[UUID] = None
+    error: Optional[str] = None
+
+class BulkImportResponse(BaseModel):
+    imported: int
+    failed: int
+    results: List[BulkImportResult]
+
 class ShelfResponse(BaseModel):
     materials: List[MaterialRead]
 
 class DepartmentLibraryResponse(BaseModel):
     department_id: UUID
     levels: dict[int, List[MaterialRead]]
+    # per_level_limit views: where to resume each truncated level (pass with ?level=&cursor=)
+    next_cursors: Optional[dict[int, str]] = None
+
+class LevelSummary(BaseModel):
+    level: int
+    count: int
+    downloadable: int
+
+class DepartmentLibrarySummary(BaseModel):
+    department_id: UUID
+    levels: List[LevelSummary]
 
 class UserRead(BaseModel):
     model_config = ConfigDict(from_attributes=True)
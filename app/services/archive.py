@@ -0,0 +1,97 @@
+import json
+import os
+import posixpath
+import time
+import zipfile
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+
+from .storage import StorageBackend, get_backend
+
+MAX_ARCHIVE_ITEMS = int(os.getenv("MAX_ARCHIVE_ITEMS", "500"))
+MANIFEST_NAME = "MANIFEST.json"
+
+# Entries whose size might cross 4 GiB get zip64 headers up front: with an unseekable
+# output the local header cannot be rewritten afterwards.
+_ZIP64_THRESHOLD = zipfile.ZIP64_LIMIT // 2
+# DOS timestamps start in 1980
+_EPOCH_1980 = time.mktime((1980, 1, 1, 0, 0, 0, 0, 0, -1))
+
+class ArchiveFile(NamedTuple):
+    """A material the user may download, and where it goes in the archive."""
+    id: str
+    title: str
+    course_code: Optional[str]
+    level: int
+    key: str
+    filename: Optional[str]
+
+class _Sink:
+    """
+    Write-only buffer handed to ZipFile. It has no tell/seek, so zipfile writes sizes and
+    CRCs in data descriptors after each entry instead of seeking back, and the archive can
+    be sent as it is produced. drain() hands over (and forgets) what was written so far.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> Iterator[bytes]:
+        if self._chunks:
+            data = b"".join(self._chunks)
+            self._chunks.clear()
+            yield data
+
+def _clean(part: str) -> str:
+    part = part.replace("/", "_").replace("\\", "_").strip().lstrip(".")
+    return part or "untitled"
+
+def entry_name(file: ArchiveFile, taken: set) -> str:
+    """`<course_code>/<filename or title>`, made safe and unique within the archive."""
+    name = f"{_clean(file.course_code or 'uncategorized')}/{_clean(file.filename or file.title)}"
+    stem, ext = posixpath.splitext(name)
+    n = 1
+    while name.lower() in taken:
+        n += 1
+        name = f"{stem} ({n}){ext}"
+    taken.add(name.lower())
+    return name
+
+def zip_chunks(files: Iterable[ArchiveFile], skipped: List[dict],
+               backend: StorageBackend = None) -> Iterator[bytes]:
+    """
+    Yields a store-only zip of `files`, read from storage DOWNLOAD_CHUNK_SIZE at a time, so
+    memory stays constant whatever the archive size and nothing is written to disk. Objects
+    missing from storage are added to `skipped`; the last entry, MANIFEST.json, lists what
+    was included and everything skipped. Blocks: iterate it in the threadpool.
+    """
+    backend = backend or get_backend()
+    sink = _Sink()
+    included, taken = [], set()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for file in files:
+            info = backend.stat(file.key)
+            if info is None:
+                skipped.append({"id": file.id, "title": file.title, "reason": "File content missing"})
+                continue
+            name = entry_name(file, taken)
+            entry = zipfile.ZipInfo(name, time.localtime(max(info.last_modified, _EPOCH_1980))[:6])
+            entry.compress_type = zipfile.ZIP_STORED
+            entry.file_size = info.size
+            with archive.open(entry, "w", force_zip64=info.size > _ZIP64_THRESHOLD) as out:
+                for chunk in backend.read_range(file.key, 0, info.size - 1):
+                    out.write(chunk)
+                    yield from sink.drain()
+            included.append({"id": file.id, "title": file.title, "course_code": file.course_code,
+                             "level": file.level, "name": name, "size_bytes": info.size})
+            yield from sink.drain()
+
+        manifest = {"included": included, "skipped": skipped}
+        archive.writestr(MANIFEST_NAME, json.dumps(manifest, indent=2))
+    yield from sink.drain()
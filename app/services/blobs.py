@@ -0,0 +1,141 @@
+import time
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+from sqlalchemy import delete, event, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from ..models.models import Blob, Material
+from . import storage
+
+# Unreferenced blobs and stray files younger than this are left alone by the collector,
+# so uploads that are between staging and commit are never swept.
+GC_GRACE_PERIOD = timedelta(hours=1)
+
+def _upsert_reference(dialect_name: str, sha256: str, size_bytes: int, path: str, references: int = 1):
+    insert = postgresql_insert if dialect_name == "postgresql" else sqlite_insert
+    now = datetime.utcnow()
+    stmt = insert(Blob).values(
+        sha256=sha256, path=path, size_bytes=size_bytes, ref_count=references, created_at=now, updated_at=now
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[Blob.sha256],
+        set_={"ref_count": Blob.ref_count + references, "updated_at": now}
+    ).returning(Blob.path)
+
+def acquire_blobs(session: Session, staged_files, executor=None) -> dict:
+    """
+    Blocking, batched acquire_blob() for bulk imports: one reference upsert per distinct
+    SHA-256 (counting every staged copy), then each distinct file is moved into place,
+    in parallel on `executor` if given. Returns {sha256: storage key}.
+    Redundant staged copies are left for the caller to discard.
+    """
+    by_sha = {}
+    for staged in staged_files:
+        by_sha.setdefault(staged.sha256, []).append(staged)
+    keys = {}
+    for sha256, copies in by_sha.items():
+        statement = _upsert_reference(
+            session.bind.dialect.name, sha256, copies[0].size_bytes, storage.blob_key(sha256), len(copies)
+        )
+        keys[sha256] = session.execute(statement).scalar_one()
+    put = storage.get_backend().put
+    placements = [(copies[0].path, keys[sha256]) for sha256, copies in by_sha.items()]
+    if executor is not None:
+        list(executor.map(lambda args: put(*args), placements))
+    else:
+        for staged_path, key in placements:
+            put(staged_path, key)
+    return keys
+
+async def acquire_blob(db, staged: storage.StoredFile) -> str:
+    """
+    Takes a reference on the blob for a staged upload and moves the upload into place,
+    returning the storage key the Material should point at.
+    The reference is taken first: the upsert locks the blob row until the caller commits,
+    so the garbage collector cannot remove the file in between.
+    """
+    statement = _upsert_reference(
+        db.bind.dialect.name, staged.sha256, staged.size_bytes, storage.blob_key(staged.sha256)
+    )
+    path = (await db.execute(statement)).scalar_one()
+    await storage.place_blob(staged, path)
+    return path
+
+def release_blob(connection, sha256: str):
+    connection.execute(
+        update(Blob)
+        .where(Blob.sha256 == sha256)
+        .values(ref_count=Blob.ref_count - 1, updated_at=datetime.utcnow())
+    )
+
+@event.listens_for(Material, "after_delete")
+def _release_on_delete(mapper, connection, target):
+    if target.sha256 is not None:
+        release_blob(connection, target.sha256)
+
+class GarbageReport(NamedTuple):
+    blobs_removed: int
+    orphan_files_removed: int
+    bytes_freed: int
+
+# Blob rows looked up per query while sweeping the blob tree
+GC_BATCH_SIZE = 1000
+
+def _remove(backend: storage.StorageBackend, key: str, dry_run: bool) -> int:
+    if dry_run:
+        info = backend.stat(key)
+        return info.size if info else 0
+    return backend.delete(key)
+
+def _orphan_keys(session: Session, backend: storage.StorageBackend, cutoff_ts: float):
+    """Objects under the blob prefix with no blob row, older than cutoff_ts."""
+    objects = [(key, mtime) for key, mtime in backend.list(storage.BLOB_PREFIX) if mtime < cutoff_ts]
+    for start in range(0, len(objects), GC_BATCH_SIZE):
+        batch = objects[start:start + GC_BATCH_SIZE]
+        names = [key.rsplit("/", 1)[-1] for key, _ in batch]
+        known = set(session.scalars(select(Blob.sha256).where(Blob.sha256.in_(names))))
+        for (key, _), name in zip(batch, names):
+            if name not in known:
+                yield key
+
+def _stale_staging_files(cutoff_ts: float):
+    if not storage.STORAGE_DIR.exists():
+        return
+    for path in storage.STORAGE_DIR.glob(f"{storage.STAGING_PREFIX}*"):
+        if path.stat().st_mtime < cutoff_ts:
+            yield path
+
+def collect_garbage(session: Session, grace: timedelta = GC_GRACE_PERIOD, dry_run: bool = False) -> GarbageReport:
+    """
+    Removes blobs whose reference count has been zero for longer than `grace`, then sweeps
+    objects under the blob prefix that no blob row refers to, and stale local staging files.
+    Each blob object is deleted while its row is locked, before the row is deleted.
+    """
+    backend = storage.get_backend()
+    cutoff = datetime.utcnow() - grace
+    blobs_removed = orphans_removed = bytes_freed = 0
+
+    unreferenced = select(Blob).where(Blob.ref_count <= 0, Blob.updated_at < cutoff)
+    if session.bind.dialect.name == "postgresql":
+        unreferenced = unreferenced.with_for_update(skip_locked=True)
+    for blob in session.scalars(unreferenced).all():
+        bytes_freed += _remove(backend, blob.path, dry_run)
+        if not dry_run:
+            session.execute(delete(Blob).where(Blob.sha256 == blob.sha256))
+        blobs_removed += 1
+    session.commit()
+
+    cutoff_ts = time.time() - grace.total_seconds()
+    for key in list(_orphan_keys(session, backend, cutoff_ts)):
+        bytes_freed += _remove(backend, key, dry_run)
+        orphans_removed += 1
+    for path in list(_stale_staging_files(cutoff_ts)):
+        bytes_freed += path.stat().st_size
+        if not dry_run:
+            path.unlink(missing_ok=True)
+        orphans_removed += 1
+
+    return GarbageReport(blobs_removed, orphans_removed, bytes_freed)
@@ -0,0 +1,184 @@
+import csv
+import io
+import json
+import mimetypes
+import os
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, List, Tuple
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from ..models.models import Material, MaterialStatus
+from ..policies.base import Action, MaterialContext, UserContext
+from ..policies.engine import evaluate
+from ..schemas import BulkImportItem, BulkImportResponse, BulkImportResult
+from . import storage
+from .blobs import acquire_blobs
+from .processing import queue_materials
+from .search import fallback_indexes
+from .shelf import refresh_materials
+
+IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", "8"))
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "200"))
+MAX_IMPORT_BYTES = int(os.getenv("MAX_IMPORT_BYTES", str(2 * 1024 ** 3)))
+
+class DirectorySource:
+    """Manifest files resolved under a local directory; paths may not escape it."""
+
+    def __init__(self, root):
+        self.root = Path(root).resolve()
+
+    def open(self, name: str) -> BinaryIO:
+        path = (self.root / name).resolve()
+        if not path.is_relative_to(self.root):
+            raise ValueError("File path escapes the import directory.")
+        return path.open("rb")
+
+class ZipSource:
+    """Manifest files read from the members of a zip archive."""
+
+    def __init__(self, archive: zipfile.ZipFile):
+        self.archive = archive
+
+    def open(self, name: str) -> BinaryIO:
+        try:
+            return self.archive.open(str(PurePosixPath(name)))
+        except KeyError:
+            raise FileNotFoundError(f"{name} is not in the archive.")
+
+def parse_manifest(data: bytes, filename: str = "") -> List[dict]:
+    """
+    Reads a CSV (header row: file,title,course_code,level,visibility_scope[,content_type])
+    or JSON (a list of objects, or {"items": [...]}) manifest into raw entries.
+    """
+    text = data.decode("utf-8-sig")
+    if filename.lower().endswith(".json") or text.lstrip()[:1] in ("[", "{"):
+        entries = json.loads(text)
+        if isinstance(entries, dict):
+            entries = entries.get("items", [])
+        if not isinstance(entries, list):
+            raise ValueError("JSON manifest must be a list of items.")
+        return entries
+    return [{key: value for key, value in row.items() if value != ""} for row in csv.DictReader(io.StringIO(text))]
+
+def _error_message(exc: Exception) -> str:
+    if isinstance(exc, HTTPException):
+        return str(exc.detail)
+    if isinstance(exc, ValidationError):
+        return "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exc.errors())
+    return str(exc) or type(exc).__name__
+
+def _stage(source, item: BulkImportItem) -> storage.StoredFile:
+    with source.open(item.file) as f:
+        return storage.stage_file(f)
+
+def check_upload_policy(user: UserContext):
+    """
+    Imports always target the user's own department, and the UPLOAD rule only depends on
+    the user and that department, so one decision covers every item.
+    """
+    context = MaterialContext(id="new", department_id=user.department_id, level=user.level,
+                              visibility_scope="DEPARTMENT")
+    decision = evaluate(user, Action.UPLOAD, context)
+    if not decision.allowed:
+        raise HTTPException(status_code=403, detail=decision.reason)
+
+def _insert_batch(session: Session, user: UserContext, batch, executor) -> List[dict]:
+    """Inserts one batch in a single transaction; returns the inserted rows."""
+    keys = acquire_blobs(session, [staged for _, _, staged in batch], executor)
+    now = datetime.utcnow()
+    rows = [
+        dict(
+            id=uuid.uuid4(),
+            title=item.title,
+            course_code=item.course_code,
+            level=item.level,
+            visibility_scope=item.visibility_scope.value,
+            file_path=keys[staged.sha256],
+            filename=PurePosixPath(item.file).name,
+            content_type=item.content_type or mimetypes.guess_type(item.file)[0],
+            size_bytes=staged.size_bytes,
+            sha256=staged.sha256,
+            department_id=uuid.UUID(user.department_id),
+            uploaded_by=uuid.UUID(user.user_id),
+            status=MaterialStatus.PENDING,
+            created_at=now,
+        )
+        for _, item, staged in batch
+    ]
+    session.execute(insert(Material), rows)
+    # Bulk inserts bypass the mapper events that maintain shelf_entries
+    refresh_materials(session.connection(), [row["id"] for row in rows])
+    queue_materials(session, [row["id"] for row in rows])
+    session.commit()
+    return rows
+
+def import_materials(session: Session, user: UserContext, entries: List[dict], source,
+                     workers: int = IMPORT_WORKERS, batch_size: int = IMPORT_BATCH_SIZE) -> BulkImportResponse:
+    """
+    Imports manifest entries into the user's department. The UPLOAD policy is checked
+    once up front; files are staged in parallel on a thread pool; rows are
+    inserted with one executemany per batch, each batch in its own transaction. Failures
+    are reported per item and never abort the rest of the import. Blocking; run it in
+    the threadpool from request handlers.
+    """
+    check_upload_policy(user)
+
+    results = [BulkImportResult(index=i, file=entry.get("file") if isinstance(entry, dict) else None)
+               for i, entry in enumerate(entries)]
+    items: List[Tuple[int, BulkImportItem]] = []
+    for i, entry in enumerate(entries):
+        try:
+            items.append((i, BulkImportItem.model_validate(entry)))
+        except ValidationError as exc:
+            results[i].error = _error_message(exc)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for start in range(0, len(items), batch_size):
+            chunk = items[start:start + batch_size]
+            staged_batch = []
+            futures = [executor.submit(_stage, source, item) for _, item in chunk]
+            for (i, item), future in zip(chunk, futures):
+                try:
+                    staged_batch.append((i, item, future.result()))
+                except Exception as exc:
+                    results[i].error = _error_message(exc)
+            if not staged_batch:
+                continue
+
+            try:
+                rows = _insert_batch(session, user, staged_batch, executor)
+            except Exception as exc:
+                session.rollback()
+                for i, _, _ in staged_batch:
+                    results[i].error = f"Batch failed: {_error_message(exc)}"
+                rows = []
+            finally:
+                # Duplicate copies (and everything, on failure) are still in staging
+                for _, _, staged in staged_batch:
+                    storage.discard_staged(staged)
+
+            for (i, _, _), row in zip(staged_batch, rows):
+                results[i].id = row["id"]
+                # Bulk inserts bypass the mapper events that maintain the fallback search index
+                fallback_indexes.add_material(row["department_id"], row["id"], row["title"], row["course_code"])
+
+    failed = sum(r.error is not None for r in results)
+    return BulkImportResponse(imported=len(results) - failed, failed=failed, results=results)
+
+def open_source(path: str):
+    """A DirectorySource or ZipSource for a local directory or .zip file."""
+    if os.path.isdir(path):
+        return DirectorySource(path)
+    return ZipSource(zipfile.ZipFile(path))
+
+def load_manifest(path: str) -> List[dict]:
+    with open(path, "rb") as f:
+        return parse_manifest(f.read(), path)
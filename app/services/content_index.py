@@ -0,0 +1,108 @@
+import math
+import os
+import uuid
+from collections import Counter
+from typing import List, Optional, Tuple
+
+from sqlalchemy import case, delete, event, func, insert, select
+from sqlalchemy.orm import Session
+
+from ..models.models import ContentDocument, ContentPosting, Material
+from .extraction import ExtractionError, UnsupportedDocument, extract_pages
+from .inverted_index import B, K1, tokenize
+from .jobs import enqueue_many, job_handler
+
+INDEX_CONTENT = "content.index"
+
+# Text past this many characters of a document is not indexed, bounding a job's run time
+MAX_INDEXED_CHARS = int(os.getenv("MAX_INDEXED_CHARS", str(20_000_000)))
+# Longer tokens are encoded blobs or extraction noise rather than words
+MAX_TERM_LENGTH = 64
+POSTING_BATCH_SIZE = 1000
+
+def remove_content(connection, material_ids):
+    material_ids = list(material_ids)
+    connection.execute(delete(ContentPosting).where(ContentPosting.material_id.in_(material_ids)))
+    connection.execute(delete(ContentDocument).where(ContentDocument.material_id.in_(material_ids)))
+
+def index_material_content(session: Session, material: Material) -> Optional[int]:
+    """
+    Replaces the material's postings with those of its stored file, extracting and
+    tokenizing it a page at a time. Returns the number of indexed tokens, or None when the
+    file has no extractable text (unsupported type or a damaged file). Does not commit.
+    """
+    remove_content(session.connection(), [material.id])
+    counts, length, pages, chars = Counter(), 0, 0, 0
+    try:
+        for page in extract_pages(material.file_path, material.content_type, material.filename):
+            tokens = [token for token in tokenize(page) if len(token) <= MAX_TERM_LENGTH]
+            counts.update(tokens)
+            length += len(tokens)
+            pages += 1
+            chars += len(page)
+            if chars >= MAX_INDEXED_CHARS:
+                break
+    except (UnsupportedDocument, ExtractionError):
+        return None
+
+    rows = [dict(term=term, material_id=material.id, tf=tf) for term, tf in counts.items()]
+    for start in range(0, len(rows), POSTING_BATCH_SIZE):
+        session.execute(insert(ContentPosting), rows[start:start + POSTING_BATCH_SIZE])
+    session.execute(insert(ContentDocument).values(material_id=material.id, length=length, pages=pages))
+    return length
+
+def queue_content_indexing(session: Session, material_ids):
+    enqueue_many(session, INDEX_CONTENT, [{"material_id": str(material_id)} for material_id in material_ids])
+
+@job_handler(INDEX_CONTENT)
+def _index_content_job(session: Session, payload: dict):
+    material = session.get(Material, uuid.UUID(payload["material_id"]))
+    if material is not None:
+        index_material_content(session, material)
+
+async def content_search(db, department_id, q: str, limit: int) -> List[Tuple[uuid.UUID, float]]:
+    """
+    (material_id, score) for the department's materials whose extracted text matches `q`,
+    best first. Scores are BM25 over the department's indexed documents; the per-term sums
+    run in the database, so only the top `limit` ids come back.
+    """
+    terms = sorted(set(tokenize(q, split_codes=False)))
+    if not terms:
+        return []
+    in_department = Material.department_id == department_id
+
+    n, avg_length = (await db.execute(
+        select(func.count(), func.avg(ContentDocument.length))
+        .join(Material, Material.id == ContentDocument.material_id)
+        .where(in_department)
+    )).one()
+    if not n or not avg_length:
+        return []
+    document_frequencies = (await db.execute(
+        select(ContentPosting.term, func.count())
+        .join(Material, Material.id == ContentPosting.material_id)
+        .where(in_department, ContentPosting.term.in_(terms))
+        .group_by(ContentPosting.term)
+    )).all()
+    if not document_frequencies:
+        return []
+
+    idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in document_frequencies}
+    tf = ContentPosting.tf
+    norm = K1 * (1 - B + B * ContentDocument.length / float(avg_length))
+    score = func.sum(case(idf, value=ContentPosting.term) * tf * (K1 + 1) / (tf + norm)).label("score")
+    rows = await db.execute(
+        select(ContentPosting.material_id, score)
+        .join(ContentDocument, ContentDocument.material_id == ContentPosting.material_id)
+        .join(Material, Material.id == ContentPosting.material_id)
+        .where(in_department, ContentPosting.term.in_(list(idf)))
+        .group_by(ContentPosting.material_id)
+        .order_by(score.desc(), ContentPosting.material_id)
+        .limit(limit)
+    )
+    return [(material_id, score) for material_id, score in rows]
+
+@event.listens_for(Material, "before_delete")
+def _drop_material_content(mapper, connection, target):
+    # ON DELETE CASCADE covers PostgreSQL; SQLite does not enforce foreign keys by default
+    remove_content(connection, [target.id])
@@ -0,0 +1,120 @@
+import hmac
+import json
+import os
+import time
+import uuid
+from typing import NamedTuple, Optional, Tuple
+
+from sqlalchemy import event, inspect
+
+from ..models.models import Material
+from ..policies.base import UserContext
+from .tokens import JWT_TTL, KeyRing, _b64decode, _b64encode, key_ring, parse_keys, record_revocation_on_commit, revocations
+
+# Tickets are signed with TICKET_KEYS ("kid:secret,...", active key TICKET_ACTIVE_KID) when
+# set, so a front proxy can be given a key that cannot mint access tokens; otherwise
+# with the access-token keys.
+TICKET_KEYS = os.getenv("TICKET_KEYS", "")
+TICKET_ACTIVE_KID = os.getenv("TICKET_ACTIVE_KID")
+DOWNLOAD_TICKET_TTL = int(os.getenv("DOWNLOAD_TICKET_TTL", "300"))
+# Revocation entries live as long as access tokens, so no ticket may outlive them
+MAX_TICKET_TTL = JWT_TTL
+
+# Signed together with the payload so a ticket can never be replayed as an access token
+_DOMAIN = b"download-ticket."
+
+# Changes that can withdraw a user's DOWNLOAD permission or repoint the stored object
+_MATERIAL_ATTRIBUTES = ("department_id", "level", "visibility_scope", "file_path")
+
+class InvalidTicket(ValueError):
+    pass
+
+class DownloadTicket(NamedTuple):
+    """What a valid ticket authorizes: one user downloading one stored object until `expires_at`."""
+    user_id: str
+    material_id: str
+    key: str
+    filename: Optional[str]
+    content_type: Optional[str]
+    sha256: Optional[str]
+    expires_at: int
+    jti: str
+
+ticket_key_ring = KeyRing(parse_keys(TICKET_KEYS), TICKET_ACTIVE_KID) if TICKET_KEYS else key_ring
+
+def issue_ticket(user: UserContext, material: Material, ttl: int = DOWNLOAD_TICKET_TTL, keys: KeyRing = None,
+                 now: float = None) -> Tuple[str, int]:
+    """
+    Signs a ticket for a DOWNLOAD the caller has already authorized and returns it with its
+    expiry (Unix time). The ticket carries the storage key and response metadata, so
+    serving it needs no database access.
+    """
+    keys = keys or ticket_key_ring
+    issued_at = int(time.time() if now is None else now)
+    claims = {
+        "kid": keys.active_kid,
+        "sub": user.user_id,
+        "mid": str(material.id),
+        "key": material.file_path,
+        "filename": material.filename,
+        "content_type": material.content_type,
+        "sha256": material.sha256,
+        "iat": issued_at,
+        "exp": issued_at + min(ttl, MAX_TICKET_TTL),
+        "jti": uuid.uuid4().hex,
+    }
+    payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+    signature = keys.sign(keys.active_kid, _DOMAIN + payload.encode("ascii"))
+    return f"{payload}.{_b64encode(signature)}", claims["exp"]
+
+def _claims(ticket: str, keys: KeyRing, now: float) -> dict:
+    try:
+        payload, encoded_signature = ticket.split(".")
+        signature = _b64decode(encoded_signature)
+        claims = json.loads(_b64decode(payload))
+    except ValueError:
+        raise InvalidTicket("Malformed ticket")
+    # Unverified input: check types before using the kid as a key
+    if not isinstance(claims, dict) or not isinstance(claims.get("kid"), str) or claims["kid"] not in keys.keys:
+        raise InvalidTicket("Unknown signing key")
+    if not hmac.compare_digest(signature, keys.sign(claims["kid"], _DOMAIN + payload.encode("ascii"))):
+        raise InvalidTicket("Invalid ticket signature")
+    if not isinstance(claims.get("exp"), int) or claims["exp"] <= now:
+        raise InvalidTicket("Ticket expired")
+    # RevocationList.is_revoked compares iat with user and material cut-offs
+    if not isinstance(claims.get("iat"), int):
+        raise InvalidTicket("Malformed ticket")
+    return claims
+
+def _ticket(claims: dict) -> DownloadTicket:
+    try:
+        return DownloadTicket(claims["sub"], claims["mid"], claims["key"], claims.get("filename"),
+                              claims.get("content_type"), claims.get("sha256"), claims["exp"], claims["jti"])
+    except KeyError:
+        raise InvalidTicket("Malformed ticket")
+
+def validate_ticket(ticket: str, keys: KeyRing = None, now: float = None) -> DownloadTicket:
+    """Checks signature, expiry and revocation without touching the database; raises InvalidTicket."""
+    claims = _claims(ticket, keys or ticket_key_ring, time.time() if now is None else now)
+    if revocations.is_revoked(claims):
+        raise InvalidTicket("Ticket revoked")
+    return _ticket(claims)
+
+def revoke_ticket(ticket: str, keys: KeyRing = None) -> Tuple[DownloadTicket, dict]:
+    """
+    Revokes one ticket for the rest of its lifetime in this process; returns it with the
+    row that shares the revocation with other processes (save_revocation).
+    """
+    claims = _claims(ticket, keys or ticket_key_ring, time.time())
+    revoked = _ticket(claims)
+    return revoked, revocations.revoke(revoked.jti, revoked.expires_at)
+
+@event.listens_for(Material, "after_update")
+def _revoke_on_material_change(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in _MATERIAL_ATTRIBUTES):
+        record_revocation_on_commit(connection, target, revocations.material_revocation(str(target.id)))
+
+@event.listens_for(Material, "after_delete")
+def _revoke_on_material_delete(mapper, connection, target):
+    record_revocation_on_commit(connection, target, revocations.material_revocation(str(target.id)))
@@ -0,0 +1,130 @@
+import codecs
+import os
+import tempfile
+import zipfile
+from contextlib import contextmanager
+from pathlib import PurePosixPath
+from typing import Iterable, Iterator, Optional
+from xml.etree.ElementTree import ParseError, iterparse
+
+try:
+    import pypdf
+except ImportError:  # optional: PDFs are left unindexed without it
+    pypdf = None
+
+from . import storage
+
+# Plain text and DOCX are yielded in pages of roughly this many characters
+PAGE_CHARS = 64 * 1024
+
+PDF = "pdf"
+DOCX = "docx"
+TEXT = "text"
+
+_TYPES = {
+    "application/pdf": PDF,
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": DOCX,
+}
+_SUFFIXES = {".pdf": PDF, ".docx": DOCX, ".txt": TEXT, ".md": TEXT, ".csv": TEXT}
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+class UnsupportedDocument(Exception):
+    """The file is not a type we extract text from, or its extractor is not installed."""
+
+class ExtractionError(Exception):
+    """The file claims a supported type but could not be parsed."""
+
+def document_kind(content_type: Optional[str], filename: Optional[str]) -> Optional[str]:
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in _TYPES:
+        return _TYPES[content_type]
+    if content_type.startswith("text/"):
+        return TEXT
+    if filename:
+        return _SUFFIXES.get(PurePosixPath(filename).suffix.lower())
+    return None
+
+def text_pages(chunks: Iterable[bytes], page_chars: int = PAGE_CHARS) -> Iterator[str]:
+    """Decodes UTF-8 chunks into pages cut at whitespace, so no word spans two pages."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    buffer = ""
+    for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        while len(buffer) >= page_chars:
+            cut = max(buffer.rfind(" ", 0, page_chars), buffer.rfind("\n", 0, page_chars))
+            cut = cut + 1 if cut > 0 else page_chars
+            yield buffer[:cut]
+            buffer = buffer[cut:]
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer
+
+def docx_pages(path: str, page_chars: int = PAGE_CHARS) -> Iterator[str]:
+    """Paragraph text of word/document.xml, streamed out of the zip with iterparse."""
+    try:
+        with zipfile.ZipFile(path) as archive, archive.open("word/document.xml") as document:
+            paragraphs, size = [], 0
+            for _, element in iterparse(document, events=("end",)):
+                if element.tag != f"{_W}p":
+                    continue
+                text = "".join(node.text or "" for node in element.iter(f"{_W}t"))
+                element.clear()
+                paragraphs.append(text)
+                size += len(text)
+                if size >= page_chars:
+                    yield "\n".join(paragraphs)
+                    paragraphs, size = [], 0
+            if paragraphs:
+                yield "\n".join(paragraphs)
+    except (zipfile.BadZipFile, KeyError, ParseError) as exc:
+        raise ExtractionError(f"Unreadable DOCX: {exc}") from exc
+
+def pdf_pages(path: str) -> Iterator[str]:
+    """One string per PDF page; pypdf parses pages lazily as they are reached."""
+    if pypdf is None:
+        raise UnsupportedDocument("PDF text extraction needs the optional pypdf package")
+    try:
+        reader = pypdf.PdfReader(path)
+        for page in reader.pages:
+            yield page.extract_text() or ""
+    except Exception as exc:  # pypdf raises a wide range of errors on damaged files
+        raise ExtractionError(f"Unreadable PDF: {exc}") from exc
+
+@contextmanager
+def local_copy(backend: storage.StorageBackend, key: str, size: int):
+    """A filesystem path for `key`: the stored file itself, or a temporary copy streamed from the backend."""
+    path = backend.local_path(key)
+    if path is not None:
+        yield path
+        return
+    fd, path = tempfile.mkstemp(prefix=".extract-")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for chunk in backend.read_range(key, 0, size - 1):
+                out.write(chunk)
+        yield path
+    finally:
+        os.unlink(path)
+
+def extract_pages(key: str, content_type: Optional[str], filename: Optional[str]) -> Iterator[str]:
+    """
+    Streams the text of a stored file page by page, so large documents are never held in
+    memory whole. Raises UnsupportedDocument for types without an extractor and
+    ExtractionError for files that fail to parse.
+    """
+    kind = document_kind(content_type, filename)
+    if kind is None:
+        raise UnsupportedDocument(f"No text extractor for {content_type or filename or 'this file'}")
+    if kind == PDF and pypdf is None:
+        raise UnsupportedDocument("PDF text extraction needs the optional pypdf package")
+
+    backend = storage.get_backend()
+    info = backend.stat(key)
+    if info is None:
+        raise FileNotFoundError(key)
+    if kind == TEXT:
+        yield from text_pages(backend.read_range(key, 0, info.size - 1))
+        return
+    with local_copy(backend, key, info.size) as path:
+        yield from (pdf_pages(path) if kind == PDF else docx_pages(path))
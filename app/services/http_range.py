@@ -0,0 +1,166 @@
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from typing import AsyncIterator, Callable, List, Mapping, Optional, Tuple
+from urllib.parse import quote
+
+from starlette.responses import Response, StreamingResponse
+
+# Requests asking for more ranges than this get the full body instead
+MAX_RANGES = 16
+
+ByteRange = Tuple[int, int]
+
+def parse_range(header: Optional[str], size: int) -> Optional[List[ByteRange]]:
+    """
+    Parses a `Range: bytes=...` header into inclusive (start, end) pairs clipped to `size`.
+    Returns None when the header is absent, malformed or not in bytes (serve the whole body),
+    and an empty list when it is valid but nothing is satisfiable (416).
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec.strip():
+        return None
+
+    ranges = []
+    for part in spec.split(","):
+        start_text, dash, end_text = part.strip().partition("-")
+        if not dash or not (start_text.isdigit() or start_text == "") or not (end_text.isdigit() or end_text == ""):
+            return None
+        if start_text == "":
+            # Suffix range: the last N bytes
+            if end_text == "":
+                return None
+            suffix = int(end_text)
+            if suffix > 0 and size > 0:
+                ranges.append((max(size - suffix, 0), size - 1))
+            continue
+        start = int(start_text)
+        if end_text and int(end_text) < start:
+            return None
+        if start < size:
+            end = int(end_text) if end_text else size - 1
+            ranges.append((start, min(end, size - 1)))
+
+    if len(ranges) > MAX_RANGES:
+        return None
+    return ranges
+
+def _etag_list(header: str) -> List[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+def _weak_equal(a: str, b: str) -> bool:
+    return a.removeprefix("W/") == b.removeprefix("W/")
+
+def _http_date_timestamp(value: str) -> Optional[int]:
+    try:
+        return int(parsedate_to_datetime(value).timestamp())
+    except (TypeError, ValueError):
+        return None
+
+def etag_matches(headers: Mapping[str, str], etag: Optional[str]) -> bool:
+    """True if If-None-Match is present and matches `etag` (weak comparison)."""
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is None or etag is None:
+        return False
+    tags = _etag_list(if_none_match)
+    return "*" in tags or any(_weak_equal(tag, etag) for tag in tags)
+
+def content_disposition(filename: str) -> str:
+    return f"attachment; filename*=UTF-8''{quote(filename)}"
+
+def is_not_modified(headers: Mapping[str, str], etag: Optional[str], last_modified: float) -> bool:
+    """If-None-Match (weak comparison) takes precedence over If-Modified-Since, per RFC 9110."""
+    if headers.get("if-none-match") is not None:
+        return etag_matches(headers, etag)
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since:
+        since = _http_date_timestamp(if_modified_since)
+        return since is not None and int(last_modified) <= since
+    return False
+
+def _if_range_allows(headers: Mapping[str, str], etag: Optional[str], last_modified: float) -> bool:
+    """A Range is only honoured if If-Range (when sent) still matches the representation."""
+    if_range = headers.get("if-range")
+    if if_range is None:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        # Strong comparison: weak validators never match
+        return etag is not None and not etag.startswith("W/") and if_range == etag
+    return _http_date_timestamp(if_range) == int(last_modified)
+
+def ranged_response(
+    headers: Mapping[str, str],
+    size: int,
+    last_modified: float,
+    etag: Optional[str],
+    iter_range: Callable[[int, int], AsyncIterator[bytes]],
+    media_type: Optional[str] = None,
+    filename: Optional[str] = None,
+) -> Response:
+    """
+    Builds a GET response for a stored file with conditional and byte-range handling:
+    304 for matching If-None-Match/If-Modified-Since, 206 for one range, 206
+    multipart/byteranges for several, 416 when nothing is satisfiable, 200 otherwise.
+    `iter_range(start, end)` streams the inclusive byte range from storage (nothing when end < start).
+    """
+    media_type = media_type or "application/octet-stream"
+    base_headers = {
+        "accept-ranges": "bytes",
+        "last-modified": formatdate(last_modified, usegmt=True),
+        # Authorized content: private caches only, always revalidated (cheap with 304s)
+        "cache-control": "private, no-cache",
+    }
+    if etag:
+        base_headers["etag"] = etag
+    if filename:
+        base_headers["content-disposition"] = content_disposition(filename)
+
+    if is_not_modified(headers, etag, last_modified):
+        return Response(status_code=304, headers=base_headers)
+
+    ranges = parse_range(headers.get("range"), size) if _if_range_allows(headers, etag, last_modified) else None
+
+    if ranges is None:
+        return StreamingResponse(
+            iter_range(0, size - 1),
+            media_type=media_type,
+            headers={**base_headers, "content-length": str(size)}
+        )
+
+    if not ranges:
+        return Response(status_code=416, headers={**base_headers, "content-range": f"bytes */{size}"})
+
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        return StreamingResponse(
+            iter_range(start, end),
+            status_code=206,
+            media_type=media_type,
+            headers={**base_headers, "content-range": f"bytes {start}-{end}/{size}", "content-length": str(end - start + 1)}
+        )
+
+    boundary = os.urandom(12).hex()
+    part_headers = [
+        f"--{boundary}\r\nContent-Type: {media_type}\r\nContent-Range: bytes {start}-{end}/{size}\r\n\r\n".encode()
+        for start, end in ranges
+    ]
+    closing = f"--{boundary}--\r\n".encode()
+    length = sum(len(h) + (end - start + 1) + 2 for h, (start, end) in zip(part_headers, ranges)) + len(closing)
+
+    async def multipart():
+        for head, (start, end) in zip(part_headers, ranges):
+            yield head
+            async for chunk in iter_range(start, end):
+                yield chunk
+            yield b"\r\n"
+        yield closing
+
+    return StreamingResponse(
+        multipart(),
+        status_code=206,
+        media_type=f"multipart/byteranges; boundary={boundary}",
+        headers={**base_headers, "content-length": str(length)}
+    )
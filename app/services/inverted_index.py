@@ -0,0 +1,136 @@
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Hashable, Iterable, List, Set, Tuple
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+ALNUM_SPLIT_RE = re.compile(r"[a-z]+|[0-9]+")
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Minimum share of the query's trigrams a document must contain for a fuzzy (typo-tolerant)
+# match; mirrors pg_trgm's word_similarity_threshold
+FUZZY_THRESHOLD = 0.6
+
+def tokenize(text: str, split_codes: bool = True) -> List[str]:
+    """
+    Lowercased alphanumeric tokens. With split_codes, mixed tokens such as course codes
+    also yield their parts (cs101 -> cs101, cs, 101) so documents match partial codes.
+    """
+    tokens = []
+    for token in TOKEN_RE.findall(text.lower()):
+        tokens.append(token)
+        if split_codes:
+            parts = ALNUM_SPLIT_RE.findall(token)
+            if len(parts) > 1:
+                tokens.extend(parts)
+    return tokens
+
+def trigrams(text: str) -> Set[str]:
+    """Character trigrams of the padded, lowercased text (the pg_trgm convention)."""
+    grams = set()
+    for word in TOKEN_RE.findall(text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+class InvertedIndex:
+    """
+    In-memory inverted index with BM25 ranking, substring matching and trigram fuzzy matching.
+    Used as the search backend where PostgreSQL full-text search is unavailable (e.g. SQLite).
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[Hashable, int]] = defaultdict(dict)
+        self.trigram_postings: Dict[str, Set[Hashable]] = defaultdict(set)
+        self.doc_lengths: Dict[Hashable, int] = {}
+        self.doc_text: Dict[Hashable, str] = {}
+        self.doc_trigrams: Dict[Hashable, Set[str]] = {}
+        self.total_length = 0
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def add(self, doc_id: Hashable, text: str):
+        if doc_id in self.doc_lengths:
+            self.remove(doc_id)
+
+        tokens = tokenize(text)
+        for token, tf in Counter(tokens).items():
+            self.postings[token][doc_id] = tf
+        grams = trigrams(text)
+        for gram in grams:
+            self.trigram_postings[gram].add(doc_id)
+
+        self.doc_lengths[doc_id] = len(tokens)
+        self.doc_text[doc_id] = text.lower()
+        self.doc_trigrams[doc_id] = grams
+        self.total_length += len(tokens)
+
+    def remove(self, doc_id: Hashable):
+        if doc_id not in self.doc_lengths:
+            return
+        for token in set(tokenize(self.doc_text[doc_id])):
+            docs = self.postings.get(token)
+            if docs is not None:
+                docs.pop(doc_id, None)
+                if not docs:
+                    del self.postings[token]
+        for gram in self.doc_trigrams[doc_id]:
+            docs = self.trigram_postings.get(gram)
+            if docs is not None:
+                docs.discard(doc_id)
+                if not docs:
+                    del self.trigram_postings[gram]
+
+        self.total_length -= self.doc_lengths.pop(doc_id)
+        del self.doc_text[doc_id]
+        del self.doc_trigrams[doc_id]
+
+    def _bm25(self, tokens: Iterable[str]) -> Dict[Hashable, float]:
+        n = len(self.doc_lengths)
+        avg_length = self.total_length / n if n else 0.0
+        scores: Dict[Hashable, float] = defaultdict(float)
+        for token in set(tokens):
+            docs = self.postings.get(token)
+            if not docs:
+                continue
+            idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc_id, tf in docs.items():
+                norm = K1 * (1 - B + B * self.doc_lengths[doc_id] / avg_length) if avg_length else K1
+                scores[doc_id] += idf * tf * (K1 + 1) / (tf + norm)
+        return scores
+
+    def _trigram_candidates(self, grams: Set[str]) -> Counter:
+        shared = Counter()
+        for gram in grams:
+            for doc_id in self.trigram_postings.get(gram, ()):
+                shared[doc_id] += 1
+        return shared
+
+    def search(self, query: str, limit: int = None) -> List[Tuple[Hashable, float]]:
+        """
+        Returns (doc_id, score) pairs, best first. A document matches if it shares a token
+        with the query, contains the query as a substring, or is trigram-similar to it.
+        """
+        scores = self._bm25(tokenize(query, split_codes=False))
+
+        needle = query.lower().strip()
+        grams = trigrams(query)
+        if len(needle) >= 3 and grams:
+            for doc_id, shared in self._trigram_candidates(grams).items():
+                similarity = shared / len(grams)
+                if needle in self.doc_text[doc_id]:
+                    scores[doc_id] += 1.0 + similarity
+                elif similarity >= FUZZY_THRESHOLD:
+                    scores[doc_id] += similarity
+        elif needle:
+            # Too short for meaningful trigrams: fall back to a plain substring scan
+            for doc_id, text in self.doc_text.items():
+                if needle in text:
+                    scores[doc_id] += 1.0
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:limit] if limit else ranked
@@ -0,0 +1,237 @@
+import logging
+import os
+import random
+import socket
+import threading
+import traceback
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from time import perf_counter
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import and_, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from ..metrics import JOB_DURATION, JOBS
+from ..models.models import Job, JobStatus
+
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+# Retry n waits JOB_BACKOFF_BASE * 2**(n-1) seconds, capped at JOB_BACKOFF_MAX, with jitter
+JOB_BACKOFF_BASE = float(os.getenv("JOB_BACKOFF_BASE", "5"))
+JOB_BACKOFF_MAX = float(os.getenv("JOB_BACKOFF_MAX", "900"))
+# A claimed job whose worker has not finished it within the lease is handed out again
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "600"))
+JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", "4"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+# Run a worker thread inside each API process; otherwise run scripts/run_worker.py
+JOB_WORKER_IN_PROCESS = os.getenv("JOB_WORKER_IN_PROCESS", "false").lower() in ("1", "true", "yes")
+
+logger = logging.getLogger(__name__)
+
+class JobHandler(NamedTuple):
+    run: Callable[[Session, dict], None]
+    max_attempts: int
+    on_failure: Optional[Callable[[Session, dict, str], None]]
+    on_retry: Optional[Callable[[Session, dict, str], None]] = None
+
+_handlers: Dict[str, JobHandler] = {}
+
+def job_handler(kind: str, max_attempts: int = JOB_MAX_ATTEMPTS,
+                on_failure: Optional[Callable[[Session, dict, str], None]] = None,
+                on_retry: Optional[Callable[[Session, dict, str], None]] = None):
+    """
+    Registers `fn(session, payload)` for jobs of `kind`. Whatever the handler leaves
+    uncommitted commits together with the job's completion; on an exception that work
+    is rolled back and the job retried with backoff. A handler that commits progress
+    early (e.g. a "processing" status) must undo it in `on_retry(session, payload,
+    error)`, which runs in the transaction that requeues the job. After the last attempt
+    `on_failure(session, payload, error)` runs in the transaction that marks the job failed.
+    """
+    def register(fn):
+        _handlers[kind] = JobHandler(fn, max_attempts, on_failure, on_retry)
+        return fn
+    return register
+
+def _max_attempts(kind: str) -> int:
+    handler = _handlers.get(kind)
+    return handler.max_attempts if handler else JOB_MAX_ATTEMPTS
+
+def enqueue(session, kind: str, payload: dict, delay: float = 0) -> Job:
+    """
+    Adds a job to `session` (sync, async or ThreadedSession), so it is committed, or
+    rolled back, together with the caller's own changes.
+    """
+    job = Job(id=uuid.uuid4(), kind=kind, payload=payload, status=JobStatus.QUEUED, attempts=0,
+              max_attempts=_max_attempts(kind), run_at=datetime.utcnow() + timedelta(seconds=delay))
+    session.add(job)
+    return job
+
+def enqueue_many(session: Session, kind: str, payloads: Iterable[dict]):
+    """One executemany insert for many jobs of the same kind, e.g. from bulk imports."""
+    rows = [dict(kind=kind, payload=payload, max_attempts=_max_attempts(kind)) for payload in payloads]
+    if rows:
+        session.execute(insert(Job), rows)
+
+def retry_delay(attempt: int, rng: Callable[[], float] = random.random) -> float:
+    """Seconds to wait before retrying after `attempt` failed attempts: capped exponential, half jittered."""
+    delay = min(JOB_BACKOFF_MAX, JOB_BACKOFF_BASE * 2 ** (attempt - 1))
+    return delay / 2 + delay / 2 * rng()
+
+class ClaimedJob(NamedTuple):
+    id: uuid.UUID
+    kind: str
+    payload: dict
+    attempts: int
+    max_attempts: int
+
+def claim_jobs(session: Session, worker_id: str, limit: int, now: datetime = None) -> List[ClaimedJob]:
+    """
+    Leases up to `limit` due jobs to `worker_id`: queued jobs whose run_at has passed and
+    running jobs whose lease expired. SKIP LOCKED lets concurrent workers claim disjoint
+    jobs without waiting on each other. Commits.
+    """
+    now = now or datetime.utcnow()
+    due = or_(
+        and_(Job.status == JobStatus.QUEUED, Job.run_at <= now),
+        and_(Job.status == JobStatus.RUNNING, Job.locked_until < now),
+    )
+    jobs = session.scalars(
+        select(Job).where(due).order_by(Job.run_at).limit(limit).with_for_update(skip_locked=True)
+    ).all()
+    claimed = []
+    for job in jobs:
+        if job.attempts >= job.max_attempts:
+            # Its worker died during the final attempt
+            _fail(session, job.kind, job.payload, job.id, "Job lease expired after its final attempt")
+            continue
+        job.status = JobStatus.RUNNING
+        job.attempts += 1
+        job.locked_by = worker_id
+        job.locked_until = now + timedelta(seconds=JOB_LEASE_SECONDS)
+        claimed.append(ClaimedJob(job.id, job.kind, dict(job.payload), job.attempts, job.max_attempts))
+    session.commit()
+    return claimed
+
+def _finish(session: Session, job_id, worker_id: str, **values):
+    """Updates the job if this worker still holds its lease; returns whether it did."""
+    result = session.execute(
+        update(Job).where(Job.id == job_id, Job.locked_by == worker_id, Job.status == JobStatus.RUNNING)
+        .values(locked_by=None, locked_until=None, updated_at=datetime.utcnow(), **values)
+    )
+    return result.rowcount == 1
+
+def _fail(session: Session, kind: str, payload: dict, job_id, error: str):
+    session.execute(
+        update(Job).where(Job.id == job_id)
+        .values(status=JobStatus.FAILED, locked_by=None, locked_until=None, last_error=error,
+                updated_at=datetime.utcnow())
+    )
+    handler = _handlers.get(kind)
+    if handler and handler.on_failure:
+        handler.on_failure(session, payload, error)
+
+def run_job(session_factory: Callable[[], Session], job: ClaimedJob, worker_id: str) -> str:
+    """Runs one claimed job in its own session and records the outcome; returns it."""
+    start = perf_counter()
+    with session_factory() as session:
+        try:
+            handler = _handlers.get(job.kind)
+            if handler is None:
+                raise LookupError(f"No handler registered for job kind {job.kind!r}")
+            handler.run(session, job.payload)
+            outcome = "done" if _finish(session, job.id, worker_id, status=JobStatus.DONE, last_error=None) \
+                else "lost"
+            session.commit()
+        except Exception as exc:
+            session.rollback()
+            error = "".join(traceback.format_exception_only(type(exc), exc)).strip()
+            if job.attempts < job.max_attempts:
+                run_at = datetime.utcnow() + timedelta(seconds=retry_delay(job.attempts))
+                retried = _finish(session, job.id, worker_id, status=JobStatus.QUEUED, run_at=run_at,
+                                  last_error=error)
+                handler = _handlers.get(job.kind)
+                if retried and handler and handler.on_retry:
+                    handler.on_retry(session, job.payload, error)
+                outcome = "retry" if retried else "lost"
+            elif _finish(session, job.id, worker_id, status=JobStatus.FAILED, last_error=error):
+                handler = _handlers.get(job.kind)
+                if handler and handler.on_failure:
+                    handler.on_failure(session, job.payload, error)
+                outcome = "failed"
+            else:
+                outcome = "lost"
+            session.commit()
+    JOBS.inc(job.kind, outcome)
+    JOB_DURATION.observe(perf_counter() - start, job.kind)
+    return outcome
+
+def queue_depth(session: Session) -> Dict[str, int]:
+    """Jobs per status, for monitoring."""
+    rows = session.execute(select(Job.status, func.count()).group_by(Job.status))
+    return {status.value: count for status, count in rows}
+
+class JobWorker:
+    """
+    Leases due jobs and runs them on a thread pool of `concurrency` threads, claiming only
+    as many jobs as there are idle threads. Runs in a background thread of the API
+    process (JOB_WORKER_IN_PROCESS) or in the foreground of scripts/run_worker.py.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], concurrency: int = JOB_CONCURRENCY,
+                 poll_interval: float = JOB_POLL_INTERVAL, worker_id: Optional[str] = None):
+        self.session_factory = session_factory
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def claim(self, limit: int) -> List[ClaimedJob]:
+        with self.session_factory() as session:
+            return claim_jobs(session, self.worker_id, limit)
+
+    def run_pending(self) -> int:
+        """Runs every job that is due now, one at a time; returns how many ran. Handy in tests and scripts."""
+        count = 0
+        while not self._stop.is_set():
+            jobs = self.claim(1)
+            if not jobs:
+                return count
+            run_job(self.session_factory, jobs[0], self.worker_id)
+            count += 1
+        return count
+
+    def run(self):
+        """Polls until stop() is called, then waits for in-flight jobs."""
+        in_flight = set()
+        with ThreadPoolExecutor(self.concurrency, thread_name_prefix="job-worker") as executor:
+            while not self._stop.is_set():
+                claimed = []
+                if len(in_flight) < self.concurrency:
+                    try:
+                        claimed = self.claim(self.concurrency - len(in_flight))
+                    except Exception:
+                        logger.exception("Claiming jobs failed")
+                for job in claimed:
+                    in_flight.add(executor.submit(run_job, self.session_factory, job, self.worker_id))
+                if claimed and len(in_flight) < self.concurrency:
+                    continue
+                if in_flight:
+                    done, in_flight = wait(in_flight, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        if future.exception() is not None:
+                            logger.error("Job crashed", exc_info=future.exception())
+                else:
+                    self._stop.wait(self.poll_interval)
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="job-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
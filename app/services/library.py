@@ -0,0 +1,44 @@
+from typing import Dict, List, Tuple
+
+from sqlalchemy import case, func, select
+
+from ..models.models import Material
+from ..policies.base import Action, UserContext
+from ..policies.sql import compile_material_policy
+from .pagination import KEYSET_COLUMNS, encode_cursor
+from .serialization import MATERIAL_COLUMNS
+
+def level_summary_query(department_id, user: UserContext):
+    """Per-level material and downloadable counts, aggregated in one GROUP BY."""
+    downloadable = case((compile_material_policy(user, Action.DOWNLOAD), 1), else_=0)
+    return (
+        select(Material.level, func.count().label("count"), func.sum(downloadable).label("downloadable"))
+        .where(Material.department_id == department_id)
+        .group_by(Material.level)
+        .order_by(Material.level)
+    )
+
+def top_per_level_query(query, per_level_limit: int):
+    """
+    Wraps a MATERIAL_COLUMNS query to keep the first per_level_limit rows of each level
+    in keyset order, plus one look-ahead row per level that tells whether it continues.
+    The ranking is a row_number() window, so only the kept rows leave the database.
+    """
+    rank = func.row_number().over(partition_by=Material.level, order_by=KEYSET_COLUMNS[1:]).label("rank")
+    ranked = query.add_columns(rank).subquery()
+    return (
+        select(*(ranked.c[column.key] for column in MATERIAL_COLUMNS))
+        .where(ranked.c.rank <= per_level_limit + 1)
+        .order_by(ranked.c.level, ranked.c.rank)
+    )
+
+def split_levels(rows: List, per_level_limit: int) -> Tuple[List, Dict[int, str]]:
+    """Drops each level's look-ahead row from a top_per_level_query() result and returns (rows, next cursors)."""
+    kept, cursors, taken = [], {}, {}
+    for row in rows:
+        count = taken[row.level] = taken.get(row.level, 0) + 1
+        if count <= per_level_limit:
+            kept.append(row)
+        else:
+            cursors[row.level] = encode_cursor(kept[-1])
+    return kept, cursors
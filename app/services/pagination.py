@@ -0,0 +1,74 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import tuple_
+
+from ..dependencies import db_session
+from ..models.models import Material
+from ..policies.base import UserContext, Action
+from ..policies.engine import evaluate_many
+from .serialization import dumps, material_dicts
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+STREAM_BATCH_SIZE = 500
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Keyset ordering; (department_id, level) is served by idx_material_dept_level
+KEYSET_COLUMNS = (Material.level, Material.created_at, Material.id)
+
+def encode_cursor(material) -> str:
+    """Opaque cursor pointing just after `material` in keyset order."""
+    payload = [material.level, material.created_at.isoformat(), str(material.id)]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[int, datetime, uuid.UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        level, created_at, material_id = json.loads(base64.urlsafe_b64decode(padded))
+        return int(level), datetime.fromisoformat(created_at), uuid.UUID(material_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+def keyset_query(query, cursor: Optional[str] = None):
+    """Orders a Material query by (level, created_at, id) and resumes after `cursor`."""
+    query = query.order_by(*KEYSET_COLUMNS)
+    if cursor is not None:
+        query = query.where(tuple_(*KEYSET_COLUMNS) > tuple_(*decode_cursor(cursor)))
+    return query
+
+def page_query(query, cursor: Optional[str], limit: Optional[int]):
+    # One extra row tells us whether another page follows
+    return keyset_query(query, cursor).limit((limit or DEFAULT_PAGE_SIZE) + 1)
+
+def split_page(rows: List, limit: Optional[int]) -> Tuple[List, Optional[str]]:
+    """Trims the look-ahead row from a page_query() result and returns (rows, next_cursor)."""
+    limit = limit or DEFAULT_PAGE_SIZE
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1])
+
+async def stream_materials(query, user: UserContext) -> AsyncIterator[bytes]:
+    """
+    Streams a MATERIAL_COLUMNS query as NDJSON, one MaterialRead-shaped object per line
+    with its download flag. Rows are read from a server-side cursor in STREAM_BATCH_SIZE
+    partitions on a session owned by the generator, so memory stays flat regardless of result size.
+    """
+    async with db_session(read_only=True) as db:
+        result = await db.stream(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+        async for partition in result.partitions(STREAM_BATCH_SIZE):
+            allowed = evaluate_many(user, Action.DOWNLOAD, partition)
+            yield b"".join(dumps(item) + b"\n" for item in material_dicts(partition, allowed))
+
+def ndjson_response(query, user: UserContext, cursor: Optional[str], limit: Optional[int]) -> StreamingResponse:
+    """NDJSON StreamingResponse over a Material query in keyset order, resuming after `cursor`."""
+    query = keyset_query(query, cursor)
+    if limit:
+        query = query.limit(limit)
+    return StreamingResponse(stream_materials(query, user), media_type=NDJSON_MEDIA_TYPE)
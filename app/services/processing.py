@@ -0,0 +1,98 @@
+import mimetypes
+import uuid
+from typing import Callable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from ..models.models import Material, MaterialStatus
+from . import response_cache  # noqa: F401  material writes here (job worker, bulk import) bump library versions
+from . import storage
+from .content_index import index_material_content
+from .jobs import enqueue, enqueue_many, job_handler
+
+PROCESS_MATERIAL = "material.process"
+
+# Leading bytes of the file types the library holds, for uploads sent without a useful content type
+_SIGNATURES = (
+    (b"%PDF-", "application/pdf"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"ID3", "audio/mpeg"),
+    (b"fLaC", "audio/flac"),
+    (b"OggS", "audio/ogg"),
+    (b"PK\x03\x04", "application/zip"),
+)
+_GENERIC_TYPES = (None, "", "application/octet-stream")
+SNIFF_BYTES = 512
+
+class ProcessingError(Exception):
+    pass
+
+_steps: List[Callable[[Session, Material], None]] = []
+
+def processing_step(fn: Callable[[Session, Material], None]):
+    """Registers a step run, in registration order, for every uploaded material."""
+    _steps.append(fn)
+    return fn
+
+def queue_material(db, material_id: uuid.UUID):
+    """Queues processing for a material added to `db` in the same transaction."""
+    enqueue(db, PROCESS_MATERIAL, {"material_id": str(material_id)})
+
+def queue_materials(session: Session, material_ids):
+    enqueue_many(session, PROCESS_MATERIAL, [{"material_id": str(material_id)} for material_id in material_ids])
+
+def sniff_content_type(head: bytes, filename: Optional[str]) -> Optional[str]:
+    for signature, content_type in _SIGNATURES:
+        if head.startswith(signature):
+            if content_type == "application/zip" and filename:
+                # .docx, .pptx, .epub and friends are zip containers
+                return mimetypes.guess_type(filename)[0] or content_type
+            return content_type
+    return mimetypes.guess_type(filename)[0] if filename else None
+
+@processing_step
+def verify_stored_object(session: Session, material: Material):
+    info = storage.get_backend().stat(material.file_path)
+    if info is None:
+        raise ProcessingError(f"Stored object {material.file_path} is missing")
+    if material.size_bytes is not None and info.size != material.size_bytes:
+        raise ProcessingError(f"Stored object is {info.size} bytes, expected {material.size_bytes}")
+
+@processing_step
+def detect_content_type(session: Session, material: Material):
+    if material.content_type not in _GENERIC_TYPES:
+        return
+    end = min(SNIFF_BYTES, material.size_bytes if material.size_bytes is not None else SNIFF_BYTES) - 1
+    head = b"".join(storage.get_backend().read_range(material.file_path, 0, end))
+    material.content_type = sniff_content_type(head, material.filename) or material.content_type
+
+@processing_step
+def index_content(session: Session, material: Material):
+    index_material_content(session, material)
+
+def _set_status(session: Session, payload: dict, status: MaterialStatus):
+    material = session.get(Material, uuid.UUID(payload["material_id"]))
+    if material is not None:
+        material.status = status
+
+def _mark_pending(session: Session, payload: dict, error: str):
+    _set_status(session, payload, MaterialStatus.PENDING)
+
+def _mark_failed(session: Session, payload: dict, error: str):
+    _set_status(session, payload, MaterialStatus.FAILED)
+
+@job_handler(PROCESS_MATERIAL, on_failure=_mark_failed, on_retry=_mark_pending)
+def process_material(session: Session, payload: dict):
+    material = session.get(Material, uuid.UUID(payload["material_id"]))
+    if material is None:
+        return  # Deleted before it was processed
+    # Committed up front so the status is visible while the steps run; a failed
+    # attempt puts the material back to PENDING until its retry
+    material.status = MaterialStatus.PROCESSING
+    session.commit()
+    for step in _steps:
+        step(session, material)
+    material.status = MaterialStatus.READY
@@ -0,0 +1,185 @@
+import hashlib
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Hashable, Iterable, Mapping, NamedTuple, Optional, Set
+
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.orm import Session
+from starlette.responses import Response
+
+from ..models.models import Department, Material
+from ..policies.base import UserContext
+from ..policies.download_index import download_index
+from .http_range import etag_matches
+
+LIBRARY_CACHE_SIZE = int(os.getenv("LIBRARY_CACHE_SIZE", "1024"))
+# Upper bound on staleness for writes that bypass the ORM (raw SQL, other applications)
+LIBRARY_CACHE_TTL = float(os.getenv("LIBRARY_CACHE_TTL", "300"))
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+
+class ResponseCache:
+    """
+    LRU of encoded JSON response bodies keyed by (department_id, ...), each kept at most
+    `ttl` seconds. Entries are dropped per department when its materials change in this
+    process. Each department carries a generation counter so a response built from data
+    read before an invalidation is never stored after it. Changes made by other
+    processes are seen through the department's library_version, which callers put in
+    the key (department_library_version).
+    """
+
+    def __init__(self, maxsize: int = LIBRARY_CACHE_SIZE, ttl: float = LIBRARY_CACHE_TTL,
+                 clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._generations = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: tuple) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self._clock():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def generation(self, department_id: str) -> int:
+        """Read before querying; pass to set() so stale results are not stored."""
+        return self._epoch + self._generations.get(department_id, 0)
+
+    def set(self, key: tuple, body: bytes, generation: int) -> CachedResponse:
+        cached = CachedResponse(body=body, etag=f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"')
+        with self._lock:
+            if self._epoch + self._generations.get(key[0], 0) == generation:
+                self._entries[key] = (self._clock() + self.ttl, cached)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return cached
+
+    def invalidate_department(self, department_id: str):
+        with self._lock:
+            self._generations[department_id] = self._generations.get(department_id, 0) + 1
+            for key in [key for key in self._entries if key[0] == department_id]:
+                del self._entries[key]
+            self.invalidations += 1
+
+    def invalidate_all(self):
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "size": len(self._entries),
+        }
+
+library_cache = ResponseCache()
+
+def library_cache_key(department_id, user: UserContext) -> tuple:
+    """
+    Library views only differ by download flags, so users whose precomputed DOWNLOAD
+    rules match (e.g. librarians and admins) share an entry.
+    """
+    rule = download_index.rule(user)
+    return (str(department_id), rule.max_level, rule.override, rule.version)
+
+async def department_library_version(db, department_id) -> int:
+    """Read before the cache lookup and put in the key: bumped by every committed material change."""
+    return await db.scalar(select(Department.library_version).where(Department.id == department_id)) or 0
+
+def cached_json_response(request_headers: Mapping[str, str], cached: CachedResponse, hit: bool) -> Response:
+    headers = {"etag": cached.etag, "cache-control": "private, no-cache", "x-cache": "HIT" if hit else "MISS"}
+    if etag_matches(request_headers, cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+# Departments touched by a session's flushed-but-uncommitted changes; "*" means unknown
+_DIRTY_KEY = "library_cache_dirty"
+
+def _dirty(session: Session) -> Set[Hashable]:
+    return session.info.setdefault(_DIRTY_KEY, set())
+
+def _bump_library_versions(connection, departments: Iterable[Hashable]):
+    """Bumps library_version in the writing transaction, so other processes' cache keys change at commit."""
+    departments = set(departments)
+    if not departments:
+        return
+    statement = update(Department).values(library_version=Department.library_version + 1)
+    if "*" not in departments:
+        statement = statement.where(Department.id.in_([uuid.UUID(d) for d in departments]))
+    connection.execute(statement)
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_departments(session, flush_context):
+    changed = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Material) and (obj not in session.dirty or session.is_modified(obj)):
+            changed.add(str(obj.department_id))
+            # A material moved between departments changes both; if the old value was
+            # never loaded we can't tell which department it left
+            history = inspect(obj).attrs.department_id.history
+            if history.added and not history.deleted and obj not in session.new:
+                changed.add("*")
+            changed.update(str(old) for old in history.deleted)
+    _dirty(session).update(changed)
+    _bump_library_versions(session.connection(), changed)
+
+def _statement_departments(orm_execute_state) -> Set[Hashable]:
+    """Departments a bulk statement changes: those named by INSERT parameters, otherwise "*"."""
+    params = orm_execute_state.parameters
+    rows = params if isinstance(params, (list, tuple)) else [params] if params else []
+    if orm_execute_state.is_insert and rows and all(row.get("department_id") is not None for row in rows):
+        return {str(row["department_id"]) for row in rows}
+    return {"*"}
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_changes(orm_execute_state):
+    if (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete) and any(
+        mapper.class_ is Material for mapper in orm_execute_state.all_mappers
+    ):
+        changed = _statement_departments(orm_execute_state)
+        _dirty(orm_execute_state.session).update(changed)
+        _bump_library_versions(orm_execute_state.session.connection(), changed)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    # Invalidating at commit (not flush) means readers can't re-cache pre-commit data
+    dirty = session.info.pop(_DIRTY_KEY, None)
+    if not dirty:
+        return
+    if "*" in dirty:
+        library_cache.invalidate_all()
+        return
+    for department_id in dirty:
+        library_cache.invalidate_department(department_id)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session):
+    session.info.pop(_DIRTY_KEY, None)
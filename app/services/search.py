@@ -0,0 +1,112 @@
+import threading
+import uuid
+from typing import Dict, Tuple
+
+from sqlalchemy import case, event, false, func, inspect, literal_column, or_, select
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+from ..models.models import Material
+from .inverted_index import InvertedIndex
+
+# Text search configuration used by the materials.search_vector generated column
+SEARCH_CONFIG = "simple"
+
+# Maintained by PostgreSQL (see the add_material_search_index migration); not mapped on the
+# model so that SQLite-backed metadata.create_all() keeps working.
+search_vector = literal_column("materials.search_vector", TSVECTOR)
+
+def _document_text(title: str, course_code: str) -> str:
+    return f"{title} {course_code or ''}"
+
+def postgres_search(q: str):
+    """
+    Full-text match on search_vector (GIN), substring match on title/course_code
+    (pg_trgm GIN indexes make the leading-wildcard ILIKE indexable) and typo-tolerant
+    word similarity on the title. Ranked by ts_rank_cd plus title similarity.
+    """
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    pattern = f"%{q}%"
+    match = or_(
+        search_vector.op("@@")(tsquery),
+        Material.title.ilike(pattern),
+        Material.course_code.ilike(pattern),
+        Material.title.op("%>")(q)
+    )
+    rank = func.ts_rank_cd(search_vector, tsquery) + func.word_similarity(q, Material.title)
+    return match, rank.desc()
+
+class DepartmentSearchIndexes:
+    """
+    Per-department InvertedIndex instances for databases without PostgreSQL full-text search.
+    Each index is built from the department's titles and course codes on first use and then
+    kept current by the Material mapper events below.
+    """
+
+    def __init__(self):
+        self._indexes: Dict[str, InvertedIndex] = {}
+        self._lock = threading.Lock()
+
+    async def get(self, db, department_id) -> InvertedIndex:
+        key = str(department_id)
+        index = self._indexes.get(key)
+        if index is not None:
+            return index
+
+        rows = (await db.execute(
+            select(Material.id, Material.title, Material.course_code)
+            .where(Material.department_id == uuid.UUID(key))
+        )).all()
+        index = InvertedIndex()
+        for material_id, title, course_code in rows:
+            index.add(material_id, _document_text(title, course_code))
+
+        with self._lock:
+            return self._indexes.setdefault(key, index)
+
+    def add_material(self, department_id, material_id, title: str, course_code: str):
+        index = self._indexes.get(str(department_id))
+        if index is not None:
+            with self._lock:
+                index.add(material_id, _document_text(title, course_code))
+
+    def remove_material(self, department_id, material_id):
+        index = self._indexes.get(str(department_id))
+        if index is not None:
+            with self._lock:
+                index.remove(material_id)
+
+    def clear(self):
+        self._indexes.clear()
+
+fallback_indexes = DepartmentSearchIndexes()
+
+async def material_search(db, department_id, q: str) -> Tuple:
+    """
+    Returns (where_clause, order_by) matching `q` within a department, using PostgreSQL
+    full-text search when available and the in-memory fallback index otherwise.
+    """
+    if db.bind.dialect.name == "postgresql":
+        return postgres_search(q)
+
+    index = await fallback_indexes.get(db, department_id)
+    ranked = [material_id for material_id, _ in index.search(q)]
+    if not ranked:
+        return false(), Material.id
+    positions = {material_id: position for position, material_id in enumerate(ranked)}
+    return Material.id.in_(ranked), case(positions, value=Material.id)
+
+@event.listens_for(Material, "after_insert")
+def _index_new_material(mapper, connection, target):
+    fallback_indexes.add_material(target.department_id, target.id, target.title, target.course_code)
+
+@event.listens_for(Material, "after_update")
+def _reindex_material(mapper, connection, target):
+    department_history = inspect(target).attrs.department_id.history
+    if department_history.deleted:
+        # Moved between departments: drop it from the old department's index
+        fallback_indexes.remove_material(department_history.deleted[0], target.id)
+    fallback_indexes.add_material(target.department_id, target.id, target.title, target.course_code)
+
+@event.listens_for(Material, "after_delete")
+def _unindex_material(mapper, connection, target):
+    fallback_indexes.remove_material(target.department_id, target.id)
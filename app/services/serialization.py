@@ -0,0 +1,68 @@
+import json
+import uuid
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Iterable, List, Mapping, Optional, Sequence
+
+from starlette.responses import Response
+
+from ..metrics import stage
+from ..models.models import Material
+
+try:
+    import orjson
+except ImportError:  # fall back to the stdlib encoder
+    orjson = None
+
+# Columns behind a MaterialRead in its field order, then department_id for the policy check.
+# Selecting these as plain rows skips ORM identity-map and pydantic overhead on list endpoints.
+MATERIAL_COLUMNS = (
+    Material.title,
+    Material.course_code,
+    Material.level,
+    Material.visibility_scope,
+    Material.id,
+    Material.uploaded_by,
+    Material.created_at,
+    Material.size_bytes,
+    Material.sha256,
+    Material.status,
+    Material.department_id,
+)
+
+# MaterialRead fields, positionally matching the leading MATERIAL_COLUMNS
+_READ_FIELDS = ("title", "course_code", "level", "visibility_scope", "id", "uploaded_by",
+                "created_at", "size_bytes", "sha256", "status")
+
+def _default(value: Any):
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    """JSON-encodes plain dicts/lists of UUIDs, datetimes and enums the way MaterialRead would."""
+    with stage("serialize"):
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
+        return json.dumps(content, default=_default, separators=(",", ":")).encode()
+
+def material_dicts(rows: Sequence, allowed: Iterable[bool]) -> List[dict]:
+    """
+    MaterialRead-shaped dicts for MATERIAL_COLUMNS rows, with their download flags.
+    Rows come straight from the database, so they are not re-validated.
+    """
+    with stage("serialize"):
+        results = []
+        for row, dl_allowed in zip(rows, allowed):
+            item = dict(zip(_READ_FIELDS, row))
+            item["download_allowed"] = dl_allowed
+            results.append(item)
+    return results
+
+def json_response(content: Any, headers: Optional[Mapping[str, str]] = None) -> Response:
+    """Pre-encoded JSON response; the route's response_model still documents the shape."""
+    return Response(content=dumps(content), media_type="application/json", headers=headers)
@@ -0,0 +1,132 @@
+import uuid
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, event, exists, insert, inspect, select, union_all
+from sqlalchemy.engine import Connection
+
+from ..models.models import Course, Enrollment, EnrollmentStatus, Material, ShelfEntry
+from ..policies.base import UserContext
+
+# Enrollments that put a course's materials on the student's shelf
+SHELF_STATUSES = (EnrollmentStatus.ACTIVE, EnrollmentStatus.CARRY_OVER)
+
+def _entries(*conditions):
+    """
+    (user_id, material_id, course_code) for every shelf entry matching `conditions`. A
+    material's course_code is free text, so another department's material can carry the
+    same code: materials match a course on both code and department.
+    """
+    return (
+        select(Enrollment.user_id, Material.id, Material.course_code)
+        .distinct()
+        .join(Course, Course.id == Enrollment.course_id)
+        .join(Material, (Material.course_code == Course.course_code) & (Material.department_id == Course.department_id))
+        .where(Enrollment.status.in_(SHELF_STATUSES), *conditions)
+    )
+
+def _insert_entries(connection: Connection, *conditions):
+    connection.execute(
+        insert(ShelfEntry).from_select(["user_id", "material_id", "course_code"], _entries(*conditions))
+    )
+
+def refresh_user_course(connection: Connection, user_id, course_code: Optional[str]):
+    """Rebuilds one user's entries for one course, e.g. after an enrollment changes."""
+    if course_code is None:
+        return
+    connection.execute(
+        delete(ShelfEntry).where(ShelfEntry.user_id == user_id, ShelfEntry.course_code == course_code)
+    )
+    _insert_entries(connection, Enrollment.user_id == user_id, Course.course_code == course_code)
+
+def refresh_materials(connection: Connection, material_ids: Iterable):
+    """Rebuilds the entries of the given materials, e.g. after they are inserted or recoded."""
+    material_ids = list(material_ids)
+    connection.execute(delete(ShelfEntry).where(ShelfEntry.material_id.in_(material_ids)))
+    _insert_entries(connection, Material.id.in_(material_ids))
+
+def refresh_course_codes(connection: Connection, course_codes: Iterable[str]):
+    """Rebuilds every entry for the given course codes, e.g. after a course is recoded or moved."""
+    course_codes = [code for code in course_codes if code is not None]
+    connection.execute(delete(ShelfEntry).where(ShelfEntry.course_code.in_(course_codes)))
+    _insert_entries(connection, Course.course_code.in_(course_codes))
+
+def rebuild(connection: Connection):
+    """Recomputes the whole table; incremental refreshes keep it current afterwards."""
+    connection.execute(delete(ShelfEntry))
+    _insert_entries(connection)
+
+def shelf_material_ids(user: UserContext):
+    """
+    IDs of the materials on the user's shelf: their shelf_entries when they have active or
+    carry-over enrollments, otherwise their department and level. Both branches are index
+    lookups and the enrollment check is uncorrelated, so the database evaluates it once.
+    """
+    user_id = uuid.UUID(user.user_id)
+    enrolled = exists().where(Enrollment.user_id == user_id, Enrollment.status.in_(SHELF_STATUSES))
+    return union_all(
+        select(ShelfEntry.material_id).where(ShelfEntry.user_id == user_id),
+        select(Material.id).where(
+            Material.department_id == uuid.UUID(user.department_id),
+            Material.level == user.level,
+            ~enrolled
+        )
+    )
+
+def shelf_query(user: UserContext, *columns):
+    """Selects `columns` for the user's shelf in a single statement; see shelf_material_ids."""
+    return select(*columns).where(Material.id.in_(shelf_material_ids(user)))
+
+def _course_code(connection: Connection, course_id) -> Optional[str]:
+    if course_id is None:
+        return None
+    return connection.scalar(select(Course.course_code).where(Course.id == course_id))
+
+def _old_value(target, name: str):
+    history = inspect(target).attrs[name].history
+    return history.deleted[0] if history.deleted else getattr(target, name)
+
+def _changed(target, *names) -> bool:
+    state = inspect(target)
+    return any(state.attrs[name].history.has_changes() for name in names)
+
+# Bulk statements (insert(Material) executemany) skip these events; their callers
+# refresh explicitly, as bulk_import does.
+
+@event.listens_for(Enrollment, "after_insert")
+@event.listens_for(Enrollment, "after_delete")
+def _refresh_enrollment(mapper, connection, target):
+    refresh_user_course(connection, target.user_id, _course_code(connection, target.course_id))
+
+@event.listens_for(Enrollment, "after_update")
+def _refresh_changed_enrollment(mapper, connection, target):
+    if not _changed(target, "status", "course_id", "user_id"):
+        return
+    old_user, old_course = _old_value(target, "user_id"), _old_value(target, "course_id")
+    if (old_user, old_course) != (target.user_id, target.course_id):
+        refresh_user_course(connection, old_user, _course_code(connection, old_course))
+    refresh_user_course(connection, target.user_id, _course_code(connection, target.course_id))
+
+@event.listens_for(Material, "after_insert")
+def _refresh_new_material(mapper, connection, target):
+    if target.course_code is not None:
+        _insert_entries(connection, Material.id == target.id)
+
+@event.listens_for(Material, "after_update")
+def _refresh_recoded_material(mapper, connection, target):
+    if _changed(target, "course_code", "department_id"):
+        refresh_materials(connection, [target.id])
+
+@event.listens_for(Material, "before_delete")
+def _drop_material_entries(mapper, connection, target):
+    # ON DELETE CASCADE covers PostgreSQL; SQLite does not enforce foreign keys by default
+    connection.execute(delete(ShelfEntry).where(ShelfEntry.material_id == target.id))
+
+@event.listens_for(Course, "after_update")
+def _refresh_recoded_course(mapper, connection, target):
+    if _changed(target, "course_code", "department_id"):
+        refresh_course_codes(connection, {_old_value(target, "course_code"), target.course_code})
+
+@event.listens_for(Course, "after_insert")
+@event.listens_for(Course, "after_delete")
+def _refresh_course(mapper, connection, target):
+    refresh_course_codes(connection, [target.course_code])
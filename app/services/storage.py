@@ -1,21 +1,336 @@
+import abc
+import hashlib
+import mimetypes
 import os
-import shutil
+import tempfile
 from pathlib import Path
-from fastapi import UploadFile
-from starlette.responses import FileResponse
-
-STORAGE_DIR = Path("/workspaces/MusicGen/storage")
-STORAGE_DIR.mkdir(parents=True, exist_ok=True)
-
-def save_file(file: UploadFile) -> str:
-    """Saves a file to local storage and returns the relative path."""
-    file_path = STORAGE_DIR / f"{os.urandom(8).hex()}_{file.filename}"
-    with file_path.open("wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    return str(file_path)
-
-def stream_file(file_path: str):
-    """Returns a FileResponse for streaming."""
-    if not os.path.exists(file_path):
+from typing import BinaryIO, Iterator, Mapping, NamedTuple, Optional, Tuple
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from starlette.responses import Response
+
+from .http_range import content_disposition, etag_matches, ranged_response
+
+try:
+    import boto3
+except ImportError:  # only needed for STORAGE_BACKEND=s3
+    boto3 = None
+
+# Local storage root; with the S3 backend it only holds upload staging files
+STORAGE_DIR = Path(os.getenv("STORAGE_DIR", "/workspaces/MusicGen/storage"))
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")
+S3_BUCKET = os.getenv("S3_BUCKET", "")
+S3_PREFIX = os.getenv("S3_PREFIX", "")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")
+
+# "x-accel-redirect" (nginx) or "x-sendfile" (Apache/lighttpd) hands downloads to the
+# front proxy; empty streams them from Python
+DOWNLOAD_OFFLOAD = os.getenv("DOWNLOAD_OFFLOAD", "").lower()
+X_ACCEL_PREFIX = os.getenv("X_ACCEL_PREFIX", "/protected-storage/")
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+STAGING_PREFIX = ".upload-"
+BLOB_PREFIX = "blobs/"
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(200 * 1024 * 1024)))
+
+class StoredFile(NamedTuple):
+    path: str
+    size_bytes: int
+    sha256: str
+
+class ObjectInfo(NamedTuple):
+    size: int
+    last_modified: float
+
+class StorageBackend(abc.ABC):
+    """
+    Where stored bytes live. Objects are addressed by keys such as "blobs/ab/cd/<sha256>".
+    Methods block; the module-level helpers run them in the threadpool.
+    """
+
+    @abc.abstractmethod
+    def put(self, staged_path: str, key: str) -> None:
+        """Moves a local staged file to `key`, dropping it if `key` already exists."""
+
+    @abc.abstractmethod
+    def stat(self, key: str) -> Optional[ObjectInfo]:
+        """Size and modification time of `key`, or None if it does not exist."""
+
+    @abc.abstractmethod
+    def read_range(self, key: str, start: int, end: int) -> Iterator[bytes]:
+        """Yields bytes start..end (inclusive); nothing when end < start."""
+
+    @abc.abstractmethod
+    def delete(self, key: str) -> int:
+        """Deletes `key` and returns the bytes freed (0 if it did not exist)."""
+
+    @abc.abstractmethod
+    def list(self, prefix: str) -> Iterator[Tuple[str, float]]:
+        """Yields (key, last_modified) for every object under `prefix`."""
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Filesystem path of `key`, for backends that have one (X-Sendfile)."""
+        return None
+
+class LocalStorageBackend(StorageBackend):
+    """Files under `root`. Absolute keys (uploads from before blob keys) are used as-is."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        return Path(key) if os.path.isabs(key) else self.root / key
+
+    def put(self, staged_path: str, key: str) -> None:
+        target = self._path(key)
+        if target.exists():
+            # Identical content is already stored
+            Path(staged_path).unlink(missing_ok=True)
+            return
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(staged_path, target)
+
+    def stat(self, key: str) -> Optional[ObjectInfo]:
+        try:
+            st = self._path(key).stat()
+        except FileNotFoundError:
+            return None
+        return ObjectInfo(size=st.st_size, last_modified=st.st_mtime)
+
+    def read_range(self, key: str, start: int, end: int) -> Iterator[bytes]:
+        remaining = end - start + 1
+        if remaining <= 0:
+            return
+        with self._path(key).open("rb") as f:
+            f.seek(start)
+            while remaining > 0:
+                chunk = f.read(min(DOWNLOAD_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    def delete(self, key: str) -> int:
+        path = self._path(key)
+        try:
+            size = path.stat().st_size
+            path.unlink()
+            return size
+        except FileNotFoundError:
+            return 0
+
+    def list(self, prefix: str) -> Iterator[Tuple[str, float]]:
+        base = self.root / prefix
+        if not base.exists():
+            return
+        for path in base.rglob("*"):
+            if path.is_file():
+                yield path.relative_to(self.root).as_posix(), path.stat().st_mtime
+
+    def local_path(self, key: str) -> Optional[str]:
+        return str(self._path(key))
+
+def _is_missing(exc: Exception) -> bool:
+    code = getattr(exc, "response", {}).get("Error", {}).get("Code")
+    return code in ("404", "NoSuchKey", "NotFound")
+
+class S3StorageBackend(StorageBackend):
+    """Objects in an S3-compatible bucket, under an optional key prefix."""
+
+    def __init__(self, bucket: str, prefix: str = "", client=None):
+        if client is None:
+            if boto3 is None:
+                raise RuntimeError("STORAGE_BACKEND=s3 requires boto3 to be installed.")
+            client = boto3.client("s3", endpoint_url=S3_ENDPOINT_URL)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def _head(self, key: str) -> Optional[dict]:
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self.prefix + key)
+        except Exception as exc:
+            if _is_missing(exc):
+                return None
+            raise
+
+    def put(self, staged_path: str, key: str) -> None:
+        if self._head(key) is None:
+            # upload_file switches to multipart uploads for large files
+            self.client.upload_file(staged_path, self.bucket, self.prefix + key)
+        Path(staged_path).unlink(missing_ok=True)
+
+    def stat(self, key: str) -> Optional[ObjectInfo]:
+        head = self._head(key)
+        if head is None:
+            return None
+        return ObjectInfo(size=head["ContentLength"], last_modified=head["LastModified"].timestamp())
+
+    def read_range(self, key: str, start: int, end: int) -> Iterator[bytes]:
+        if end < start:
+            return
+        body = self.client.get_object(Bucket=self.bucket, Key=self.prefix + key, Range=f"bytes={start}-{end}")["Body"]
+        try:
+            yield from body.iter_chunks(DOWNLOAD_CHUNK_SIZE)
+        finally:
+            body.close()
+
+    def delete(self, key: str) -> int:
+        head = self._head(key)
+        if head is None:
+            return 0
+        self.client.delete_object(Bucket=self.bucket, Key=self.prefix + key)
+        return head["ContentLength"]
+
+    def list(self, prefix: str) -> Iterator[Tuple[str, float]]:
+        kwargs = {"Bucket": self.bucket, "Prefix": self.prefix + prefix}
+        while True:
+            page = self.client.list_objects_v2(**kwargs)
+            for obj in page.get("Contents", []):
+                yield obj["Key"][len(self.prefix):], obj["LastModified"].timestamp()
+            if not page.get("IsTruncated"):
+                return
+            kwargs["ContinuationToken"] = page["NextContinuationToken"]
+
+_backend: Optional[StorageBackend] = None
+
+def get_backend() -> StorageBackend:
+    """The configured backend, created from STORAGE_BACKEND on first use."""
+    global _backend
+    if _backend is None:
+        if STORAGE_BACKEND == "s3":
+            _backend = S3StorageBackend(S3_BUCKET, S3_PREFIX)
+        else:
+            _backend = LocalStorageBackend(STORAGE_DIR)
+    return _backend
+
+def set_backend(backend: Optional[StorageBackend]):
+    """Replaces the backend; None goes back to the configured one on next use."""
+    global _backend
+    _backend = backend
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"File exceeds the {max_bytes} byte upload limit."
+    )
+
+def _write_chunk(out, digest, chunk: bytes):
+    digest.update(chunk)
+    out.write(chunk)
+
+async def stage_upload(file: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES) -> StoredFile:
+    """
+    Streams an upload into a temporary file in STORAGE_DIR in UPLOAD_CHUNK_SIZE chunks
+    without blocking the event loop, computing its SHA-256 on the way. Oversized uploads
+    are rejected with 413 before (or as soon as) they pass max_bytes and leave nothing behind.
+    The returned path is the staging file; hand it to place_blob() or discard_staged().
+    """
+    if file.size is not None and file.size > max_bytes:
+        raise _too_large(max_bytes)
+
+    await run_in_threadpool(STORAGE_DIR.mkdir, parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=STORAGE_DIR, prefix=STAGING_PREFIX)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise _too_large(max_bytes)
+                await run_in_threadpool(_write_chunk, out, digest, chunk)
+            await run_in_threadpool(os.fsync, out.fileno())
+    except BaseException:
+        Path(temp_path).unlink(missing_ok=True)
+        raise
+
+    return StoredFile(path=temp_path, size_bytes=size, sha256=digest.hexdigest())
+
+def stage_file(source: BinaryIO, max_bytes: int = MAX_UPLOAD_BYTES) -> StoredFile:
+    """Blocking counterpart of stage_upload() for local sources such as bulk-import archives."""
+    STORAGE_DIR.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=STORAGE_DIR, prefix=STAGING_PREFIX)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := source.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise _too_large(max_bytes)
+                _write_chunk(out, digest, chunk)
+            os.fsync(out.fileno())
+    except BaseException:
+        Path(temp_path).unlink(missing_ok=True)
+        raise
+
+    return StoredFile(path=temp_path, size_bytes=size, sha256=digest.hexdigest())
+
+def blob_key(sha256: str) -> str:
+    """Content-addressed key of a blob, sharded two levels deep (blobs/ab/cd/abcd...)."""
+    return f"{BLOB_PREFIX}{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+async def place_blob(staged: StoredFile, key: str):
+    """Moves a staged upload to its blob key, or drops it if that blob is already stored."""
+    await run_in_threadpool(get_backend().put, staged.path, key)
+
+def discard_staged(staged: StoredFile):
+    Path(staged.path).unlink(missing_ok=True)
+
+def content_etag(sha256: Optional[str]) -> Optional[str]:
+    """Strong ETag for stored content, derived from its SHA-256."""
+    return f'"{sha256}"' if sha256 else None
+
+def _offload_header(backend: StorageBackend, key: str) -> Optional[dict]:
+    if DOWNLOAD_OFFLOAD == "x-accel-redirect":
+        if os.path.isabs(key):
+            # Uploads from before blob keys can only be offloaded from under the storage root
+            try:
+                key = Path(key).relative_to(STORAGE_DIR).as_posix()
+            except ValueError:
+                return None
+        return {"x-accel-redirect": X_ACCEL_PREFIX + key}
+    if DOWNLOAD_OFFLOAD == "x-sendfile":
+        path = backend.local_path(key)
+        return {"x-sendfile": path} if path else None
+    return None
+
+async def stream_file(key: str, request_headers: Mapping[str, str], etag: Optional[str] = None,
+                      media_type: Optional[str] = None, filename: Optional[str] = None):
+    """
+    Returns a download response for a stored object honouring Range, If-Range,
+    If-None-Match and If-Modified-Since, or None if it is missing.
+    With DOWNLOAD_OFFLOAD set, the response is an empty X-Accel-Redirect/X-Sendfile
+    hand-off and the front proxy sends the bytes (and handles ranges) itself.
+    Without a content hash, a weak ETag is derived from the object's mtime and size.
+    """
+    backend = get_backend()
+    media_type = media_type or mimetypes.guess_type(filename or key)[0]
+
+    offload = _offload_header(backend, key)
+    if offload is not None:
+        headers = {"cache-control": "private, no-cache"}
+        if etag:
+            headers["etag"] = etag
+            if etag_matches(request_headers, etag):
+                return Response(status_code=304, headers=headers)
+        if filename:
+            headers["content-disposition"] = content_disposition(filename)
+        return Response(media_type=media_type or "application/octet-stream", headers={**headers, **offload})
+
+    info = await run_in_threadpool(backend.stat, key)
+    if info is None:
         return None
-    return FileResponse(file_path)
+    if etag is None:
+        etag = f'W/"{int(info.last_modified * 1e6):x}-{info.size:x}"'
+    return ranged_response(
+        request_headers,
+        size=info.size,
+        last_modified=info.last_modified,
+        etag=etag,
+        iter_range=lambda start, end: iterate_in_threadpool(backend.read_range(key, start, end)),
+        media_type=media_type,
+        filename=filename,
+    )
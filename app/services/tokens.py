@@ -0,0 +1,309 @@
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import delete, event, func, insert, inspect, select
+from sqlalchemy.orm import Session
+
+from ..models.models import TokenRevocation, User
+from ..policies.base import UserContext
+from .user_cache import CONTEXT_ATTRIBUTES
+
+# JWT_KEYS holds "kid:secret" pairs separated by commas; tokens are signed with
+# JWT_ACTIVE_KID and verified with whichever key their header names, so a new key can
+# be rolled out before it becomes active and an old one kept until its tokens expire.
+JWT_KEYS = os.getenv("JWT_KEYS", "")
+JWT_ACTIVE_KID = os.getenv("JWT_ACTIVE_KID")
+# Without JWT_KEYS the API refuses to start unless JWT_EPHEMERAL_KEY is set, which signs
+# with a random key per process (tests, single-process local development): tokens from
+# one worker would fail on every other.
+JWT_EPHEMERAL_KEY = os.getenv("JWT_EPHEMERAL_KEY", "false").lower() in ("1", "true", "yes")
+JWT_TTL = int(os.getenv("JWT_TTL", "3600"))
+JWT_LEEWAY = int(os.getenv("JWT_LEEWAY", "30"))
+JWT_ISSUER = os.getenv("JWT_ISSUER", "school-library")
+# How often each API process merges revocations recorded by other processes; 0 keeps
+# revocations process-local (tests)
+REVOCATION_SYNC_SECONDS = float(os.getenv("REVOCATION_SYNC_SECONDS", "5"))
+
+LOCAL_KID = "local"
+
+logger = logging.getLogger(__name__)
+
+class InvalidToken(ValueError):
+    pass
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+def parse_keys(spec: str) -> Dict[str, bytes]:
+    keys = {}
+    for pair in filter(None, (p.strip() for p in spec.split(","))):
+        kid, sep, secret = pair.partition(":")
+        if not sep or not kid or not secret:
+            raise ValueError("JWT_KEYS entries must look like kid:secret")
+        keys[kid] = secret.encode()
+    return keys
+
+class KeyRing:
+    """HS256 signing keys by kid, with one active key for issuing."""
+
+    def __init__(self, keys: Dict[str, bytes], active_kid: Optional[str] = None, ephemeral: bool = False):
+        if not keys:
+            if not ephemeral:
+                raise ValueError("JWT_KEYS is not set; set it (shared by every worker) or JWT_EPHEMERAL_KEY=true "
+                                 "for single-process development")
+            logger.warning("Signing tokens with a random process-local key: they will not verify in other processes")
+            keys = {LOCAL_KID: secrets.token_bytes(32)}
+        self.keys = keys
+        self.active_kid = active_kid or next(iter(keys))
+        if self.active_kid not in keys:
+            raise ValueError(f"JWT_ACTIVE_KID {self.active_kid!r} is not in JWT_KEYS")
+
+    def sign(self, kid: str, signing_input: bytes) -> bytes:
+        return hmac.new(self.keys[kid], signing_input, hashlib.sha256).digest()
+
+class RevocationList:
+    """
+    Revoked token ids and per-user/per-material revocation cut-offs, each kept only as
+    long as a token it could reject might still be valid. This is the in-process cache of
+    the token_revocations table: revoke* methods update it and return the row to record
+    (record_revocation/save_revocation), and sync() merges rows recorded by other
+    processes, so tokens are checked without a database round trip.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self._clock = clock
+        self._entries: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _put(self, key: str, value: float, expires_at: float) -> dict:
+        now = self._clock()
+        with self._lock:
+            self._entries = {k: e for k, e in self._entries.items() if e[0] > now}
+            current = self._entries.get(key)
+            if current is not None:
+                expires_at, value = max(expires_at, current[0]), max(value, current[1])
+            self._entries[key] = (expires_at, value)
+        return {"key": key, "cutoff": value, "expires_at": expires_at}
+
+    def _get(self, key: str) -> Optional[float]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= self._clock():
+            return None
+        return entry[1]
+
+    def apply(self, row: dict) -> dict:
+        """Adds a revocation row, e.g. one recorded by an ORM event once its transaction commits."""
+        return self._put(row["key"], row["cutoff"], row["expires_at"])
+
+    def revoke(self, jti: str, expires_at: float) -> dict:
+        return self._put(f"jti:{jti}", 0.0, expires_at + JWT_LEEWAY)
+
+    def _issued_before_now(self, key: str) -> dict:
+        now = self._clock()
+        # iat has whole-second resolution: cutting off at the previous second keeps a
+        # replacement token issued in the same second as the change valid
+        return {"key": key, "cutoff": float(int(now) - 1), "expires_at": now + JWT_TTL + JWT_LEEWAY}
+
+    def user_revocation(self, user_id: str) -> dict:
+        """The row rejecting every token issued to the user before now, without applying it."""
+        return self._issued_before_now(f"user:{user_id}")
+
+    def material_revocation(self, material_id: str) -> dict:
+        """The row rejecting every download ticket issued for the material before now, without applying it."""
+        return self._issued_before_now(f"material:{material_id}")
+
+    def revoke_user(self, user_id: str) -> dict:
+        """Rejects every token issued to the user before now, e.g. after a role or level change."""
+        return self.apply(self.user_revocation(user_id))
+
+    def revoke_material(self, material_id: str) -> dict:
+        """Rejects every download ticket issued for the material before now."""
+        return self.apply(self.material_revocation(material_id))
+
+    def is_revoked(self, claims: dict) -> bool:
+        if self._get(f"jti:{claims.get('jti')}") is not None:
+            return True
+        for key in (f"user:{claims.get('sub')}", f"material:{claims.get('mid')}"):
+            cutoff = self._get(key)
+            if cutoff is not None and claims["iat"] <= cutoff:
+                return True
+        return False
+
+    def sync(self, session):
+        """Merges the unexpired rows of token_revocations, recorded by any process, into the cache."""
+        now = self._clock()
+        rows = session.execute(
+            select(TokenRevocation.key, func.max(TokenRevocation.cutoff), func.max(TokenRevocation.expires_at))
+            .where(TokenRevocation.expires_at > now)
+            .group_by(TokenRevocation.key)
+        ).all()
+        for key, cutoff, expires_at in rows:
+            self._put(key, cutoff, expires_at)
+
+    def __len__(self):
+        return len(self._entries)
+
+def _revocation_statements(row: dict, now: float):
+    return (
+        insert(TokenRevocation).values(id=uuid.uuid4(), **row),
+        delete(TokenRevocation).where(TokenRevocation.expires_at <= now),
+    )
+
+def record_revocation(connection, row: dict):
+    """Writes a revocation through a blocking connection or session, e.g. from ORM events."""
+    for statement in _revocation_statements(row, time.time()):
+        connection.execute(statement)
+
+# Revocations recorded by a session's flushes, applied in this process once it commits
+_PENDING_KEY = "token_revocations_pending"
+
+def record_revocation_on_commit(connection, target, row: dict):
+    """
+    From an ORM event: records `row` in the flushing transaction and applies it to this
+    process's list only when that transaction commits, so a rolled-back change revokes nothing.
+    """
+    record_revocation(connection, row)
+    inspect(target).session.info.setdefault(_PENDING_KEY, []).append(row)
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed(session):
+    for row in session.info.pop(_PENDING_KEY, ()):
+        revocations.apply(row)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session):
+    session.info.pop(_PENDING_KEY, None)
+
+async def save_revocation(db, row: dict):
+    """Writes and commits a revocation through a request session."""
+    for statement in _revocation_statements(row, time.time()):
+        await db.execute(statement)
+    await db.commit()
+
+class RevocationSync:
+    """Background thread that calls revocations.sync every `interval` seconds (REVOCATION_SYNC_SECONDS)."""
+
+    def __init__(self, session_factory, interval: float = None, revocation_list: RevocationList = None):
+        self.session_factory = session_factory
+        self.interval = REVOCATION_SYNC_SECONDS if interval is None else interval
+        self.revocation_list = revocation_list
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def sync_once(self):
+        with self.session_factory() as session:
+            (self.revocation_list or revocations).sync(session)
+
+    def run(self):
+        while not self._stop.is_set():
+            try:
+                self.sync_once()
+            except Exception:
+                logger.exception("Token revocation sync failed")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="revocation-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+key_ring = KeyRing(parse_keys(JWT_KEYS), JWT_ACTIVE_KID, ephemeral=JWT_EPHEMERAL_KEY)
+revocations = RevocationList()
+
+def issue_token(context: UserContext, ttl: int = JWT_TTL, keys: KeyRing = None, now: float = None) -> str:
+    """Signs an access token whose claims carry everything UserContext needs."""
+    keys = keys or key_ring
+    issued_at = int(time.time() if now is None else now)
+    header = {"alg": "HS256", "typ": "JWT", "kid": keys.active_kid}
+    claims = {
+        "iss": JWT_ISSUER,
+        "sub": context.user_id,
+        "role": context.role.value,
+        "department_id": context.department_id,
+        "level": context.level,
+        "iat": issued_at,
+        "exp": issued_at + ttl,
+        "jti": uuid.uuid4().hex,
+    }
+    signing_input = f"{_b64encode(json.dumps(header).encode())}.{_b64encode(json.dumps(claims).encode())}"
+    signature = keys.sign(keys.active_kid, signing_input.encode("ascii"))
+    return f"{signing_input}.{_b64encode(signature)}"
+
+def decode_token(token: str, keys: KeyRing = None, now: float = None) -> dict:
+    """Verifies signature, issuer and lifetime and returns the claims; raises InvalidToken."""
+    keys = keys or key_ring
+    try:
+        encoded_header, encoded_claims, encoded_signature = token.split(".")
+        header = json.loads(_b64decode(encoded_header))
+        signature = _b64decode(encoded_signature)
+    except ValueError:
+        raise InvalidToken("Malformed token")
+
+    # The header is unverified input: check the kid's type before using it as a key
+    if (not isinstance(header, dict) or header.get("alg") != "HS256" or not isinstance(header.get("kid"), str)
+            or header["kid"] not in keys.keys):
+        raise InvalidToken("Unknown signing key")
+    expected = keys.sign(header["kid"], f"{encoded_header}.{encoded_claims}".encode("ascii"))
+    if not hmac.compare_digest(signature, expected):
+        raise InvalidToken("Invalid token signature")
+
+    try:
+        claims = json.loads(_b64decode(encoded_claims))
+    except ValueError:
+        raise InvalidToken("Malformed token")
+    if not isinstance(claims, dict):
+        raise InvalidToken("Malformed token")
+    now = time.time() if now is None else now
+    if claims.get("iss") != JWT_ISSUER:
+        raise InvalidToken("Invalid token issuer")
+    if not isinstance(claims.get("exp"), int) or claims["exp"] + JWT_LEEWAY < now:
+        raise InvalidToken("Token expired")
+    if not isinstance(claims.get("iat"), int) or claims["iat"] - JWT_LEEWAY > now:
+        raise InvalidToken("Token issued in the future")
+    return claims
+
+def authenticate_token(token: str, keys: KeyRing = None) -> UserContext:
+    """Builds the caller's UserContext from a bearer token without a database lookup."""
+    claims = decode_token(token, keys)
+    if revocations.is_revoked(claims):
+        raise InvalidToken("Token revoked")
+    try:
+        return UserContext(user_id=claims["sub"], role=claims["role"],
+                           department_id=claims["department_id"], level=claims["level"])
+    except (KeyError, ValueError):
+        raise InvalidToken("Token is missing user claims")
+
+def revoke_token(token: str, keys: KeyRing = None) -> dict:
+    """Revokes a token in this process; returns the row that shares it (save_revocation)."""
+    claims = decode_token(token, keys)
+    return revocations.revoke(claims["jti"], claims["exp"])
+
+# Tokens carry role, department and level, so changing any of them must retire
+# the user's outstanding tokens rather than wait for them to expire
+@event.listens_for(User, "after_update")
+def _revoke_on_context_change(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in CONTEXT_ATTRIBUTES):
+        # Recorded in the same transaction as the change itself
+        record_revocation_on_commit(connection, target, revocations.user_revocation(str(target.id)))
+
+@event.listens_for(User, "after_delete")
+def _revoke_on_delete(mapper, connection, target):
+    record_revocation_on_commit(connection, target, revocations.user_revocation(str(target.id)))
@@ -0,0 +1,163 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict
+from typing import Callable, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from ..models.models import User
+from ..policies.base import UserContext
+
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+
+# Attributes that feed into UserContext; changing any of them invalidates the cached entry
+CONTEXT_ATTRIBUTES = ("role", "department_id", "level")
+
+class LocalCacheBackend:
+    """
+    In-process stand-in for a shared cache (e.g. Redis) with the same get/set/delete shape.
+    Values are plain dicts so a networked backend can serialize them as JSON.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key: str, value: dict, ttl: float):
+        with self._lock:
+            self._data[key] = (self._clock() + ttl, value)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+class UserContextCache:
+    """
+    LRU/TTL cache of UserContext keyed by user id, optionally backed by a shared tier.
+    Entries in other processes' local tiers are bounded by the TTL; the shared tier
+    is invalidated explicitly.
+    """
+
+    def __init__(self, maxsize: int = USER_CACHE_SIZE, ttl: float = USER_CACHE_TTL,
+                 backend=None, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.backend = backend
+        self._clock = clock
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _shared_key(self, user_id: str) -> str:
+        return f"user_context:{user_id}"
+
+    def get(self, user_id: str) -> Optional[UserContext]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                expires_at, context = entry
+                if expires_at > self._clock():
+                    self._entries.move_to_end(user_id)
+                    self.hits += 1
+                    return context
+                del self._entries[user_id]
+
+        if self.backend is not None:
+            value = self.backend.get(self._shared_key(user_id))
+            if value is not None:
+                context = UserContext(**value)
+                self._store_local(user_id, context)
+                self.hits += 1
+                return context
+
+        self.misses += 1
+        return None
+
+    def set(self, user_id: str, context: UserContext):
+        self._store_local(user_id, context)
+        if self.backend is not None:
+            self.backend.set(self._shared_key(user_id), {**asdict(context), "role": context.role.value}, self.ttl)
+
+    def _store_local(self, user_id: str, context: UserContext):
+        with self._lock:
+            self._entries[user_id] = (self._clock() + self.ttl, context)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str):
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self.invalidations += 1
+        if self.backend is not None:
+            self.backend.delete(self._shared_key(user_id))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "size": len(self._entries),
+        }
+
+user_context_cache = UserContextCache()
+
+def user_context_for(session, user_id: str) -> Optional[UserContext]:
+    """Loads a UserContext with a blocking session, e.g. for scripts."""
+    user = session.get(User, uuid.UUID(str(user_id)))
+    if user is None:
+        return None
+    return UserContext(user_id=str(user.id), role=user.role, department_id=str(user.department_id), level=user.level)
+
+def invalidate_user(user_id) -> None:
+    """Drops the cached UserContext for a user; call after changing role, department or level."""
+    user_context_cache.invalidate(str(user_id))
+
+# Users whose context changed in a session's flushed-but-uncommitted changes
+_DIRTY_KEY = "user_cache_dirty"
+
+def _mark_dirty(target):
+    inspect(target).session.info.setdefault(_DIRTY_KEY, set()).add(target.id)
+
+@event.listens_for(User, "after_update")
+def _collect_context_change(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in CONTEXT_ATTRIBUTES):
+        _mark_dirty(target)
+
+@event.listens_for(User, "after_delete")
+def _collect_delete(mapper, connection, target):
+    _mark_dirty(target)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    # Invalidating at commit (not flush) means readers can't re-cache pre-commit data
+    for user_id in session.info.pop(_DIRTY_KEY, ()):
+        invalidate_user(user_id)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session):
+    session.info.pop(_DIRTY_KEY, None)
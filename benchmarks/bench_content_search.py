@@ -0,0 +1,118 @@
+"""
+Content indexing throughput and /search/content query latency.
+
+Writes --documents synthetic plain-text files of about --document-kb each (words drawn
+from a Zipf-like vocabulary, so common and rare terms behave as in real notes), indexes
+them with index_material_content, then times content_search for one- to three-term
+queries. Uses an SQLite file by default; pass --database-url for PostgreSQL (the tables
+are created if missing, and the rows are removed afterwards).
+
+    python -m benchmarks.bench_content_search --documents 500 --document-kb 64
+"""
+import argparse
+import asyncio
+import random
+import shutil
+import statistics
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from sqlalchemy import create_engine, delete
+from sqlalchemy.orm import Session
+
+from app.database import Base, ThreadedSession
+from app.models.models import Material, VisibilityScope
+from app.services import storage
+from app.services.content_index import content_search, index_material_content, remove_content
+
+VOCABULARY = 20_000
+QUERIES = 200
+
+def _word(rank: int) -> str:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    word = ""
+    rank += 26
+    while rank:
+        rank, digit = divmod(rank, 26)
+        word = letters[digit] + word
+    return word
+
+def synthetic_text(rng: random.Random, size: int, weights) -> bytes:
+    words = rng.choices(range(VOCABULARY), cum_weights=weights, k=size // 4)
+    lines = (" ".join(_word(w) for w in words[i:i + 12]) for i in range(0, len(words), 12))
+    return "\n".join(lines).encode()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=500)
+    parser.add_argument("--document-kb", type=int, default=64)
+    parser.add_argument("--database-url")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    cumulative, total = [], 0.0
+    for rank in range(VOCABULARY):
+        total += 1 / (rank + 1)
+        cumulative.append(total)
+
+    workdir = Path(tempfile.mkdtemp(prefix="bench-content-"))
+    storage.set_backend(storage.LocalStorageBackend(workdir / "storage"))
+    engine = create_engine(args.database_url or f"sqlite:///{workdir / 'bench.sqlite'}")
+    Base.metadata.create_all(engine)
+    department_id = uuid.uuid4()
+
+    with Session(engine) as session:
+        materials = []
+        for i in range(args.documents):
+            content = synthetic_text(rng, args.document_kb * 1024, cumulative)
+            key = f"bench/{i}.txt"
+            path = workdir / "storage" / key
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(content)
+            materials.append(Material(
+                id=uuid.uuid4(), title=f"Document {i}", course_code="BEN101", department_id=department_id, level=100,
+                visibility_scope=VisibilityScope.DEPARTMENT, file_path=key, content_type="text/plain",
+                size_bytes=len(content), uploaded_by=uuid.uuid4()))
+        session.add_all(materials)
+        session.commit()
+
+        start = time.perf_counter()
+        tokens = sum(index_material_content(session, material) for material in materials)
+        session.commit()
+        elapsed = time.perf_counter() - start
+        megabytes = sum(m.size_bytes for m in materials) / 1024 ** 2
+        print(f"indexed {len(materials)} documents, {megabytes:.1f} MB, {tokens:,} tokens in {elapsed:.2f}s: "
+              f"{len(materials) / elapsed:.1f} docs/s, {megabytes / elapsed:.2f} MB/s, {tokens / elapsed:,.0f} tokens/s")
+
+        async def run_queries():
+            db = ThreadedSession(session)
+            samples = {}
+            for terms in (1, 2, 3):
+                times = []
+                for _ in range(QUERIES):
+                    # Mix frequent and rare terms
+                    q = " ".join(_word(rng.choice((rng.randrange(50), rng.randrange(VOCABULARY)))) for _ in range(terms))
+                    start = time.perf_counter()
+                    await content_search(db, department_id, q, args.limit)
+                    times.append(time.perf_counter() - start)
+                times.sort()
+                samples[terms] = (statistics.median(times) * 1000, times[int(len(times) * 0.95) - 1] * 1000)
+            return samples
+
+        print(f"{'terms':>6}{'p50 ms':>10}{'p95 ms':>10}")
+        for terms, (p50, p95) in asyncio.run(run_queries()).items():
+            print(f"{terms:>6}{p50:>10.2f}{p95:>10.2f}")
+
+        if args.database_url:
+            ids = [m.id for m in materials]
+            remove_content(session.connection(), ids)
+            session.execute(delete(Material).where(Material.id.in_(ids)))
+            session.commit()
+    storage.set_backend(None)
+    shutil.rmtree(workdir)
+
+if __name__ == "__main__":
+    main()
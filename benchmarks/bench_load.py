@@ -0,0 +1,89 @@
+"""
+Load benchmark: requests per second for the sync (threadpool) and async (AsyncSession)
+database modes of the API.
+
+Starts one uvicorn worker per mode against DATABASE_URL, drives it with concurrent
+clients for a fixed duration and prints throughput and latency percentiles.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_load --user-id <uuid> --path /shelf/
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+MODES = {"sync": "false", "async": "true"}
+
+def _wait_until_up(url: str, timeout: float = 20.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.TransportError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not come up")
+
+async def _drive(base_url: str, path: str, headers: dict, concurrency: int, duration: float) -> list:
+    latencies = []
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits) as client:
+        async def worker():
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                response = await client.get(path)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+def run_mode(mode: str, args) -> dict:
+    # Throwaway single-process server: X-User-Id and a process-local key are acceptable here
+    env = dict(os.environ, DB_ASYNC=MODES[mode], DB_POOL_SIZE=str(args.concurrency), ALLOW_USER_ID_HEADER="true")
+    env.setdefault("JWT_EPHEMERAL_KEY", "true")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning"],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        _wait_until_up(base_url + "/")
+        latencies = asyncio.run(_drive(base_url, args.path, {"x-user-id": args.user_id}, args.concurrency, args.duration))
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies.sort()
+    return {
+        "mode": mode,
+        "requests": len(latencies),
+        "rps": len(latencies) / args.duration,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", required=True, help="X-User-Id of an existing user")
+    parser.add_argument("--path", default="/shelf/")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--modes", default="sync,async")
+    args = parser.parse_args()
+
+    print(f"{'mode':<8}{'requests':>10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for mode in args.modes.split(","):
+        r = run_mode(mode, args)
+        print(f"{r['mode']:<8}{r['requests']:>10}{r['rps']:>10.1f}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Per-evaluation cost of the policy engine's contexts: pydantic UserContext/MaterialContext
+with a fresh PolicyDecision per call (the previous models, reproduced here) against the
+frozen slotted dataclasses and shared decision constants in app.policies.
+
+Each evaluation builds a MaterialContext from a row and checks DOWNLOAD, as the
+metadata and download endpoints do. B/eval is the size of the context and decision
+objects each evaluation allocates.
+
+    python -m benchmarks.bench_policy --evaluations 100000
+"""
+import argparse
+import random
+import sys
+import time
+from typing import Callable, List
+
+from pydantic import BaseModel
+
+from app.policies.base import Action, MaterialContext, Role, UserContext, VisibilityScope
+from app.policies.material import check_material_policy
+
+class PydanticUserContext(BaseModel):
+    user_id: str
+    role: Role
+    department_id: str
+    level: int
+
+class PydanticMaterialContext(BaseModel):
+    id: str
+    department_id: str
+    level: int
+    visibility_scope: VisibilityScope
+
+class PydanticPolicyDecision(BaseModel):
+    allowed: bool
+    reason: str
+
+def pydantic_check(user: PydanticUserContext, material: PydanticMaterialContext) -> PydanticPolicyDecision:
+    # The DOWNLOAD branch of check_material_policy as it was, default decision included
+    decision = PydanticPolicyDecision(allowed=False, reason="Action not permitted by default.")
+    if material.department_id != user.department_id:
+        return PydanticPolicyDecision(allowed=False, reason="Download restricted to department materials.")
+    if (material.level <= user.level or
+            material.visibility_scope == VisibilityScope.GLOBAL_SEARCHABLE or
+            user.role in [Role.LIBRARIAN, Role.ADMIN]):
+        return PydanticPolicyDecision(allowed=True, reason="Download authorized based on level, visibility, or role.")
+    return PydanticPolicyDecision(allowed=False, reason="Insufficient level or visibility for download.")
+
+def _rows(count: int) -> List[tuple]:
+    rng = random.Random(11)
+    return [
+        (f"m{i}", rng.choice(("CS", "CS", "CS", "BIO")), rng.choice((100, 200, 300, 400)),
+         rng.choice(tuple(VisibilityScope)))
+        for i in range(count)
+    ]
+
+def run_pydantic(rows) -> int:
+    user = PydanticUserContext(user_id="u1", role=Role.STUDENT, department_id="CS", level=200)
+    allowed = 0
+    for id, department_id, level, visibility_scope in rows:
+        material = PydanticMaterialContext(id=id, department_id=department_id, level=level,
+                                           visibility_scope=visibility_scope)
+        allowed += pydantic_check(user, material).allowed
+    return allowed
+
+def run_dataclass(rows) -> int:
+    user = UserContext(user_id="u1", role=Role.STUDENT, department_id="CS", level=200)
+    allowed = 0
+    for id, department_id, level, visibility_scope in rows:
+        material = MaterialContext(id=id, department_id=department_id, level=level,
+                                   visibility_scope=visibility_scope)
+        allowed += check_material_policy(user, Action.DOWNLOAD, material).allowed
+    return allowed
+
+def _instance_size(obj) -> int:
+    """Shallow size of an instance plus its per-instance dict and pydantic bookkeeping, if any."""
+    size = sys.getsizeof(obj)
+    for attribute in ("__dict__", "__pydantic_fields_set__", "__pydantic_extra__", "__pydantic_private__"):
+        value = getattr(obj, attribute, None)
+        if value is not None:
+            size += sys.getsizeof(value)
+    return size
+
+def allocated_per_evaluation() -> dict:
+    """Bytes of context and decision objects each evaluation allocates."""
+    row = ("m1", "CS", 100, VisibilityScope.DEPARTMENT)
+    pydantic_material = PydanticMaterialContext(id=row[0], department_id=row[1], level=row[2], visibility_scope=row[3])
+    pydantic_decision = PydanticPolicyDecision(allowed=True, reason="x")
+    material = MaterialContext(*row)
+    # Pydantic: a context, the default decision and the returned one; dataclasses: a
+    # context only, decisions are shared constants
+    return {
+        "pydantic": _instance_size(pydantic_material) + 2 * _instance_size(pydantic_decision),
+        "dataclass": _instance_size(material),
+    }
+
+def _timed(fn: Callable, rows) -> float:
+    start = time.perf_counter()
+    fn(rows)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--evaluations", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = _rows(args.evaluations)
+    assert run_pydantic(rows) == run_dataclass(rows)
+
+    print(f"{'contexts':<12}{'ns/eval':>10}{'evals/s':>14}{'B/eval':>10}")
+    allocated = allocated_per_evaluation()
+    results = {}
+    for name, fn in (("pydantic", run_pydantic), ("dataclass", run_dataclass)):
+        best = results[name] = min(_timed(fn, rows) for _ in range(args.repeat))
+        print(f"{name:<12}{best / len(rows) * 1e9:>10.0f}{len(rows) / best:>14,.0f}{allocated[name]:>10}")
+    print(f"speedup: {results['pydantic'] / results['dataclass']:.2f}x, "
+          f"allocation: {allocated['pydantic'] / allocated['dataclass']:.1f}x less")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Search latency against corpus size.
+
+Always measures the in-process InvertedIndex fallback on synthetic titles. With
+--database-url pointing at a PostgreSQL database that has the search migration
+applied, it also times the full-text/trigram query for --department-id.
+
+    python -m benchmarks.bench_search --sizes 1000,10000,100000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from app.services.inverted_index import InvertedIndex
+
+SUBJECTS = ["Algorithms", "Databases", "Organic Chemistry", "Genetics", "Calculus", "Linear Algebra",
+            "Operating Systems", "Microbiology", "Thermodynamics", "Statistics", "Networks", "Ecology"]
+KINDS = ["Introduction to", "Advanced", "Lecture Notes:", "Past Questions", "Lab Manual", "Tutorial"]
+CODES = ["CS", "BIO", "CHM", "MTH", "PHY", "STA"]
+QUERIES = ["algorithms", "intro", "CS101", "chemstry", "lab manual", "notes statistics", "zzz"]
+
+def synthetic_document(rng: random.Random) -> str:
+    code = f"{rng.choice(CODES)}{rng.randint(1, 4)}{rng.randint(0, 9)}{rng.randint(0, 9)}"
+    return f"{rng.choice(KINDS)} {rng.choice(SUBJECTS)} {rng.randint(1, 12)} {code}"
+
+def _time_queries(run, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        for q in QUERIES:
+            start = time.perf_counter()
+            run(q)
+            samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {"p50_ms": statistics.median(samples) * 1000, "p95_ms": samples[int(len(samples) * 0.95) - 1] * 1000}
+
+def bench_fallback(sizes, repeat: int):
+    print(f"{'corpus':>10}{'build s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    rng = random.Random(42)
+    for size in sizes:
+        index = InvertedIndex()
+        start = time.perf_counter()
+        for i in range(size):
+            index.add(i, synthetic_document(rng))
+        build = time.perf_counter() - start
+        r = _time_queries(lambda q: index.search(q, limit=50), repeat)
+        print(f"{size:>10}{build:>10.2f}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}")
+
+def bench_postgres(database_url: str, department_id: str, repeat: int):
+    from sqlalchemy import create_engine, func, select
+    from sqlalchemy.orm import Session
+    from app.models.models import Material
+    from app.services.search import postgres_search
+
+    engine = create_engine(database_url)
+    with Session(engine) as session:
+        corpus = session.scalar(select(func.count()).select_from(Material).where(Material.department_id == department_id))
+
+        def run(q):
+            match, rank = postgres_search(q)
+            session.execute(select(Material.id).where(Material.department_id == department_id, match).order_by(rank).limit(50)).all()
+
+        r = _time_queries(run, repeat)
+    print(f"postgres corpus={corpus} p50={r['p50_ms']:.2f}ms p95={r['p95_ms']:.2f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--database-url")
+    parser.add_argument("--department-id")
+    args = parser.parse_args()
+
+    bench_fallback([int(s) for s in args.sizes.split(",")], args.repeat)
+    if args.database_url:
+        bench_postgres(args.database_url, args.department_id, args.repeat)
+
+if __name__ == "__main__":
+    main()
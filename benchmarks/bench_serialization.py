@@ -0,0 +1,106 @@
+"""
+List-endpoint serialization cost: ORM rows + MaterialRead.model_validate + response_model
+validation (the old path) against column rows + material_dicts + orjson (the current path).
+
+Both paths read the same rows from an in-memory SQLite database and compute download
+flags with evaluate_many; "fetch+encode" includes the query, "encode" times the
+serialization of already-fetched rows only.
+
+    python -m benchmarks.bench_serialization --sizes 1000,10000,100000
+"""
+import argparse
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app.database import Base
+from app.models.models import Material, VisibilityScope
+from app.policies.base import Action, Role, UserContext
+from app.policies.engine import evaluate_many
+from app.schemas import MaterialRead
+from app.services.serialization import MATERIAL_COLUMNS, dumps, material_dicts
+from benchmarks.datagen import synthetic_uuid
+
+RESPONSE_ADAPTER = TypeAdapter(List[MaterialRead])
+
+def _populate(session: Session, department_id: uuid.UUID, size: int):
+    rng = random.Random(7)
+    start = datetime(2024, 1, 1)
+    uploaders = [synthetic_uuid(rng) for _ in range(50)]
+    session.execute(insert(Material), [
+        dict(
+            id=synthetic_uuid(rng), title=f"Lecture {i}", course_code=f"CS{rng.randint(100, 499)}",
+            department_id=department_id, level=rng.choice((100, 200, 300, 400)),
+            visibility_scope=rng.choice((VisibilityScope.DEPARTMENT, VisibilityScope.GLOBAL_SEARCHABLE)),
+            file_path="blobs/x",
+            size_bytes=rng.randint(1, 10 ** 7), sha256="%064x" % rng.getrandbits(256),
+            uploaded_by=rng.choice(uploaders), created_at=start + timedelta(seconds=i),
+        )
+        for i in range(size)
+    ])
+    session.commit()
+
+def pydantic_encode(rows, user: UserContext) -> bytes:
+    allowed = evaluate_many(user, Action.DOWNLOAD, rows)
+    results = []
+    for m, dl_allowed in zip(rows, allowed):
+        m_read = MaterialRead.model_validate(m)
+        m_read.download_allowed = dl_allowed
+        results.append(m_read)
+    # FastAPI re-validates the returned list against response_model before encoding
+    return RESPONSE_ADAPTER.dump_json(RESPONSE_ADAPTER.validate_python(results, from_attributes=True))
+
+def fast_encode(rows, user: UserContext) -> bytes:
+    return dumps(material_dicts(rows, evaluate_many(user, Action.DOWNLOAD, rows)))
+
+def _best_of(repeat: int, run) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def bench(sizes, repeat: int):
+    print(f"{'rows':>8}{'path':>10}{'fetch+encode ms':>18}{'encode ms':>12}{'speedup':>10}")
+    for size in sizes:
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        department_id = synthetic_uuid(random.Random(size))
+        user = UserContext(user_id=str(uuid.uuid4()), role=Role.STUDENT, department_id=str(department_id), level=200)
+        with Session(engine) as session:
+            _populate(session, department_id, size)
+            orm_query = select(Material).where(Material.department_id == department_id)
+            column_query = select(*MATERIAL_COLUMNS).where(Material.department_id == department_id)
+
+            def orm_total():
+                session.expunge_all()
+                pydantic_encode(session.scalars(orm_query).all(), user)
+
+            orm_rows = session.scalars(orm_query).all()
+            column_rows = session.execute(column_query).all()
+            assert len(pydantic_encode(orm_rows, user)) > 0 and len(fast_encode(column_rows, user)) > 0
+
+            slow = (_best_of(repeat, orm_total), _best_of(repeat, lambda: pydantic_encode(orm_rows, user)))
+            fast = (
+                _best_of(repeat, lambda: fast_encode(session.execute(column_query).all(), user)),
+                _best_of(repeat, lambda: fast_encode(column_rows, user)),
+            )
+        print(f"{size:>8}{'pydantic':>10}{slow[0]:>18.1f}{slow[1]:>12.1f}")
+        print(f"{size:>8}{'fast':>10}{fast[0]:>18.1f}{fast[1]:>12.1f}{slow[0] / fast[0]:>9.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    bench([int(s) for s in args.sizes.split(",")], args.repeat)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Compares two benchmark suite result files (benchmarks.suite) scenario by scenario and
+exits non-zero if any scenario's p50 regressed by more than --threshold percent.
+
+    python -m benchmarks.compare benchmarks/results/abc1234.json benchmarks/results/def5678.json
+"""
+import argparse
+import json
+import sys
+
+def compare(base: dict, head: dict, metric: str, threshold: float) -> list:
+    """Returns (scenario, base, head, change %, regressed) for scenarios present in both runs."""
+    rows = []
+    for name, head_result in head["scenarios"].items():
+        base_result = base["scenarios"].get(name)
+        if base_result is None:
+            continue
+        before, after = base_result[metric], head_result[metric]
+        change = (after - before) / before * 100 if before else 0.0
+        rows.append((name, before, after, change, change > threshold))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--metric", default="p50_ms", choices=("mean_ms", "min_ms", "p50_ms", "p95_ms"))
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed slowdown in percent.")
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+    if base["dataset"] != head["dataset"] or base["database"] != head["database"]:
+        print("Warning: runs used different datasets or databases.")
+
+    rows = compare(base, head, args.metric, args.threshold)
+    print(f"{'scenario':<24}{base['commit']:>12}{head['commit']:>12}{'change':>10}")
+    for name, before, after, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<24}{before:>12.2f}{after:>12.2f}{change:>+9.1f}%{flag}")
+    if any(regressed for *_, regressed in rows):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
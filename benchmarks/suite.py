@@ -0,0 +1,176 @@
+"""
+Reproducible benchmark suite: loads a synthetic dataset (benchmarks.datagen) and times
+policy evaluation, shelf, library, search, upload and download scenarios in-process
+against SQLite (default, a fresh temporary file) or a PostgreSQL database.
+
+Results are written as JSON keyed by the current commit so runs can be compared with
+benchmarks.compare:
+
+    python -m benchmarks.suite --materials 50000 --output benchmarks/results
+    python -m benchmarks.suite --database-url postgresql://localhost/bench --scenarios shelf,search
+
+A PostgreSQL database should be empty with migrations applied (alembic upgrade head),
+since full-text search relies on the migrated search_vector column.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, NamedTuple, Optional
+
+SCENARIOS = ("policy_evaluate", "policy_evaluate_many", "shelf", "library", "library_uncached",
+             "search", "upload", "download")
+UPLOAD_SIZE = 64 * 1024
+
+class Scenario(NamedTuple):
+    run: Callable[[], None]
+    # Untimed per-iteration setup, e.g. clearing a cache
+    before: Optional[Callable[[], None]] = None
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def _time(scenario: Scenario, iterations: int, warmup: int) -> Dict[str, float]:
+    samples = []
+    for i in range(warmup + iterations):
+        if scenario.before:
+            scenario.before()
+        start = time.perf_counter()
+        scenario.run()
+        if i >= warmup:
+            samples.append(time.perf_counter() - start)
+    samples.sort()
+    mean = statistics.fmean(samples)
+    return {
+        "iterations": len(samples),
+        "mean_ms": mean * 1000,
+        "min_ms": samples[0] * 1000,
+        "p50_ms": statistics.median(samples) * 1000,
+        "p95_ms": samples[max(int(len(samples) * 0.95) - 1, 0)] * 1000,
+        "ops_per_s": 1 / mean,
+    }
+
+def build_scenarios(dataset, rng: random.Random) -> Dict[str, Scenario]:
+    # Imported here: app modules read DATABASE_URL/STORAGE_DIR at import time
+    from fastapi.testclient import TestClient
+    from sqlalchemy import select
+    from sqlalchemy.orm import Session
+
+    from app.dependencies import engine
+    from app.main import app
+    from app.models.models import Material, UserRole
+    from app.policies.base import Action, MaterialContext, UserContext
+    from app.policies.engine import evaluate, evaluate_many
+    from app.services.response_cache import library_cache
+    from app.services.serialization import MATERIAL_COLUMNS
+
+    # A student in the department with the most users
+    department_id = max(dataset.department_ids, key=lambda d: sum(u.department_id == d for u in dataset.users))
+    student = next(u for u in dataset.users if u.department_id == department_id and u.role == UserRole.STUDENT)
+    context = UserContext(user_id=str(student.id), role=student.role.value,
+                          department_id=str(department_id), level=student.level)
+    client = TestClient(app, headers={"x-user-id": str(student.id)})
+
+    with Session(engine) as session:
+        rows = session.execute(select(*MATERIAL_COLUMNS).where(Material.department_id == department_id)).all()
+    contexts = [
+        MaterialContext(id=str(r.id), department_id=str(r.department_id), level=r.level,
+                        visibility_scope=r.visibility_scope.value)
+        for r in rows[:1000]
+    ]
+    uploaded = []
+
+    def get(path, **params):
+        client.get(path, params=params).raise_for_status()
+
+    def upload():
+        response = client.post(
+            "/materials/upload",
+            data={"title": "Benchmark upload", "course_code": "C100", "level": str(student.level),
+                  "visibility_scope": "DEPARTMENT"},
+            files={"file": ("bench.pdf", rng.randbytes(UPLOAD_SIZE), "application/pdf")},
+        )
+        response.raise_for_status()
+        uploaded.append(response.json()["id"])
+
+    def download():
+        if not uploaded:
+            upload()
+        get(f"/materials/{rng.choice(uploaded)}/download")
+
+    return {
+        "policy_evaluate": Scenario(lambda: [evaluate(context, Action.DOWNLOAD, m) for m in contexts]),
+        "policy_evaluate_many": Scenario(lambda: evaluate_many(context, Action.DOWNLOAD, rows)),
+        "shelf": Scenario(lambda: get("/shelf/")),
+        "library": Scenario(lambda: get(f"/library/{department_id}")),
+        "library_uncached": Scenario(lambda: get(f"/library/{department_id}"), before=library_cache.clear),
+        "search": Scenario(lambda: get("/search/", q=rng.choice(("algorithms", "lecture notes", "C120", "calculus")))),
+        "upload": Scenario(upload),
+        "download": Scenario(download),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Defaults to a fresh SQLite file in a temporary directory.")
+    parser.add_argument("--departments", type=int, default=5)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--materials", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--output", default="benchmarks/results", help="Directory for <commit>.json results.")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    database_url = args.database_url or f"sqlite:///{workdir}/bench.db"
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("STORAGE_DIR", f"{workdir}/storage")
+    # The scenarios authenticate in-process with X-User-Id
+    os.environ.setdefault("ALLOW_USER_ID_HEADER", "true")
+    os.environ.setdefault("JWT_EPHEMERAL_KEY", "true")
+
+    from sqlalchemy import create_engine
+    from benchmarks.datagen import generate
+
+    began = time.perf_counter()
+    dataset = generate(create_engine(database_url), args.departments, args.users, args.materials, args.seed)
+    print(f"Generated dataset in {time.perf_counter() - began:.1f}s")
+
+    scenarios = build_scenarios(dataset, random.Random(args.seed))
+    results = {}
+    print(f"{'scenario':<24}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'ops/s':>10}")
+    for name in args.scenarios.split(","):
+        r = results[name] = _time(scenarios[name], args.iterations, args.warmup)
+        print(f"{name:<24}{r['mean_ms']:>10.2f}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['ops_per_s']:>10.1f}")
+
+    commit = _git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": datetime.utcnow().isoformat(),
+        "database": database_url.split(":", 1)[0],
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "dataset": {"departments": args.departments, "users": args.users, "materials": args.materials,
+                    "seed": args.seed},
+        "scenarios": results,
+    }
+    output = Path(args.output)
+    output.mkdir(parents=True, exist_ok=True)
+    path = output / f"{commit}.json"
+    path.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"Results written to {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""add material filename and content type
+
+Blob paths no longer carry the uploaded file's name, so the original
+filename and content type are kept on the material for download responses.
+
+Revision ID: 18128b093ac6
+Revises: d9b2a53b2d84
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '18128b093ac6'
+down_revision: Union[str, Sequence[str], None] = 'd9b2a53b2d84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("materials", sa.Column("filename", sa.String(), nullable=True))
+    op.add_column("materials", sa.Column("content_type", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("materials", "content_type")
+    op.drop_column("materials", "filename")
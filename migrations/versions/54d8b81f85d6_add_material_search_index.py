@@ -0,0 +1,55 @@
+"""add material search index
+
+Adds a generated tsvector column over title and course_code with a GIN index,
+plus pg_trgm GIN indexes so substring (ILIKE '%q%') and typo-tolerant matches
+on title/course_code can use an index. The column is STORED, so PostgreSQL
+backfills every existing row while adding it and keeps it current afterwards.
+
+Revision ID: 54d8b81f85d6
+Revises:
+Create Date: 2026-10-18 19:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '54d8b81f85d6'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.execute(
+        """
+        ALTER TABLE materials ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple'::regconfig, coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('simple'::regconfig, coalesce(course_code, '')), 'B')
+        ) STORED
+        """
+    )
+    op.create_index("idx_material_search_vector", "materials", ["search_vector"], postgresql_using="gin")
+    op.create_index(
+        "idx_material_title_trgm", "materials", ["title"],
+        postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}
+    )
+    op.create_index(
+        "idx_material_course_code_trgm", "materials", ["course_code"],
+        postgresql_using="gin", postgresql_ops={"course_code": "gin_trgm_ops"}
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("idx_material_course_code_trgm", table_name="materials")
+    op.drop_index("idx_material_title_trgm", table_name="materials")
+    op.drop_index("idx_material_search_vector", table_name="materials")
+    op.drop_column("materials", "search_vector")
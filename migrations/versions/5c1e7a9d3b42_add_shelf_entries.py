@@ -0,0 +1,55 @@
+"""add shelf entries
+
+Materialized per-user shelf: one row per material reachable through a user's
+active or carry-over enrollments (matched on course_code within the course's
+department), kept current by ORM
+events in app.services.shelf and backfilled here from existing enrollments.
+
+Revision ID: 5c1e7a9d3b42
+Revises: 18128b093ac6
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e7a9d3b42'
+down_revision: Union[str, Sequence[str], None] = '18128b093ac6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "shelf_entries",
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id", ondelete="CASCADE"),
+                  primary_key=True),
+        sa.Column("material_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("materials.id", ondelete="CASCADE"),
+                  primary_key=True),
+        sa.Column("course_code", sa.String(), nullable=False),
+    )
+    op.create_index("idx_shelf_entry_material", "shelf_entries", ["material_id"])
+    op.create_index("idx_shelf_entry_user_course", "shelf_entries", ["user_id", "course_code"])
+    op.execute(
+        """
+        INSERT INTO shelf_entries (user_id, material_id, course_code)
+        SELECT DISTINCT e.user_id, m.id, m.course_code
+        FROM enrollments e
+        JOIN courses c ON c.id = e.course_id
+        JOIN materials m ON m.course_code = c.course_code AND m.department_id = c.department_id
+        WHERE e.status IN ('ACTIVE', 'CARRY_OVER')
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("idx_shelf_entry_user_course", table_name="shelf_entries")
+    op.drop_index("idx_shelf_entry_material", table_name="shelf_entries")
+    op.drop_table("shelf_entries")
@@ -0,0 +1,35 @@
+"""add material size and sha256
+
+Records the byte size and SHA-256 of each stored file, computed while the
+upload is streamed to storage. Existing rows are left NULL.
+
+Revision ID: 62e3be978bf2
+Revises: 54d8b81f85d6
+Create Date: 2026-10-18 19:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '62e3be978bf2'
+down_revision: Union[str, Sequence[str], None] = '54d8b81f85d6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("materials", sa.Column("size_bytes", sa.BigInteger(), nullable=True))
+    op.add_column("materials", sa.Column("sha256", sa.String(length=64), nullable=True))
+    op.create_index("ix_materials_sha256", "materials", ["sha256"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_materials_sha256", table_name="materials")
+    op.drop_column("materials", "sha256")
+    op.drop_column("materials", "size_bytes")
@@ -0,0 +1,64 @@
+"""add jobs and material status
+
+Durable job table for background work (app.services.jobs) and the post-upload
+processing status on materials. Existing materials were never queued and are READY.
+
+Revision ID: 8f4b2d6e1a07
+Revises: 5c1e7a9d3b42
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f4b2d6e1a07'
+down_revision: Union[str, Sequence[str], None] = '5c1e7a9d3b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+material_status = postgresql.ENUM("PENDING", "PROCESSING", "READY", "FAILED", name="materialstatus")
+job_status = postgresql.ENUM("QUEUED", "RUNNING", "DONE", "FAILED", name="jobstatus")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    material_status.create(bind, checkfirst=True)
+    job_status.create(bind, checkfirst=True)
+
+    op.add_column(
+        "materials",
+        sa.Column("status", postgresql.ENUM(name="materialstatus", create_type=False), nullable=False,
+                  server_default="READY"),
+    )
+    op.create_table(
+        "jobs",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("status", postgresql.ENUM(name="jobstatus", create_type=False), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("max_attempts", sa.Integer(), nullable=False),
+        sa.Column("run_at", sa.DateTime(), nullable=False),
+        sa.Column("locked_by", sa.String(), nullable=True),
+        sa.Column("locked_until", sa.DateTime(), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("idx_job_status_run_at", "jobs", ["status", "run_at"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("idx_job_status_run_at", table_name="jobs")
+    op.drop_table("jobs")
+    op.drop_column("materials", "status")
+    bind = op.get_bind()
+    job_status.drop(bind, checkfirst=True)
+    material_status.drop(bind, checkfirst=True)
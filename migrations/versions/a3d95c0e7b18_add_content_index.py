@@ -0,0 +1,50 @@
+"""add content index
+
+Inverted index over text extracted from uploaded files (app.services.content_index):
+per-material document lengths and per-term postings. Existing materials are
+indexed by queueing jobs with scripts/index_content.py.
+
+Revision ID: a3d95c0e7b18
+Revises: 8f4b2d6e1a07
+Create Date: 2026-10-20 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3d95c0e7b18'
+down_revision: Union[str, Sequence[str], None] = '8f4b2d6e1a07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "content_documents",
+        sa.Column("material_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("materials.id", ondelete="CASCADE"),
+                  primary_key=True),
+        sa.Column("length", sa.Integer(), nullable=False),
+        sa.Column("pages", sa.Integer(), nullable=False),
+        sa.Column("indexed_at", sa.DateTime(), nullable=True),
+    )
+    op.create_table(
+        "content_postings",
+        sa.Column("term", sa.String(), primary_key=True),
+        sa.Column("material_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("materials.id", ondelete="CASCADE"),
+                  primary_key=True),
+        sa.Column("tf", sa.Integer(), nullable=False),
+    )
+    op.create_index("idx_content_posting_material", "content_postings", ["material_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("idx_content_posting_material", table_name="content_postings")
+    op.drop_table("content_postings")
+    op.drop_table("content_documents")
@@ -0,0 +1,41 @@
+"""add token revocations
+
+Shared revocation list for access tokens and download tickets, so a logout or a
+role, department or level change in one process reaches every API worker
+(app.services.tokens syncs it into each process's in-memory list).
+
+Revision ID: c7e2f4a19d36
+Revises: a3d95c0e7b18
+Create Date: 2026-10-21 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e2f4a19d36'
+down_revision: Union[str, Sequence[str], None] = 'a3d95c0e7b18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "token_revocations",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("key", sa.String(), nullable=False),
+        sa.Column("cutoff", sa.Float(), nullable=False),
+        sa.Column("expires_at", sa.Float(), nullable=False),
+    )
+    op.create_index("idx_token_revocation_expires_at", "token_revocations", ["expires_at"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("idx_token_revocation_expires_at", table_name="token_revocations")
+    op.drop_table("token_revocations")
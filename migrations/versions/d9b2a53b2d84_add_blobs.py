@@ -0,0 +1,53 @@
+"""add blobs
+
+Content-addressed, reference-counted storage: one blobs row per distinct
+SHA-256, referenced by materials.sha256. Materials that already carry a hash
+are backfilled into blobs, keeping their current file as the blob's path.
+
+Revision ID: d9b2a53b2d84
+Revises: 62e3be978bf2
+Create Date: 2026-10-18 20:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9b2a53b2d84'
+down_revision: Union[str, Sequence[str], None] = '62e3be978bf2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "blobs",
+        sa.Column("sha256", sa.String(length=64), primary_key=True),
+        sa.Column("path", sa.String(), nullable=False),
+        sa.Column("size_bytes", sa.BigInteger(), nullable=False),
+        sa.Column("ref_count", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+    op.execute(
+        """
+        INSERT INTO blobs (sha256, path, size_bytes, ref_count, created_at, updated_at)
+        SELECT sha256, min(file_path), coalesce(max(size_bytes), 0), count(*), now(), now()
+        FROM materials
+        WHERE sha256 IS NOT NULL
+        GROUP BY sha256
+        """
+    )
+    op.create_foreign_key(
+        "materials_sha256_fkey", "materials", "blobs", ["sha256"], ["sha256"], ondelete="RESTRICT"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint("materials_sha256_fkey", "materials", type_="foreignkey")
+    op.drop_table("blobs")
@@ -0,0 +1,33 @@
+"""add department library version
+
+Per-department counter bumped with every change to the department's materials
+(app.services.response_cache). Library responses are cached under it, so a write
+from any API worker, the job worker or a script invalidates every process's
+cached copy.
+
+Revision ID: e4a81c5b2f90
+Revises: c7e2f4a19d36
+Create Date: 2026-10-21 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a81c5b2f90'
+down_revision: Union[str, Sequence[str], None] = 'c7e2f4a19d36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("departments", sa.Column("library_version", sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("departments", "library_version")
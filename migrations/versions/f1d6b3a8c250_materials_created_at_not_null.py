@@ -0,0 +1,33 @@
+"""make materials.created_at not null
+
+Pagination cursors encode (level, created_at, id), so a material without a
+created_at could neither be given a cursor nor be reached from one. Existing
+NULLs are backfilled with the migration time.
+
+Revision ID: f1d6b3a8c250
+Revises: e4a81c5b2f90
+Create Date: 2026-10-21 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1d6b3a8c250'
+down_revision: Union[str, Sequence[str], None] = 'e4a81c5b2f90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("UPDATE materials SET created_at = now() AT TIME ZONE 'utc' WHERE created_at IS NULL")
+    op.alter_column("materials", "created_at", existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column("materials", "created_at", existing_type=sa.DateTime(), nullable=True)
@@ -0,0 +1,39 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Tests run in one process, so a random signing key is fine
+os.environ.setdefault("JWT_EPHEMERAL_KEY", "true")
+# No background revocation sync against DATABASE_URL; tests call RevocationList.sync directly
+os.environ.setdefault("REVOCATION_SYNC_SECONDS", "0")
+
+# app modules read their settings from the environment on import
+from app.database import Base  # noqa: E402
+from app.services import storage  # noqa: E402
+
+@pytest.fixture
+def engine():
+    # Shared single connection: ThreadedSession runs statements on threadpool threads
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    return engine
+
+@pytest.fixture
+def session(engine):
+    with Session(engine) as session:
+        yield session
+
+@pytest.fixture
+def session_factory(engine):
+    return sessionmaker(bind=engine)
+
+@pytest.fixture
+def storage_dir(tmp_path, monkeypatch):
+    root = tmp_path / "storage"
+    root.mkdir()
+    monkeypatch.setattr(storage, "STORAGE_DIR", root)
+    monkeypatch.setattr(storage, "_backend", storage.LocalStorageBackend(root))
+    return root
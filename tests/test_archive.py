@@ -0,0 +1,132 @@
+import io
+import itertools
+import json
+import uuid
+import zipfile
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.database import ThreadedSession
+from app.dependencies import get_current_user, get_read_db
+from app.main import app
+from app.models.models import Material, VisibilityScope
+from app.policies.base import UserContext
+from app.services import archive, storage
+from app.services.archive import ArchiveFile, zip_chunks
+
+DEPARTMENT = uuid.UUID(int=0xA << 124 | 1)
+OTHER_DEPARTMENT = uuid.UUID(int=0xA << 124 | 2)
+_ids = itertools.count()
+
+@pytest.fixture
+def client(engine, storage_dir):
+    (storage_dir / "blobs").mkdir()
+
+    async def test_db():
+        db = ThreadedSession(Session(engine))
+        try:
+            yield db
+        finally:
+            await db.close()
+
+    app.dependency_overrides[get_read_db] = test_db
+    app.dependency_overrides[get_current_user] = lambda: UserContext(
+        user_id=str(uuid.UUID(int=0xC << 124)), role="student", department_id=str(DEPARTMENT), level=200)
+    try:
+        with TestClient(app) as client, Session(engine) as session:
+            client.session = session
+            yield client
+    finally:
+        app.dependency_overrides.clear()
+
+def _material(session, storage_dir, content: bytes, title="Notes", level=100, filename=None,
+              department_id=DEPARTMENT, course_code="CS101", stored=True) -> Material:
+    material_id = uuid.UUID(int=0xB << 124 | next(_ids))
+    key = f"blobs/{material_id.hex}"
+    if stored:
+        (storage_dir / key).write_bytes(content)
+    material = Material(id=material_id, title=title, course_code=course_code, department_id=department_id,
+                        level=level, visibility_scope=VisibilityScope.DEPARTMENT, file_path=key, filename=filename,
+                        size_bytes=len(content), uploaded_by=uuid.UUID(int=0xC << 124))
+    session.add(material)
+    session.commit()
+    return material
+
+def _open(body: bytes):
+    bundle = zipfile.ZipFile(io.BytesIO(body))
+    manifest = json.loads(bundle.read(archive.MANIFEST_NAME))
+    return bundle, manifest
+
+def test_zip_chunks_stream_a_store_only_archive(storage_dir):
+    (storage_dir / "blobs").mkdir()
+    files = []
+    for i, content in enumerate((b"", b"a" * 10, bytes(range(256)) * 1000)):
+        (storage_dir / "blobs" / str(i)).write_bytes(content)
+        files.append(ArchiveFile(str(i), f"File {i}", "CS101", 100, f"blobs/{i}", "notes.txt"))
+    files.append(ArchiveFile("gone", "Gone", "CS101", 100, "blobs/gone", None))
+    skipped = []
+
+    chunks = list(zip_chunks(files, skipped))
+    assert all(chunks) and max(map(len, chunks)) < storage.DOWNLOAD_CHUNK_SIZE + 1024
+    bundle, manifest = _open(b"".join(chunks))
+    assert bundle.testzip() is None
+    assert bundle.namelist() == ["CS101/notes.txt", "CS101/notes (2).txt", "CS101/notes (3).txt",
+                                 archive.MANIFEST_NAME]
+    assert all(info.compress_type == zipfile.ZIP_STORED for info in bundle.infolist())
+    assert bundle.read("CS101/notes (3).txt") == bytes(range(256)) * 1000
+    assert [item["id"] for item in manifest["included"]] == ["0", "1", "2"]
+    assert manifest["skipped"] == skipped == [{"id": "gone", "title": "Gone", "reason": "File content missing"}]
+
+def test_entry_names_are_made_safe():
+    taken = set()
+    unsafe = ArchiveFile("1", "x", "../CS101", 100, "k", "../../etc/passwd")
+    assert archive.entry_name(unsafe, taken) == "_CS101/_.._etc_passwd"
+    assert archive.entry_name(ArchiveFile("2", "Week 1", "CS101", 100, "k", None), taken) == "CS101/Week 1"
+    assert archive.entry_name(ArchiveFile("3", "Week 1", None, 100, "k", None), taken) == "uncategorized/Week 1"
+
+def test_library_level_archive_skips_denied_materials(client, storage_dir):
+    session = client.session
+    allowed = _material(session, storage_dir, b"week one", title="Week 1", filename="week1.txt")
+    denied = _material(session, storage_dir, b"advanced", title="Advanced", level=300)
+    _material(session, storage_dir, b"other level", level=200, course_code="CS201")
+
+    response = client.get(f"/archive/library/{DEPARTMENT}")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    bundle, manifest = _open(response.content)
+    assert sorted(bundle.namelist()) == ["CS101/week1.txt", "CS201/Notes", archive.MANIFEST_NAME]
+    assert bundle.read("CS101/week1.txt") == b"week one"
+    assert [(item["id"], item["title"]) for item in manifest["skipped"]] == [(str(denied.id), "Advanced")]
+
+    bundle, manifest = _open(client.get(f"/archive/library/{DEPARTMENT}", params={"level": 100}).content)
+    assert [item["id"] for item in manifest["included"]] == [str(allowed.id)]
+    assert client.get(f"/archive/library/{OTHER_DEPARTMENT}").status_code == 403
+
+def test_id_list_archive_hides_other_departments(client, storage_dir):
+    session = client.session
+    mine = _material(session, storage_dir, b"mine")
+    missing = _material(session, storage_dir, b"lost", title="Lost", stored=False)
+    theirs = _material(session, storage_dir, b"theirs", title="Secret", department_id=OTHER_DEPARTMENT)
+    unknown = uuid.UUID(int=0xB << 124 | 0xFFFF)
+
+    response = client.post("/archive", json={"ids": [str(mine.id), str(theirs.id), str(unknown), str(missing.id)]})
+    bundle, manifest = _open(response.content)
+    assert [item["id"] for item in manifest["included"]] == [str(mine.id)]
+    assert manifest["skipped"] == [
+        {"id": str(theirs.id), "reason": "Material not found"},
+        {"id": str(unknown), "reason": "Material not found"},
+        {"id": str(missing.id), "title": "Lost", "reason": "File content missing"},
+    ]
+
+def test_shelf_archive_and_item_limit(client, storage_dir, monkeypatch):
+    session = client.session
+    for level in (100, 200):
+        _material(session, storage_dir, b"x", level=level)
+    bundle, manifest = _open(client.get("/archive/shelf").content)
+    # Without enrollments the shelf is the user's department and level
+    assert [item["level"] for item in manifest["included"]] == [200]
+
+    monkeypatch.setattr("app.routers.archive.MAX_ARCHIVE_ITEMS", 1)
+    assert client.get(f"/archive/library/{DEPARTMENT}").status_code == 413
@@ -0,0 +1,82 @@
+import asyncio
+import io
+import os
+import uuid
+from datetime import timedelta
+
+import pytest
+from fastapi import UploadFile
+from sqlalchemy import select
+
+from app.database import ThreadedSession
+from app.models.models import Blob, Material, VisibilityScope
+from app.services import storage
+from app.services.blobs import acquire_blob, collect_garbage
+
+pytestmark = pytest.mark.usefixtures("storage_dir")
+
+def _store(session, data: bytes) -> Material:
+    db = ThreadedSession(session)
+    staged = asyncio.run(storage.stage_upload(UploadFile(io.BytesIO(data), filename="f.pdf")))
+    path = asyncio.run(acquire_blob(db, staged))
+    material = Material(
+        title="Notes", course_code="CS101", department_id=uuid.uuid4(), level=100,
+        visibility_scope=VisibilityScope.DEPARTMENT, file_path=path,
+        size_bytes=staged.size_bytes, sha256=staged.sha256, uploaded_by=uuid.uuid4()
+    )
+    session.add(material)
+    session.commit()
+    return material
+
+def _files(root):
+    return [p for p in root.rglob("*") if p.is_file()]
+
+def test_identical_uploads_share_one_blob(session, storage_dir):
+    first = _store(session, b"week 1 slides")
+    second = _store(session, b"week 1 slides")
+
+    assert first.file_path == second.file_path
+    assert len(_files(storage_dir)) == 1
+    assert session.get(Blob, first.sha256).ref_count == 2
+
+def test_deleting_materials_releases_references(session):
+    first = _store(session, b"week 2 slides")
+    second = _store(session, b"week 2 slides")
+
+    session.delete(first)
+    session.commit()
+    assert session.get(Blob, second.sha256).ref_count == 1
+
+    session.delete(second)
+    session.commit()
+    session.expire_all()
+    assert session.get(Blob, second.sha256).ref_count == 0
+
+def test_garbage_collection_removes_unreferenced_blobs_after_grace(session, storage_dir):
+    kept = _store(session, b"kept")
+    dropped = _store(session, b"dropped")
+    session.delete(dropped)
+    session.commit()
+
+    assert collect_garbage(session).blobs_removed == 0
+
+    report = collect_garbage(session, grace=timedelta(0))
+    assert report.blobs_removed == 1
+    assert report.bytes_freed == len(b"dropped")
+    assert session.scalars(select(Blob.sha256)).all() == [kept.sha256]
+    assert [p.name for p in _files(storage_dir)] == [kept.sha256]
+
+def test_garbage_collection_sweeps_orphaned_files(session, storage_dir):
+    kept = _store(session, b"kept")
+    orphan = storage_dir / storage.blob_key("ab" * 32)
+    orphan.parent.mkdir(parents=True)
+    orphan.write_bytes(b"orphan")
+    old = os.path.getmtime(orphan) - 7200
+    os.utime(orphan, (old, old))
+
+    dry = collect_garbage(session, dry_run=True)
+    assert dry.orphan_files_removed == 1
+    assert orphan.exists()
+
+    assert collect_garbage(session).orphan_files_removed == 1
+    assert [p.name for p in _files(storage_dir)] == [kept.sha256]
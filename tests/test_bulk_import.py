@@ -0,0 +1,118 @@
+import io
+import json
+import uuid
+import zipfile
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+from app.dependencies import get_current_user, get_sync_db
+from app.main import app
+from app.models.models import Blob, Job, Material, MaterialStatus
+from app.policies.base import UserContext
+from app.services.bulk_import import DirectorySource, ZipSource, import_materials, parse_manifest
+
+pytestmark = pytest.mark.usefixtures("storage_dir")
+
+def _user(role="librarian"):
+    return UserContext(user_id=str(uuid.uuid4()), role=role, department_id=str(uuid.uuid4()), level=300)
+
+def _entry(file, **overrides):
+    entry = {"file": file, "title": f"Notes {file}", "course_code": "CS101", "level": 100,
+             "visibility_scope": "DEPARTMENT"}
+    entry.update(overrides)
+    return entry
+
+def _materials(session):
+    return session.scalar(select(func.count()).select_from(Material))
+
+def test_parse_csv_and_json_manifests():
+    csv_manifest = b"file,title,course_code,level,visibility_scope,content_type\n" \
+                   b"a.pdf,Week 1,CS101,100,DEPARTMENT,\nb.txt,Week 2,CS101,200,GLOBAL_SEARCHABLE,text/plain\n"
+    entries = parse_manifest(csv_manifest, "manifest.csv")
+    assert entries[0] == {"file": "a.pdf", "title": "Week 1", "course_code": "CS101", "level": "100",
+                          "visibility_scope": "DEPARTMENT"}
+    assert entries[1]["content_type"] == "text/plain"
+
+    items = [_entry("a.pdf")]
+    assert parse_manifest(json.dumps(items).encode(), "manifest.json") == items
+    assert parse_manifest(json.dumps({"items": items}).encode()) == items
+
+def test_directory_import_dedupes_blobs(session, tmp_path, storage_dir):
+    files = tmp_path / "files"
+    (files / "week1").mkdir(parents=True)
+    (files / "week1" / "a.pdf").write_bytes(b"shared slides")
+    (files / "b.pdf").write_bytes(b"shared slides")
+    (files / "c.pdf").write_bytes(b"other slides")
+
+    report = import_materials(session, _user(), [_entry("week1/a.pdf"), _entry("b.pdf"), _entry("c.pdf")],
+                              DirectorySource(files), batch_size=2)
+
+    assert (report.imported, report.failed) == (3, 0)
+    assert all(r.id for r in report.results)
+    assert _materials(session) == 3
+    assert sorted(b.ref_count for b in session.scalars(select(Blob))) == [1, 2]
+    assert set(session.scalars(select(Material.status))) == {MaterialStatus.PENDING}
+    assert sorted(job.payload["material_id"] for job in session.scalars(select(Job))) == \
+        sorted(str(r.id) for r in report.results)
+    # Two blobs placed, no staged copies left behind
+    assert len([p for p in storage_dir.rglob("*") if p.is_file()]) == 2
+
+def test_zip_import_reports_item_errors(session):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("notes/a.pdf", b"lecture notes")
+    entries = [
+        _entry("notes/a.pdf"),
+        _entry("missing.pdf"),
+        _entry("notes/a.pdf", level="not a level"),
+        {"title": "No file"},
+    ]
+
+    with zipfile.ZipFile(buffer) as archive:
+        report = import_materials(session, _user(), entries, ZipSource(archive))
+
+    assert (report.imported, report.failed) == (1, 3)
+    ok, missing, invalid, no_file = report.results
+    assert ok.id and ok.error is None
+    assert "missing.pdf" in missing.error
+    assert invalid.error.startswith("level")
+    assert "file" in no_file.error
+    assert _materials(session) == 1
+    material = session.scalar(select(Material))
+    assert (material.filename, material.content_type) == ("a.pdf", "application/pdf")
+
+def test_directory_source_rejects_escaping_paths(session, tmp_path):
+    (tmp_path / "secret.txt").write_bytes(b"secret")
+    (tmp_path / "files").mkdir()
+
+    report = import_materials(session, _user(), [_entry("../secret.txt")], DirectorySource(tmp_path / "files"))
+
+    assert report.failed == 1
+    assert "escapes" in report.results[0].error
+    assert _materials(session) == 0
+
+def test_upload_policy_denies_whole_import(session, tmp_path):
+    with pytest.raises(HTTPException) as exc:
+        import_materials(session, _user(role="admin"), [_entry("a.pdf")], DirectorySource(tmp_path))
+    assert exc.value.status_code == 403
+
+def test_bulk_import_endpoint_uses_the_injected_session(session):
+    user = _user()
+    app.dependency_overrides[get_sync_db] = lambda: session
+    app.dependency_overrides[get_current_user] = lambda: user
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("a.pdf", b"lecture notes")
+    try:
+        response = TestClient(app).post("/materials/bulk-import", files={
+            "manifest": ("manifest.json", json.dumps([_entry("a.pdf")]), "application/json"),
+            "archive": ("files.zip", buffer.getvalue(), "application/zip"),
+        })
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 200
+    assert (response.json()["imported"], response.json()["failed"]) == (1, 0)
+    assert session.scalar(select(Material.department_id)) == uuid.UUID(user.department_id)
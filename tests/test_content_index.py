@@ -0,0 +1,170 @@
+import asyncio
+import io
+import itertools
+import uuid
+import zipfile
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.database import ThreadedSession
+from app.dependencies import get_current_user, get_read_db
+from app.main import app
+from app.models.models import ContentDocument, ContentPosting, Material, VisibilityScope
+from app.policies.base import UserContext
+from app.services import extraction
+from app.services.content_index import content_search, index_material_content
+
+DOCX = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+DEPARTMENT = uuid.UUID(int=0xA << 124 | 1)
+OTHER_DEPARTMENT = uuid.UUID(int=0xA << 124 | 2)
+_ids = itertools.count()
+
+pytestmark = pytest.mark.usefixtures("storage_dir")
+
+def _docx(*paragraphs: str) -> bytes:
+    body = "".join(
+        f'<w:p><w:r><w:t>{text[:len(text) // 2]}</w:t></w:r><w:r><w:t>{text[len(text) // 2:]}</w:t></w:r></w:p>'
+        for text in paragraphs
+    )
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("word/document.xml", '<?xml version="1.0"?><w:document xmlns:w='
+                         f'"http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>{body}</w:body>'
+                         '</w:document>')
+    return buffer.getvalue()
+
+def _pdf(*pages: str) -> bytes:
+    """A minimal PDF with one line of Helvetica text per page."""
+    count = len(pages)
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>",
+               b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+                   b" ".join(b"%d 0 R" % (4 + 2 * i) for i in range(count)), count),
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    for i, text in enumerate(pages):
+        stream = b"BT /F1 12 Tf 72 720 Td (%s) Tj ET" % text.encode("latin-1")
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (5 + 2 * i))
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+def _material(session, storage_dir, content: bytes, title="Notes", content_type="text/plain", filename=None,
+              department_id=DEPARTMENT) -> Material:
+    material_id = uuid.UUID(int=0xB << 124 | next(_ids))
+    key = f"blobs/{material_id.hex}"
+    (storage_dir / "blobs").mkdir(parents=True, exist_ok=True)
+    (storage_dir / key).write_bytes(content)
+    material = Material(id=material_id, title=title, course_code="CS101", department_id=department_id, level=100,
+                        visibility_scope=VisibilityScope.DEPARTMENT, file_path=key, content_type=content_type,
+                        filename=filename, size_bytes=len(content), uploaded_by=uuid.UUID(int=0xC << 124))
+    session.add(material)
+    session.flush()
+    return material
+
+def _search(session, q, department_id=DEPARTMENT, limit=10):
+    return asyncio.run(content_search(ThreadedSession(session), department_id, q, limit))
+
+def test_text_pages_cut_at_whitespace_and_decode_across_chunks():
+    text = "héllo wörld " * 10
+    data = text.encode()
+    chunks = [data[i:i + 5] for i in range(0, len(data), 5)]
+    pages = list(extraction.text_pages(chunks, page_chars=16))
+    assert "".join(pages) == text
+    assert all(page.endswith(" ") for page in pages[:-1])
+
+def test_docx_pages_stream_paragraphs(tmp_path):
+    path = tmp_path / "notes.docx"
+    path.write_bytes(_docx("Photosynthesis converts light", "Chlorophyll absorbs red light"))
+    assert list(extraction.docx_pages(str(path), page_chars=10)) == [
+        "Photosynthesis converts light", "Chlorophyll absorbs red light"]
+    path.write_bytes(b"not a zip")
+    with pytest.raises(extraction.ExtractionError):
+        list(extraction.docx_pages(str(path)))
+
+def test_document_kind():
+    assert extraction.document_kind("application/pdf", None) == extraction.PDF
+    assert extraction.document_kind("text/markdown; charset=utf-8", None) == extraction.TEXT
+    assert extraction.document_kind("application/octet-stream", "Week1.DOCX") == extraction.DOCX
+    assert extraction.document_kind("image/png", "slide.png") is None
+
+def test_bm25_ranks_within_the_department(session, storage_dir):
+    dense = _material(session, storage_dir, b"mitochondria mitochondria respiration", title="Dense")
+    sparse = _material(session, storage_dir, b"the cell and its mitochondria, plus much more text about other topics",
+                       title="Sparse")
+    _material(session, storage_dir, b"plant cell walls", title="Unrelated")
+    other = _material(session, storage_dir, b"mitochondria", department_id=OTHER_DEPARTMENT)
+    docx = _material(session, storage_dir, _docx("Mitochondria make ATP"), content_type=DOCX)
+    for material in session.scalars(select(Material)).all():
+        assert index_material_content(session, material) is not None
+
+    ranked = [material_id for material_id, _ in _search(session, "Mitochondria")]
+    assert ranked[0] == dense.id
+    assert set(ranked) == {dense.id, sparse.id, docx.id}
+    assert other.id not in ranked
+    assert _search(session, "atp respiration") != []
+    assert _search(session, "chloroplast") == []
+
+def test_reindexing_and_deletion_replace_postings(session, storage_dir):
+    material = _material(session, storage_dir, b"alpha beta beta")
+    assert index_material_content(session, material) == 3
+    (storage_dir / material.file_path).write_bytes(b"gamma")
+    material.size_bytes = 5
+    assert index_material_content(session, material) == 1
+    assert session.scalars(select(ContentPosting.term)).all() == ["gamma"]
+
+    session.delete(material)
+    session.flush()
+    assert session.scalar(select(func.count()).select_from(ContentPosting)) == 0
+    assert session.scalar(select(func.count()).select_from(ContentDocument)) == 0
+
+def test_pdf_text_is_indexed(session, storage_dir):
+    pytest.importorskip("pypdf")
+    pdf = _material(session, storage_dir, _pdf("Mitochondria make ATP", "Krebs cycle"),
+                    content_type="application/pdf")
+    assert list(extraction.extract_pages(pdf.file_path, pdf.content_type, None)) == [
+        "Mitochondria make ATP", "Krebs cycle"]
+    assert index_material_content(session, pdf) == 5
+    assert session.get(ContentDocument, pdf.id).pages == 2
+    assert [material_id for material_id, _ in _search(session, "krebs")] == [pdf.id]
+
+def test_unextractable_files_are_skipped(session, storage_dir, monkeypatch):
+    image = _material(session, storage_dir, b"\x89PNG....", content_type="image/png")
+    broken = _material(session, storage_dir, b"PK\x03\x04 truncated", content_type=DOCX)
+    monkeypatch.setattr(extraction, "pypdf", None)
+    pdf = _material(session, storage_dir, b"%PDF-1.7", content_type="application/pdf")
+    assert [index_material_content(session, m) for m in (image, broken, pdf)] == [None, None, None]
+    assert session.scalar(select(func.count()).select_from(ContentDocument)) == 0
+
+def test_content_search_endpoint(session, storage_dir):
+    material = _material(session, storage_dir, b"Krebs cycle produces NADH", title="Week 3")
+    index_material_content(session, material)
+    session.commit()
+
+    async def test_db():
+        db = ThreadedSession(Session(session.get_bind()))
+        try:
+            yield db
+        finally:
+            await db.close()
+
+    app.dependency_overrides[get_read_db] = test_db
+    app.dependency_overrides[get_current_user] = lambda: UserContext(
+        user_id=str(uuid.UUID(int=0xC << 124)), role="student", department_id=str(DEPARTMENT), level=100)
+    try:
+        with TestClient(app) as client:
+            hits = client.get("/search/content", params={"q": "krebs nadh"}).json()
+            assert [(hit["title"], hit["download_allowed"]) for hit in hits] == [("Week 3", True)]
+            assert hits[0]["score"] > 0
+            assert client.get("/search/content", params={"q": "glycolysis"}).json() == []
+    finally:
+        app.dependency_overrides.clear()
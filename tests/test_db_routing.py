@@ -0,0 +1,124 @@
+import asyncio
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app import dependencies
+from app.database import Base
+from app.dependencies import ReplicaRouter, _engine_options, db_session, get_current_user
+from app.main import app
+from app.models.models import Department, Material, User, UserRole, VisibilityScope
+from app.policies.base import Role, UserContext
+from app.routers import health
+from app.services.user_cache import user_context_cache
+
+DEPT = uuid.UUID(int=0xA << 124)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_router_round_robins_and_sticks_to_primary_after_writes():
+    clock = FakeClock()
+    router = ReplicaRouter(2, sticky_seconds=2, clock=clock)
+    assert [router.pick() for _ in range(3)] == [0, 1, 0]
+
+    router.mark_write()
+    clock.now = 1.5
+    assert router.pick() is None
+    clock.now = 2.5
+    assert router.pick() is not None
+    assert ReplicaRouter(0).pick() is None
+
+def test_engine_options():
+    postgres = _engine_options("postgresql://u:p@db/library")
+    assert postgres["pool_pre_ping"] and postgres["pool_size"] == dependencies.DB_POOL_SIZE
+    assert "statement_timeout" in postgres["connect_args"]["options"]
+    assert "statement_timeout" in _engine_options("postgresql://u:p@db/library", is_async=True)["connect_args"]["server_settings"]
+    assert "pool_size" not in _engine_options("sqlite:///library.db")
+
+@pytest.fixture
+def databases(tmp_path, monkeypatch):
+    primary = create_engine(f"sqlite:///{tmp_path}/primary.db", connect_args={"check_same_thread": False})
+    replica = create_engine(f"sqlite:///{tmp_path}/replica.db", connect_args={"check_same_thread": False})
+    for engine in (primary, replica):
+        Base.metadata.create_all(engine)
+    monkeypatch.setattr(dependencies, "DB_ASYNC", False)
+    monkeypatch.setattr(dependencies, "SessionLocal", sessionmaker(bind=primary))
+    monkeypatch.setattr(dependencies, "ReplicaSessionLocals", [sessionmaker(bind=replica)])
+    monkeypatch.setattr(dependencies, "replica_router", ReplicaRouter(1, sticky_seconds=60))
+    return primary, replica
+
+def test_read_sessions_use_the_replica_until_a_write(databases):
+    primary, replica = databases
+
+    async def binds():
+        async with db_session(read_only=True) as read, db_session() as write:
+            return read.bind, write.bind
+
+    assert asyncio.run(binds()) == (replica, primary)
+    with Session(primary) as session:
+        session.add(Material(title="New", course_code="CS101", department_id=DEPT, level=100,
+                             visibility_scope=VisibilityScope.DEPARTMENT, file_path="blobs/x",
+                             uploaded_by=uuid.uuid4()))
+        session.commit()
+    assert asyncio.run(binds()) == (primary, primary)
+
+def test_shelf_reads_from_the_replica(databases):
+    _, replica = databases
+    with Session(replica) as session:
+        session.execute(insert(Material), [dict(
+            id=uuid.UUID(int=(0xB << 124) | 1), title="Replicated", course_code="CS101", department_id=DEPT,
+            level=100, visibility_scope=VisibilityScope.DEPARTMENT, file_path="blobs/x",
+            uploaded_by=uuid.UUID(int=0xC << 124),
+        )])
+        session.commit()
+    user = UserContext(user_id=str(uuid.uuid4()), role=Role.STUDENT, department_id=str(DEPT), level=100)
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        with TestClient(app) as client:
+            assert [m["title"] for m in client.get("/shelf/").json()] == ["Replicated"]
+    finally:
+        app.dependency_overrides.clear()
+
+def test_user_contexts_are_cached_from_the_primary(databases, monkeypatch):
+    primary, _ = databases
+    monkeypatch.setattr(dependencies, "ALLOW_USER_ID_HEADER", True)
+    with Session(primary) as session:
+        session.add(Department(id=DEPT, name="Computer Science", code="CS"))
+        user = User(email="s@school.edu", password_hash="x", role=UserRole.STUDENT, department_id=DEPT, level=100)
+        session.add(user)
+        session.commit()
+        user_id = str(user.id)
+    # The replica has not caught up with the new user yet
+    monkeypatch.setattr(dependencies, "replica_router", ReplicaRouter(1, sticky_seconds=0))
+    try:
+        with TestClient(app) as client:
+            assert client.get("/shelf/", headers={"X-User-Id": user_id}).status_code == 200
+        assert user_context_cache.get(user_id).level == 100
+    finally:
+        user_context_cache.invalidate(user_id)
+
+def test_readiness_reports_each_database(tmp_path, monkeypatch):
+    healthy = create_engine("sqlite://")
+    broken = create_engine(f"sqlite:///{tmp_path}/missing/dir/db.sqlite")
+    monkeypatch.setattr(health, "request_engines", lambda: {"primary": healthy, "replica0": broken})
+    with TestClient(app) as client:
+        response = client.get("/health/ready")
+        assert response.status_code == 503
+        assert response.json()["databases"] == {"primary": True, "replica0": False}
+        assert client.get("/health/live").json() == {"status": "ok"}
+
+def test_readiness_pings_async_engines(tmp_path, monkeypatch):
+    healthy = create_async_engine("sqlite+aiosqlite://")
+    broken = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/missing/dir/db.sqlite")
+    monkeypatch.setattr(health, "request_engines", lambda: {"primary": healthy, "replica0": broken})
+    with TestClient(app) as client:
+        assert client.get("/health/ready").json()["databases"] == {"primary": True, "replica0": False}
@@ -0,0 +1,47 @@
+import itertools
+
+from app.policies import material
+from app.policies.base import Action, MaterialContext, PolicyDecision, Role, UserContext, VisibilityScope
+from app.policies.download_index import LEVEL_CEILING, DownloadIndex, derive_rule, policy_version
+
+DEPARTMENTS = ["CS", "BIO"]
+# Includes users at and above the probe ceiling
+LEVELS = [0, 1, 100, 250, 500, 10_000, LEVEL_CEILING, LEVEL_CEILING + 5]
+
+def test_rules_match_scalar_policy_for_every_combination():
+    materials = [
+        MaterialContext(id=f"m{i}", department_id=dept, level=level, visibility_scope=scope)
+        for i, (dept, level, scope) in enumerate(itertools.product(DEPARTMENTS, LEVELS, VisibilityScope))
+    ]
+    for role, dept, level in itertools.product(Role, DEPARTMENTS, LEVELS):
+        user = UserContext(user_id="u", role=role, department_id=dept, level=level)
+        rule = derive_rule(dept, role, level, policy_version())
+        for m in materials:
+            expected = material.check_material_policy(user, Action.DOWNLOAD, m).allowed
+            assert rule.allows(m.department_id, m.level, m.visibility_scope) == expected
+
+def test_rules_are_shared_per_class():
+    index = DownloadIndex()
+    first = index.rule(UserContext(user_id="a", role=Role.STUDENT, department_id="CS", level=200))
+    second = index.rule(UserContext(user_id="b", role=Role.STUDENT, department_id="CS", level=200))
+    index.rule(UserContext(user_id="a", role=Role.STUDENT, department_id="CS", level=300))
+
+    assert first is second
+    assert (first.max_level, first.override) == (200, (VisibilityScope.GLOBAL_SEARCHABLE,))
+    assert index.stats() == {"hits": 1, "misses": 2, "invalidations": 0, "size": 2}
+
+def test_policy_change_rebuilds_rules(monkeypatch):
+    index = DownloadIndex()
+    user = UserContext(user_id="a", role=Role.STUDENT, department_id="CS", level=200)
+    before = index.rule(user)
+
+    def stricter(user, action, resource):
+        return PolicyDecision(allowed=resource.department_id == user.department_id and resource.level <= user.level,
+                              reason="test")
+    monkeypatch.setattr(material, "check_material_policy", stricter)
+    after = index.rule(user)
+
+    assert after.version != before.version
+    assert (after.max_level, after.override) == (200, ())
+    assert not after.allows("CS", 300, VisibilityScope.GLOBAL_SEARCHABLE)
+    assert index.stats()["invalidations"] == 1
@@ -0,0 +1,178 @@
+import json
+import time
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.database import ThreadedSession
+from app.dependencies import get_current_user, get_db, get_read_db
+from app.main import app
+from app.models.models import Material, VisibilityScope
+from app.policies.base import UserContext
+from app.services import download_tickets
+from app.services.download_tickets import InvalidTicket, issue_ticket, revoke_ticket, validate_ticket
+from app.services.tokens import KeyRing, RevocationList, _b64decode, _b64encode, revocations
+
+KEYS = KeyRing({"t1": b"ticket secret"})
+DEPARTMENT = uuid.UUID(int=0xA << 124 | 1)
+MATERIAL_ID = uuid.UUID(int=0xB << 124 | 1)
+
+pytestmark = pytest.mark.usefixtures("storage_dir")
+
+def _user(role="student", level=200):
+    return UserContext(user_id=str(uuid.uuid4()), role=role, department_id=str(DEPARTMENT), level=level)
+
+def _material(**overrides):
+    fields = dict(id=MATERIAL_ID, title="Week 1", course_code="CS101", department_id=DEPARTMENT,
+                  level=100, visibility_scope=VisibilityScope.DEPARTMENT, file_path="blobs/week1",
+                  filename="week1.txt", content_type="text/plain", sha256="ab" * 32,
+                  uploaded_by=uuid.UUID(int=0xC << 124))
+    fields.update(overrides)
+    return Material(**fields)
+
+def test_ticket_round_trip():
+    user, material = _user(), _material()
+    ticket, expires_at = issue_ticket(user, material, ttl=60, keys=KEYS, now=1_000)
+    granted = validate_ticket(ticket, keys=KEYS, now=1_059)
+    assert (granted.user_id, granted.material_id, granted.key) == (user.user_id, str(material.id), "blobs/week1")
+    assert (granted.filename, granted.sha256, granted.expires_at) == ("week1.txt", "ab" * 32, expires_at)
+    assert expires_at == 1_060
+
+def test_expired_tickets_are_rejected():
+    ticket, expires_at = issue_ticket(_user(), _material(), ttl=60, keys=KEYS, now=1_000)
+    with pytest.raises(InvalidTicket, match="expired"):
+        validate_ticket(ticket, keys=KEYS, now=expires_at)
+
+def test_tampered_tickets_are_rejected():
+    ticket, _ = issue_ticket(_user(), _material(), keys=KEYS)
+    payload, signature = ticket.split(".")
+
+    claims = json.loads(_b64decode(payload))
+    claims["key"] = "blobs/someone-elses-file"
+    forged = f"{_b64encode(json.dumps(claims).encode())}.{signature}"
+    with pytest.raises(InvalidTicket, match="signature"):
+        validate_ticket(forged, keys=KEYS)
+
+    flipped = signature[:-2] + ("A" if signature[-2] != "A" else "B") + signature[-1]
+    with pytest.raises(InvalidTicket, match="signature"):
+        validate_ticket(f"{payload}.{flipped}", keys=KEYS)
+    with pytest.raises(InvalidTicket, match="signature"):
+        validate_ticket(ticket, keys=KeyRing({"t1": b"another secret"}))
+    with pytest.raises(InvalidTicket, match="Unknown signing key"):
+        validate_ticket(ticket, keys=KeyRing({"t2": b"ticket secret"}))
+    for garbage in ("", "abc", "a.b.c", "!!!.???"):
+        with pytest.raises(InvalidTicket):
+            validate_ticket(garbage, keys=KEYS)
+    for kid in ({}, [], None):
+        unsigned = _b64encode(json.dumps({"kid": kid}).encode())
+        with pytest.raises(InvalidTicket, match="Unknown signing key"):
+            validate_ticket(f"{unsigned}.AAAA", keys=KEYS)
+
+    # Signed with the right key but without an integer iat
+    del claims["iat"]
+    claims["key"] = "blobs/week1"
+    payload = _b64encode(json.dumps(claims).encode())
+    signed = f"{payload}.{_b64encode(KEYS.sign('t1', download_tickets._DOMAIN + payload.encode('ascii')))}"
+    with pytest.raises(InvalidTicket, match="Malformed"):
+        validate_ticket(signed, keys=KEYS)
+
+def test_revocation_by_ticket_user_and_material():
+    user, material = _user(), _material(id=uuid.uuid4())
+    revoked, _ = issue_ticket(user, material, keys=KEYS)
+    # Issued a second earlier: user and material cut-offs reject tickets from before the current second
+    kept, _ = issue_ticket(user, material, keys=KEYS, now=time.time() - 1)
+    revoke_ticket(revoked, keys=KEYS)
+    with pytest.raises(InvalidTicket, match="revoked"):
+        validate_ticket(revoked, keys=KEYS)
+    validate_ticket(kept, keys=KEYS)
+
+    other_material, _ = issue_ticket(user, _material(id=uuid.uuid4()), keys=KEYS, now=time.time() - 1)
+    revocations.revoke_material(str(material.id))
+    with pytest.raises(InvalidTicket, match="revoked"):
+        validate_ticket(kept, keys=KEYS)
+    validate_ticket(other_material, keys=KEYS)
+
+    revocations.revoke_user(user.user_id)
+    with pytest.raises(InvalidTicket, match="revoked"):
+        validate_ticket(other_material, keys=KEYS)
+
+def test_material_changes_revoke_outstanding_tickets(session):
+    material = _material(id=uuid.uuid4(), sha256=None)
+    session.add(material)
+    session.commit()
+    ticket, _ = issue_ticket(_user(), material, keys=KEYS, now=time.time() - 1)
+    material.title = "Renamed"
+    session.commit()
+    validate_ticket(ticket, keys=KEYS)
+
+    material.visibility_scope = VisibilityScope.LEVEL_ONLY
+    session.flush()
+    session.rollback()
+    validate_ticket(ticket, keys=KEYS)
+
+    material.visibility_scope = VisibilityScope.LEVEL_ONLY
+    session.commit()
+    with pytest.raises(InvalidTicket, match="revoked"):
+        validate_ticket(ticket, keys=KEYS)
+    # A ticket issued right after the change, in the same second, is valid
+    validate_ticket(issue_ticket(_user(), material, keys=KEYS)[0], keys=KEYS)
+    other_process = RevocationList()
+    other_process.sync(session)
+    assert other_process.is_revoked(json.loads(_b64decode(ticket.split(".")[0])))
+
+def test_ticket_endpoints(engine, storage_dir):
+    (storage_dir / "blobs").mkdir(parents=True)
+    (storage_dir / "blobs" / "week1").write_bytes(b"0123456789")
+    with Session(engine) as session:
+        session.add(_material(sha256=None))
+        session.commit()
+
+    async def test_db():
+        db = ThreadedSession(Session(engine))
+        try:
+            yield db
+        finally:
+            await db.close()
+
+    owner, other = _user(), _user()
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    app.dependency_overrides[get_read_db] = test_db
+    app.dependency_overrides[get_db] = test_db
+    try:
+        with TestClient(app) as client:
+            app.dependency_overrides[get_current_user] = lambda: owner
+            issued = client.post(f"/materials/{MATERIAL_ID}/download-ticket", params={"ttl": 120})
+            assert issued.status_code == 201
+            url = issued.json()["url"]
+
+            event.listen(engine, "before_cursor_execute", listener)
+            try:
+                ranged = client.get(url, headers={"Range": "bytes=2-4"})
+            finally:
+                event.remove(engine, "before_cursor_execute", listener)
+            assert (ranged.status_code, ranged.content) == (206, b"234")
+            assert statements == []
+
+            # The DOWNLOAD policy runs once, at issue time
+            app.dependency_overrides[get_current_user] = lambda: _user(level=0)
+            assert client.post(f"/materials/{MATERIAL_ID}/download-ticket").status_code == 403
+
+            app.dependency_overrides[get_current_user] = lambda: other
+            assert client.delete(url).status_code == 403
+            app.dependency_overrides[get_current_user] = lambda: owner
+            assert client.delete(url).status_code == 204
+            assert client.get(url).status_code == 403
+            # Other processes pick the revocation up from token_revocations
+            other_process = RevocationList()
+            with Session(engine) as session:
+                other_process.sync(session)
+            assert other_process.is_revoked(json.loads(_b64decode(url.rsplit("/", 1)[1].split(".")[0])))
+            assert client.get(url[:-3] + "abc").status_code == 403
+            unhashable_kid = _b64encode(json.dumps({"kid": []}).encode())
+            assert client.get(f"/downloads/{unhashable_kid}.AAAA").status_code == 403
+    finally:
+        app.dependency_overrides.clear()
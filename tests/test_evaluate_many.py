@@ -0,0 +1,53 @@
+import itertools
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from app.policies.base import UserContext, MaterialContext, Action, Role, VisibilityScope
+from app.policies.engine import evaluate_many
+from app.policies.material import check_material_policy
+
+DEPARTMENTS = ["CS", "BIO"]
+LEVELS = [0, 1, 2, 5, 10]
+
+def _users():
+    for i, (role, dept, level) in enumerate(itertools.product(Role, DEPARTMENTS, LEVELS)):
+        yield UserContext(user_id=f"u{i}", role=role, department_id=dept, level=level)
+
+def _materials():
+    for i, (dept, level, scope) in enumerate(itertools.product(DEPARTMENTS, LEVELS, VisibilityScope)):
+        yield MaterialContext(id=f"m{i}", department_id=dept, level=level, visibility_scope=scope)
+
+@pytest.mark.parametrize("action", list(Action))
+def test_matches_scalar_policy_for_every_combination(action):
+    materials = list(_materials())
+    for user in _users():
+        expected = [check_material_policy(user, action, m).allowed for m in materials]
+        assert evaluate_many(user, action, materials) == expected
+
+@pytest.mark.parametrize("action", list(Action))
+def test_columnar_input_matches_row_input(action):
+    materials = list(_materials())
+    columns = {
+        "department_id": [m.department_id for m in materials],
+        "level": [m.level for m in materials],
+        "visibility_scope": [m.visibility_scope for m in materials],
+    }
+    for user in _users():
+        assert evaluate_many(user, action, columns) == evaluate_many(user, action, materials)
+
+def test_raw_rows_with_uuid_department_ids():
+    dept = uuid.uuid4()
+    user = UserContext(user_id="s1", role=Role.STUDENT, department_id=str(dept), level=1)
+    rows = [
+        SimpleNamespace(department_id=dept, level=1, visibility_scope=VisibilityScope.DEPARTMENT),
+        SimpleNamespace(department_id=dept, level=2, visibility_scope=VisibilityScope.DEPARTMENT),
+        SimpleNamespace(department_id=dept, level=2, visibility_scope=VisibilityScope.GLOBAL_SEARCHABLE),
+        SimpleNamespace(department_id=uuid.uuid4(), level=1, visibility_scope=VisibilityScope.DEPARTMENT),
+    ]
+
+    assert evaluate_many(user, Action.DOWNLOAD, rows) == [True, False, True, False]
+
+def test_empty_input():
+    user = UserContext(user_id="s1", role=Role.STUDENT, department_id="CS", level=1)
+    assert evaluate_many(user, Action.DOWNLOAD, []) == []
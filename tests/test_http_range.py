@@ -0,0 +1,121 @@
+import os
+from email.utils import formatdate
+
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.services.http_range import parse_range
+from app.services import storage
+from app.services.storage import content_etag, stream_file
+
+CONTENT = bytes(range(256)) * 4  # 1024 bytes
+ETAG = content_etag("a" * 64)
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("bytes=0-99", [(0, 99)]),
+    ("bytes=1000-", [(1000, 1023)]),
+    ("bytes=-100", [(924, 1023)]),
+    ("bytes=-5000", [(0, 1023)]),
+    ("bytes=1000-5000", [(1000, 1023)]),
+    ("bytes=0-0, 10-19, -1", [(0, 0), (10, 19), (1023, 1023)]),
+    ("bytes=2000-3000", []),
+    ("bytes=-0", []),
+    ("bytes=50-10", None),
+    ("bytes=abc", None),
+    ("bytes=-", None),
+    ("items=0-10", None),
+    ("bytes=" + ",".join(f"{i}-{i}" for i in range(20)), None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, len(CONTENT)) == expected
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "_backend", storage.LocalStorageBackend(tmp_path))
+    path = tmp_path / "blob"
+    path.write_bytes(CONTENT)
+
+    async def download(request):
+        return await stream_file("blob", request.headers, etag=ETAG, media_type="application/pdf", filename="notes.pdf")
+
+    with TestClient(Starlette(routes=[Route("/file", download)])) as client:
+        client.mtime = os.path.getmtime(path)
+        yield client
+
+def test_full_download_advertises_validators(client):
+    r = client.get("/file")
+    assert r.status_code == 200
+    assert r.content == CONTENT
+    assert r.headers["etag"] == ETAG
+    assert r.headers["accept-ranges"] == "bytes"
+    assert r.headers["content-length"] == str(len(CONTENT))
+
+def test_single_range(client):
+    r = client.get("/file", headers={"Range": "bytes=100-199"})
+    assert r.status_code == 206
+    assert r.content == CONTENT[100:200]
+    assert r.headers["content-range"] == "bytes 100-199/1024"
+
+def test_suffix_range(client):
+    r = client.get("/file", headers={"Range": "bytes=-24"})
+    assert r.status_code == 206
+    assert r.content == CONTENT[-24:]
+    assert r.headers["content-range"] == "bytes 1000-1023/1024"
+
+def test_multi_range(client):
+    r = client.get("/file", headers={"Range": "bytes=0-9, 500-509, -4"})
+    assert r.status_code == 206
+    content_type = r.headers["content-type"]
+    assert content_type.startswith("multipart/byteranges; boundary=")
+    assert int(r.headers["content-length"]) == len(r.content)
+
+    boundary = content_type.split("boundary=")[1].encode()
+    parts = r.content.split(b"--" + boundary)
+    assert parts[-1] == b"--\r\n"
+    bodies = []
+    for part in parts[1:-1]:
+        head, body = part.split(b"\r\n\r\n", 1)
+        assert b"Content-Type: application/pdf" in head
+        bodies.append((head.split(b"Content-Range: ")[1].decode(), body[:-2]))
+    assert bodies == [
+        ("bytes 0-9/1024", CONTENT[0:10]),
+        ("bytes 500-509/1024", CONTENT[500:510]),
+        ("bytes 1020-1023/1024", CONTENT[1020:]),
+    ]
+
+def test_unsatisfiable_range(client):
+    r = client.get("/file", headers={"Range": "bytes=5000-"})
+    assert r.status_code == 416
+    assert r.headers["content-range"] == "bytes */1024"
+
+def test_if_none_match_returns_304(client):
+    r = client.get("/file", headers={"If-None-Match": f'"other", {ETAG}'})
+    assert r.status_code == 304
+    assert r.content == b""
+    assert r.headers["etag"] == ETAG
+
+    assert client.get("/file", headers={"If-None-Match": '"other"'}).status_code == 200
+
+def test_if_modified_since(client):
+    r = client.get("/file", headers={"If-Modified-Since": formatdate(client.mtime + 10, usegmt=True)})
+    assert r.status_code == 304
+    r = client.get("/file", headers={"If-Modified-Since": formatdate(client.mtime - 10, usegmt=True)})
+    assert r.status_code == 200
+
+def test_if_none_match_takes_precedence_over_if_modified_since(client):
+    r = client.get("/file", headers={
+        "If-None-Match": '"other"',
+        "If-Modified-Since": formatdate(client.mtime + 10, usegmt=True),
+    })
+    assert r.status_code == 200
+
+def test_if_range_mismatch_sends_full_body(client):
+    r = client.get("/file", headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert r.status_code == 200
+    assert r.content == CONTENT
+
+    r = client.get("/file", headers={"Range": "bytes=0-9", "If-Range": ETAG})
+    assert r.status_code == 206
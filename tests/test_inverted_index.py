@@ -0,0 +1,43 @@
+import pytest
+from app.services.inverted_index import InvertedIndex, tokenize
+
+@pytest.fixture
+def index():
+    index = InvertedIndex()
+    index.add("m1", "Introduction to Algorithms CS101")
+    index.add("m2", "Organic Chemistry CHM201")
+    index.add("m3", "Advanced Algorithms CS301")
+    return index
+
+def _ids(results):
+    return [doc_id for doc_id, _ in results]
+
+def test_tokenize_splits_course_codes():
+    assert tokenize("CS101 Intro") == ["cs101", "cs", "101", "intro"]
+    assert tokenize("CS101 Intro", split_codes=False) == ["cs101", "intro"]
+
+def test_exact_course_code_ranks_first(index):
+    assert _ids(index.search("CS101")) == ["m1"]
+
+def test_shared_token_matches_all_documents(index):
+    assert set(_ids(index.search("algorithms"))) == {"m1", "m3"}
+
+def test_substring_matches_like_ilike(index):
+    assert _ids(index.search("ntro")) == ["m1"]
+    assert set(_ids(index.search("cs"))) == {"m1", "m3"}
+
+def test_typo_tolerant_match(index):
+    assert _ids(index.search("intrduction")) == ["m1"]
+    assert _ids(index.search("chemstry")) == ["m2"]
+
+def test_no_match(index):
+    assert index.search("zoology") == []
+
+def test_remove_and_readd(index):
+    index.remove("m1")
+    assert index.search("introduction") == []
+    assert len(index) == 2
+
+    index.add("m3", "Introduction to Databases CS301")
+    assert _ids(index.search("introduction")) == ["m3"]
+    assert index.search("algorithms") == []
@@ -0,0 +1,177 @@
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.models.models import Department, Job, JobStatus, Material, MaterialStatus, VisibilityScope
+from app.services import jobs, processing, storage
+from app.services.jobs import JobWorker, claim_jobs, enqueue, job_handler, retry_delay
+
+@pytest.fixture
+def handlers(monkeypatch):
+    monkeypatch.setattr(jobs, "_handlers", dict(jobs._handlers))
+    return jobs._handlers
+
+def _enqueue(session_factory, kind, payload=None):
+    with session_factory() as session:
+        job = enqueue(session, kind, payload or {})
+        session.commit()
+        return job.id
+
+def _job(session_factory, job_id) -> Job:
+    with session_factory() as session:
+        return session.get(Job, job_id)
+
+def test_jobs_run_once_and_commit_with_their_work(session_factory, handlers):
+    seen = []
+
+    @job_handler("test.echo")
+    def echo(session, payload):
+        seen.append(payload["n"])
+
+    job_id = _enqueue(session_factory, "test.echo", {"n": 1})
+    worker = JobWorker(session_factory)
+    assert worker.run_pending() == 1
+    assert worker.run_pending() == 0
+    assert seen == [1]
+    job = _job(session_factory, job_id)
+    assert (job.status, job.attempts, job.locked_by) == (JobStatus.DONE, 1, None)
+
+def test_failures_retry_with_backoff_then_fail(session_factory, handlers):
+    failures = []
+
+    @job_handler("test.flaky", max_attempts=2, on_failure=lambda session, payload, error: failures.append(error))
+    def flaky(session, payload):
+        raise RuntimeError("storage unavailable")
+
+    job_id = _enqueue(session_factory, "test.flaky")
+    worker = JobWorker(session_factory)
+    before = datetime.utcnow()
+    assert worker.run_pending() == 1
+    job = _job(session_factory, job_id)
+    assert (job.status, job.attempts) == (JobStatus.QUEUED, 1)
+    assert job.last_error == "RuntimeError: storage unavailable"
+    assert job.run_at >= before + timedelta(seconds=jobs.JOB_BACKOFF_BASE / 2)
+    assert worker.run_pending() == 0  # not due yet
+
+    with session_factory() as session:
+        claimed = claim_jobs(session, worker.worker_id, 1, now=job.run_at)
+    assert jobs.run_job(session_factory, claimed[0], worker.worker_id) == "failed"
+    assert _job(session_factory, job_id).status == JobStatus.FAILED
+    assert failures == ["RuntimeError: storage unavailable"]
+
+def test_unknown_kinds_fail_like_handler_errors(session_factory, handlers):
+    job_id = _enqueue(session_factory, "test.missing")
+    JobWorker(session_factory).run_pending()
+    assert "No handler registered" in _job(session_factory, job_id).last_error
+
+def test_expired_leases_are_reclaimed(session_factory, handlers):
+    job_handler("test.noop", max_attempts=2)(lambda session, payload: None)
+    job_id = _enqueue(session_factory, "test.noop")
+    with session_factory() as session:
+        assert len(claim_jobs(session, "crashed", 10)) == 1
+        assert claim_jobs(session, "other", 10) == []
+        later = datetime.utcnow() + timedelta(seconds=jobs.JOB_LEASE_SECONDS + 1)
+        [reclaimed] = claim_jobs(session, "other", 10, now=later)
+    assert reclaimed.attempts == 2
+    # The crashed worker's late result no longer counts
+    assert jobs.run_job(session_factory, reclaimed._replace(), "crashed") == "lost"
+    assert jobs.run_job(session_factory, reclaimed, "other") == "done"
+
+    # A job whose final attempt was lost is failed rather than handed out again
+    with session_factory() as session:
+        job = session.get(Job, job_id)
+        job.status, job.locked_until = JobStatus.RUNNING, datetime.utcnow() - timedelta(seconds=1)
+        session.commit()
+        assert claim_jobs(session, "third", 10) == []
+    assert _job(session_factory, job_id).status == JobStatus.FAILED
+
+def test_retry_delay_is_capped_and_jittered(monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_BACKOFF_BASE", 5)
+    monkeypatch.setattr(jobs, "JOB_BACKOFF_MAX", 60)
+    assert retry_delay(1, rng=lambda: 0.0) == 2.5
+    assert retry_delay(1, rng=lambda: 1.0) == 5
+    assert retry_delay(3, rng=lambda: 1.0) == 20
+    assert retry_delay(10, rng=lambda: 1.0) == 60
+
+def test_background_worker_picks_up_jobs(session_factory, handlers):
+    seen = []
+    job_handler("test.echo")(lambda session, payload: seen.append(payload))
+    worker = JobWorker(session_factory, concurrency=2, poll_interval=0.01)
+    worker.start()
+    try:
+        _enqueue(session_factory, "test.echo", {"n": 1})
+        deadline = time.monotonic() + 5
+        while not seen and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        worker.stop(timeout=5)
+    assert seen == [{"n": 1}]
+
+def _material(session_factory, storage_dir, content: bytes, **overrides):
+    key = storage.blob_key("ab" * 32)
+    path = storage_dir / key
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    fields = dict(id=uuid.uuid4(), title="Slides", course_code="CS101", department_id=uuid.uuid4(), level=100,
+                  visibility_scope=VisibilityScope.DEPARTMENT, file_path=key, size_bytes=len(content),
+                  uploaded_by=uuid.uuid4(), status=MaterialStatus.PENDING)
+    fields.update(overrides)
+    with session_factory() as session:
+        material = Material(**fields)
+        session.add(material)
+        processing.queue_material(session, material.id)
+        session.commit()
+        return material.id
+
+def test_process_material_sniffs_content_type(session_factory, storage_dir):
+    material_id = _material(session_factory, storage_dir, b"%PDF-1.7 ...", filename="week1",
+                            content_type="application/octet-stream")
+    JobWorker(session_factory).run_pending()
+    with session_factory() as session:
+        material = session.get(Material, material_id)
+        assert (material.status, material.content_type) == (MaterialStatus.READY, "application/pdf")
+
+def test_process_material_marks_failures(session_factory, storage_dir, monkeypatch):
+    monkeypatch.setitem(jobs._handlers, processing.PROCESS_MATERIAL,
+                        jobs._handlers[processing.PROCESS_MATERIAL]._replace(max_attempts=1))
+    material_id = _material(session_factory, storage_dir, b"abc", size_bytes=10)
+    JobWorker(session_factory).run_pending()
+    with session_factory() as session:
+        assert session.get(Material, material_id).status == MaterialStatus.FAILED
+        job = session.scalars(select(Job)).one()
+        assert "expected 10" in job.last_error
+
+def test_process_material_is_pending_again_while_a_retry_waits(session_factory, storage_dir, monkeypatch):
+    monkeypatch.setitem(jobs._handlers, processing.PROCESS_MATERIAL,
+                        jobs._handlers[processing.PROCESS_MATERIAL]._replace(max_attempts=2))
+    material_id = _material(session_factory, storage_dir, b"abc", size_bytes=10)
+    JobWorker(session_factory).run_pending()
+    with session_factory() as session:
+        assert session.get(Material, material_id).status == MaterialStatus.PENDING
+        assert session.scalars(select(Job)).one().status == JobStatus.QUEUED
+
+def test_status_changes_bump_the_library_version(session_factory, storage_dir):
+    with session_factory() as session:
+        department = Department(name="Computer Science", code="CS")
+        session.add(department)
+        session.commit()
+        department_id = department.id
+    material_id = _material(session_factory, storage_dir, b"notes", department_id=department_id)
+    with session_factory() as session:
+        uploaded = session.get(Department, department_id).library_version
+
+    # The worker commits PROCESSING, then READY: API processes' cached libraries change key
+    JobWorker(session_factory).run_pending()
+    with session_factory() as session:
+        assert session.get(Material, material_id).status == MaterialStatus.READY
+        assert session.get(Department, department_id).library_version == uploaded + 2
+
+def test_sniff_content_type():
+    assert processing.sniff_content_type(b"\x89PNG\r\n\x1a\n....", None) == "image/png"
+    assert processing.sniff_content_type(b"PK\x03\x04", "notes.docx") == \
+        "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+    assert processing.sniff_content_type(b"hello", "notes.txt") == "text/plain"
+    assert processing.sniff_content_type(b"hello", None) is None
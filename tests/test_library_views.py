@@ -0,0 +1,118 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base, ThreadedSession
+from app.dependencies import get_current_user, get_db, get_read_db
+from app.main import app
+from app.models.models import Department, Material, VisibilityScope
+from app.policies.base import Role, UserContext
+from app.services.response_cache import library_cache
+
+DEPT = uuid.UUID(int=0xA << 124)
+# level -> (department-only count, globally searchable count)
+LEVELS = {100: (5, 0), 200: (2, 1), 300: (2, 0)}
+
+@pytest.fixture
+def client():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    start = datetime(2024, 1, 1)
+    rows = []
+    for level, (department_only, searchable) in LEVELS.items():
+        scopes = [VisibilityScope.DEPARTMENT] * department_only + [VisibilityScope.GLOBAL_SEARCHABLE] * searchable
+        for scope in scopes:
+            rows.append(dict(id=uuid.UUID(int=(0xB << 124) | len(rows)), title=f"L{level} #{len(rows)}",
+                             course_code="CS101", department_id=DEPT, level=level, visibility_scope=scope,
+                             file_path="blobs/x", uploaded_by=uuid.UUID(int=0xC << 124),
+                             created_at=start + timedelta(minutes=len(rows))))
+    with Session(engine) as session:
+        session.execute(insert(Material), rows)
+        session.commit()
+
+    async def test_db():
+        db = ThreadedSession(Session(engine))
+        try:
+            yield db
+        finally:
+            await db.close()
+
+    user = UserContext(user_id=str(uuid.uuid4()), role=Role.STUDENT, department_id=str(DEPT), level=100)
+    app.dependency_overrides[get_db] = app.dependency_overrides[get_read_db] = test_db
+    app.dependency_overrides[get_current_user] = lambda: user
+    library_cache.clear()
+    with TestClient(app) as client:
+        client.engine = engine
+        yield client
+    app.dependency_overrides.clear()
+    library_cache.clear()
+
+def test_summary_counts_levels_in_the_database(client):
+    body = client.get(f"/library/{DEPT}", params={"summary": "true"}).json()
+    assert body["levels"] == [
+        {"level": 100, "count": 5, "downloadable": 5},
+        {"level": 200, "count": 3, "downloadable": 1},
+        {"level": 300, "count": 2, "downloadable": 0},
+    ]
+
+def test_per_level_limit_keeps_first_rows_and_resumes_by_level(client):
+    body = client.get(f"/library/{DEPT}", params={"per_level_limit": 2}).json()
+    assert {level: len(items) for level, items in body["levels"].items()} == {"100": 2, "200": 2, "300": 2}
+    assert [m["title"] for m in body["levels"]["100"]] == ["L100 #0", "L100 #1"]
+    assert set(body["next_cursors"]) == {"100", "200"}
+
+    rest = client.get(f"/library/{DEPT}", params={"level": 100, "cursor": body["next_cursors"]["100"], "limit": 10})
+    assert [m["title"] for m in rest.json()["levels"]["100"]] == ["L100 #2", "L100 #3", "L100 #4"]
+
+def test_level_filter_and_caching(client):
+    first = client.get(f"/library/{DEPT}", params={"level": 300})
+    second = client.get(f"/library/{DEPT}", params={"level": 300})
+    assert list(first.json()["levels"]) == ["300"]
+    assert (first.headers["x-cache"], second.headers["x-cache"]) == ("MISS", "HIT")
+    # Different views of the same department are cached separately
+    assert client.get(f"/library/{DEPT}").headers["x-cache"] == "MISS"
+
+def test_summary_cannot_be_paged(client):
+    assert client.get(f"/library/{DEPT}", params={"summary": "true", "limit": 5}).status_code == 400
+
+def test_writes_from_other_processes_change_the_cache_key(client):
+    engine = client.engine
+    with Session(engine) as session:
+        session.add(Department(id=DEPT, name="Computer Science", code="CS"))
+        session.commit()
+    assert client.get(f"/library/{DEPT}", params={"level": 300}).headers["x-cache"] == "MISS"
+    assert client.get(f"/library/{DEPT}", params={"level": 300}).headers["x-cache"] == "HIT"
+
+    # Another process commits a material (and its version bump); this process's
+    # cache never hears of it
+    with Session(engine) as session:
+        session.add(Material(title="New", course_code="CS301", department_id=DEPT, level=300,
+                             visibility_scope=VisibilityScope.DEPARTMENT, file_path="blobs/x",
+                             uploaded_by=uuid.UUID(int=0xC << 124)))
+        session.flush()
+        session.info.clear()
+        session.commit()
+    response = client.get(f"/library/{DEPT}", params={"level": 300})
+    assert response.headers["x-cache"] == "MISS"
+    assert "New" in [m["title"] for m in response.json()["levels"]["300"]]
+
+def test_cache_filling_reads_use_the_primary(client):
+    lagging = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(lagging)
+
+    async def replica_db():
+        db = ThreadedSession(Session(lagging))
+        try:
+            yield db
+        finally:
+            await db.close()
+
+    app.dependency_overrides[get_read_db] = replica_db
+    assert client.get(f"/library/{DEPT}", params={"level": 300}).json()["levels"] != {}
+    # Paged views are not cached and may read from a replica
+    assert client.get(f"/library/{DEPT}", params={"level": 300, "limit": 10}).json()["levels"] == {}
@@ -0,0 +1,107 @@
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base, ThreadedSession
+from app.dependencies import get_current_user, get_db, get_read_db
+from app.main import app
+from app.metrics import POLICY_DECISIONS, REQUEST_STATEMENTS, Counter, Histogram, track_request
+from app.models.models import Material, VisibilityScope
+from app.policies.base import Action, Role, UserContext
+from app.policies.engine import evaluate_many
+
+def test_counter_and_histogram_text_format():
+    counter = Counter("jobs_total", "Jobs.", ("kind",))
+    counter.inc("a")
+    counter.inc("a", amount=2)
+    assert counter.render() == ["# HELP jobs_total Jobs.", "# TYPE jobs_total counter", 'jobs_total{kind="a"} 3.0']
+
+    histogram = Histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value)
+    assert histogram.render()[2:] == [
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1.0"} 2',
+        'latency_seconds_bucket{le="+Inf"} 3',
+        "latency_seconds_sum 5.55",
+        "latency_seconds_count 3",
+    ]
+
+def test_statements_and_db_time_are_tracked_per_request():
+    engine = create_engine("sqlite://")
+    with engine.connect() as conn:
+        conn.execute(text("select 1"))
+        with track_request() as metrics:
+            conn.execute(text("select 1"))
+            conn.execute(text("select 2"))
+        conn.execute(text("select 3"))
+    assert metrics.statements == 2
+    assert metrics.stages["db"] > 0
+
+def test_policy_decisions_are_counted_by_outcome():
+    dept = str(uuid.uuid4())
+    user = UserContext(user_id=str(uuid.uuid4()), role=Role.STUDENT, department_id=dept, level=100)
+    rows = {"department_id": [dept, dept, "other"], "level": [100, 200, 100],
+            "visibility_scope": [VisibilityScope.DEPARTMENT] * 3}
+    allowed, denied = POLICY_DECISIONS.value("DOWNLOAD", "true"), POLICY_DECISIONS.value("DOWNLOAD", "false")
+
+    with track_request() as metrics:
+        evaluate_many(user, Action.DOWNLOAD, rows)
+
+    assert POLICY_DECISIONS.value("DOWNLOAD", "true") == allowed + 1
+    assert POLICY_DECISIONS.value("DOWNLOAD", "false") == denied + 2
+    assert "policy" in metrics.stages
+
+@pytest.fixture
+def client():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    dept = uuid.UUID(int=0xA << 124)
+    user = UserContext(user_id=str(uuid.uuid4()), role=Role.STUDENT, department_id=str(dept), level=100)
+
+    async def test_db():
+        db = ThreadedSession(Session(engine))
+        try:
+            yield db
+        finally:
+            await db.close()
+
+    app.dependency_overrides[get_db] = app.dependency_overrides[get_read_db] = test_db
+    app.dependency_overrides[get_current_user] = lambda: user
+    with TestClient(app) as client:
+        client.engine, client.department_id = engine, dept
+        yield client
+    app.dependency_overrides.clear()
+
+def _add_materials(client, count):
+    with Session(client.engine) as session:
+        session.execute(insert(Material), [
+            dict(id=uuid.UUID(int=(0xB << 124) | uuid.uuid4().int >> 4), title="Notes", course_code="CS101",
+                 department_id=client.department_id, level=100, visibility_scope=VisibilityScope.DEPARTMENT,
+                 file_path="blobs/x", uploaded_by=uuid.UUID(int=0xC << 124))
+            for _ in range(count)
+        ])
+        session.commit()
+
+def _statements(client):
+    route = "/library/{department_id}"
+    before = REQUEST_STATEMENTS.sum(route)
+    client.get(f"/library/{client.department_id}", params={"limit": 500}).raise_for_status()
+    return REQUEST_STATEMENTS.sum(route) - before
+
+def test_library_statement_count_does_not_grow_with_rows(client):
+    _add_materials(client, 2)
+    few = _statements(client)
+    _add_materials(client, 40)
+    assert _statements(client) == few
+
+def test_metrics_endpoint(client):
+    _statements(client)
+    body = client.get("/metrics")
+    assert body.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'http_requests_total{method="GET",route="/library/{department_id}",status="200"}' in body.text
+    assert "library_response_cache_hits_total" in body.text
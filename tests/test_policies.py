@@ -70,3 +70,18 @@ def test_metadata_view_same_dept():
     
     decision = evaluate(user, Action.VIEW_METADATA, material)
     assert decision.allowed is True
+
+def test_decisions_are_shared_constants():
+    user = UserContext(user_id="s1", role=Role.STUDENT, department_id="CS", level=1)
+    first = MaterialContext(id="m1", department_id="CS", level=1, visibility_scope=VisibilityScope.DEPARTMENT)
+    second = MaterialContext(id="m2", department_id="CS", level=0, visibility_scope=VisibilityScope.DEPARTMENT)
+
+    assert evaluate(user, Action.DOWNLOAD, first) is evaluate(user, Action.DOWNLOAD, second)
+
+def test_contexts_are_frozen_and_normalize_user_fields():
+    user = UserContext(user_id="s1", role="librarian", department_id="CS", level="2")
+    assert (user.role, user.level) == (Role.LIBRARIAN, 2)
+    with pytest.raises(AttributeError):
+        user.level = 3
+    with pytest.raises(ValueError):
+        UserContext(user_id="s1", role="janitor", department_id="CS", level=1)
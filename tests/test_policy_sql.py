@@ -0,0 +1,77 @@
+import random
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app.database import Base
+from app.models.models import Material, VisibilityScope as ModelVisibilityScope
+from app.policies.base import UserContext, MaterialContext, Action, Role
+from app.policies.material import check_material_policy
+from app.policies.sql import compile_material_policy, download_allowed_column
+
+DEPARTMENTS = [uuid.uuid4() for _ in range(3)]
+
+@pytest.fixture(scope="module")
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    rng = random.Random(1234)
+    rows = [
+        dict(
+            id=uuid.uuid4(),
+            title=f"Material {i}",
+            course_code=f"C{i}",
+            department_id=rng.choice(DEPARTMENTS),
+            level=rng.randint(0, 6) * 100,
+            visibility_scope=rng.choice([ModelVisibilityScope.DEPARTMENT, ModelVisibilityScope.GLOBAL_SEARCHABLE]),
+            file_path="/dev/null",
+            uploaded_by=uuid.uuid4(),
+        )
+        for i in range(300)
+    ]
+    with Session(engine) as session:
+        session.execute(insert(Material), rows)
+        session.commit()
+        yield session
+
+def _random_user(rng: random.Random) -> UserContext:
+    return UserContext(
+        user_id=str(uuid.uuid4()),
+        role=rng.choice(list(Role)),
+        department_id=str(rng.choice(DEPARTMENTS)),
+        level=rng.randint(0, 6) * 100 + rng.choice([0, 0, 50]),
+    )
+
+def _python_allowed(user: UserContext, action: Action, m: Material) -> bool:
+    context = MaterialContext(
+        id=str(m.id),
+        department_id=str(m.department_id),
+        level=m.level,
+        visibility_scope=m.visibility_scope
+    )
+    return check_material_policy(user, action, context).allowed
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("action", [Action.DOWNLOAD, Action.VIEW_METADATA])
+def test_compiled_predicate_agrees_with_python_rules(db, seed, action):
+    rng = random.Random(seed)
+    materials = db.scalars(select(Material)).all()
+    for _ in range(20):
+        user = _random_user(rng)
+        expected = {m.id for m in materials if _python_allowed(user, action, m)}
+        compiled = set(db.scalars(select(Material.id).where(compile_material_policy(user, action))))
+        assert compiled == expected
+
+def test_download_allowed_column_matches_python_rules(db):
+    rng = random.Random(99)
+    for _ in range(20):
+        user = _random_user(rng)
+        for m, flag in db.execute(select(Material, download_allowed_column(user))):
+            assert bool(flag) == _python_allowed(user, Action.DOWNLOAD, m)
+
+def test_unsupported_action_raises():
+    user = UserContext(user_id="u1", role=Role.STUDENT, department_id=str(DEPARTMENTS[0]), level=1)
+    with pytest.raises(ValueError):
+        compile_material_policy(user, Action.UPLOAD)
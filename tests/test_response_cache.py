@@ -0,0 +1,144 @@
+import uuid
+
+import pytest
+from sqlalchemy import insert, update
+
+from app.models.models import Department, Material, VisibilityScope
+from app.policies.base import Role, UserContext
+from app.services.response_cache import ResponseCache, cached_json_response, library_cache, library_cache_key
+
+DEPT = str(uuid.uuid4())
+OTHER = str(uuid.uuid4())
+
+def _user(role=Role.STUDENT, level=100, department_id=DEPT):
+    return UserContext(user_id=str(uuid.uuid4()), role=role, department_id=department_id, level=level)
+
+def test_key_groups_users_by_download_rule():
+    assert library_cache_key(DEPT, _user(level=100)) == library_cache_key(DEPT, _user(level=100))
+    assert library_cache_key(DEPT, _user(level=100)) != library_cache_key(DEPT, _user(level=200))
+    assert library_cache_key(DEPT, _user(Role.LIBRARIAN, 100)) == library_cache_key(DEPT, _user(Role.ADMIN, 400))
+
+def test_invalidation_is_per_department():
+    cache = ResponseCache()
+    cache.set((DEPT, "student", 100), b"a", cache.generation(DEPT))
+    cache.set((OTHER, "student", 100), b"b", cache.generation(OTHER))
+
+    cache.invalidate_department(DEPT)
+    assert cache.get((DEPT, "student", 100)) is None
+    assert cache.get((OTHER, "student", 100)).body == b"b"
+    assert cache.stats()["hit_rate"] == 0.5
+
+def test_results_read_before_an_invalidation_are_not_stored():
+    cache = ResponseCache()
+    generation = cache.generation(DEPT)
+    cache.invalidate_department(DEPT)
+    cache.set((DEPT, "staff", None), b"stale", generation)
+    assert cache.get((DEPT, "staff", None)) is None
+
+    generation = cache.generation(DEPT)
+    cache.invalidate_all()
+    cache.set((DEPT, "staff", None), b"stale", generation)
+    assert cache.get((DEPT, "staff", None)) is None
+
+def test_lru_bound():
+    cache = ResponseCache(maxsize=2)
+    for level in (100, 200, 300):
+        cache.set((DEPT, "student", level), b"x", cache.generation(DEPT))
+    assert cache.get((DEPT, "student", 100)) is None
+    assert cache.stats()["size"] == 2
+
+def test_entries_expire_after_the_ttl():
+    now = [0.0]
+    cache = ResponseCache(ttl=10, clock=lambda: now[0])
+    cache.set((DEPT, "staff", None), b"{}", cache.generation(DEPT))
+    now[0] = 9.9
+    assert cache.get((DEPT, "staff", None)) is not None
+    now[0] = 10
+    assert cache.get((DEPT, "staff", None)) is None
+    assert cache.stats()["size"] == 0
+
+def test_matching_etag_returns_304():
+    cache = ResponseCache()
+    cached = cache.set((DEPT, "staff", None), b"{}", 0)
+    assert cached_json_response({}, cached, hit=True).status_code == 200
+    r = cached_json_response({"if-none-match": cached.etag}, cached, hit=True)
+    assert r.status_code == 304
+    assert r.headers["etag"] == cached.etag
+
+@pytest.fixture(autouse=True)
+def empty_library_cache():
+    library_cache.clear()
+    yield
+    library_cache.clear()
+
+def _material(department_id: str, **values) -> dict:
+    return dict(
+        title="Notes", course_code="CS101", department_id=uuid.UUID(department_id), level=100,
+        visibility_scope=VisibilityScope.DEPARTMENT, file_path="blobs/x", uploaded_by=uuid.uuid4(), **values
+    )
+
+def _cache_both():
+    for dept in (DEPT, OTHER):
+        library_cache.set((dept, "staff", None), b"{}", library_cache.generation(dept))
+
+def test_commit_invalidates_only_changed_departments(session):
+    _cache_both()
+    session.add(Material(**_material(DEPT)))
+    session.flush()
+    assert library_cache.get((DEPT, "staff", None)) is not None
+
+    session.commit()
+    assert library_cache.get((DEPT, "staff", None)) is None
+    assert library_cache.get((OTHER, "staff", None)) is not None
+
+def test_moving_a_material_invalidates_both_departments(session):
+    material = Material(**_material(DEPT))
+    session.add(material)
+    session.commit()
+    _cache_both()
+
+    material.department_id = uuid.UUID(OTHER)
+    session.commit()
+    assert library_cache.get((DEPT, "staff", None)) is None
+    assert library_cache.get((OTHER, "staff", None)) is None
+
+def test_rollback_keeps_cache(session):
+    _cache_both()
+    session.add(Material(**_material(DEPT)))
+    session.flush()
+    session.rollback()
+    assert library_cache.get((DEPT, "staff", None)) is not None
+
+def test_bulk_inserts_invalidate_only_their_departments(session):
+    _cache_both()
+    session.execute(insert(Material), [_material(DEPT, id=uuid.uuid4()), _material(DEPT, id=uuid.uuid4())])
+    session.commit()
+    assert library_cache.get((DEPT, "staff", None)) is None
+    assert library_cache.get((OTHER, "staff", None)) is not None
+
+def test_other_bulk_statements_invalidate_everything(session):
+    _cache_both()
+    session.execute(update(Material).values(title="Renamed"))
+    session.commit()
+    assert library_cache.stats()["size"] == 0
+
+def test_material_changes_bump_the_department_library_version(session):
+    departments = [Department(id=uuid.UUID(d), name=d, code=d) for d in (DEPT, OTHER)]
+    session.add_all(departments)
+    session.commit()
+    material = Material(**_material(DEPT))
+    session.add(material)
+    session.commit()
+    assert [d.library_version for d in departments] == [1, 0]
+
+    material.title = "Renamed"
+    session.commit()
+    assert [d.library_version for d in departments] == [2, 0]
+
+    session.execute(insert(Material), [_material(OTHER, id=uuid.uuid4())])
+    session.commit()
+    assert [d.library_version for d in departments] == [2, 1]
+
+    session.execute(update(Material).values(level=200))
+    session.commit()
+    assert [d.library_version for d in departments] == [3, 2]
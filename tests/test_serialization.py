@@ -0,0 +1,48 @@
+import json
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+
+from app.models.models import Material, VisibilityScope
+from app.schemas import MaterialRead
+from app.services import serialization
+from app.services.serialization import MATERIAL_COLUMNS, dumps, material_dicts
+
+@pytest.fixture
+def session(session):
+    session.add_all([
+        Material(
+            id=uuid.UUID(int=0xA << 124 | n), title=f"Notes {n}", course_code="CS101",
+            department_id=uuid.UUID(int=0xB << 124), level=100 * n,
+            visibility_scope=scope, file_path="blobs/x", size_bytes=n or None, sha256=None,
+            uploaded_by=uuid.UUID(int=0xC << 124), created_at=datetime(2024, 1, n + 1, 8, 30, 0, 1234 * n),
+        )
+        for n, scope in enumerate([VisibilityScope.DEPARTMENT, VisibilityScope.GLOBAL_SEARCHABLE])
+    ])
+    session.commit()
+    return session
+
+def _pydantic(session, allowed):
+    results = []
+    for m, dl_allowed in zip(session.scalars(select(Material).order_by(Material.level)), allowed):
+        m_read = MaterialRead.model_validate(m)
+        m_read.download_allowed = dl_allowed
+        results.append(json.loads(m_read.model_dump_json()))
+    return results
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_fast_path_matches_material_read(session, monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(serialization, "orjson", None)
+    rows = session.execute(select(*MATERIAL_COLUMNS).order_by(Material.level)).all()
+    allowed = [True, False]
+
+    assert json.loads(dumps(material_dicts(rows, allowed))) == _pydantic(session, allowed)
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_integer_keys_are_encoded(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(serialization, "orjson", None)
+    assert json.loads(dumps({"levels": {100: []}})) == {"levels": {"100": []}}
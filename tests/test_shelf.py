@@ -0,0 +1,184 @@
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert, select
+from sqlalchemy.orm import Session
+
+from app.database import ThreadedSession
+from app.dependencies import get_current_user, get_read_db
+from app.main import app
+from app.models.models import (Course, Department, Enrollment, EnrollmentStatus, Material, ShelfEntry, User,
+                               UserRole, VisibilityScope)
+from app.policies.base import UserContext
+from app.services import shelf
+
+@pytest.fixture
+def session(session):
+    department = Department(name="Computer Science", code="CS")
+    session.add(department)
+    session.flush()
+    session.department = department
+    session.courses = {
+        code: Course(course_code=code, department_id=department.id, level=level, title=code)
+        for code, level in (("CS101", 100), ("CS201", 200), ("CS301", 300))
+    }
+    session.add_all(session.courses.values())
+    session.student = _user(session, level=200)
+    session.commit()
+    return session
+
+def _user(session, level):
+    user = User(email=f"{uuid.uuid4()}@school.edu", password_hash="x", role=UserRole.STUDENT,
+                department_id=session.department.id, level=level)
+    session.add(user)
+    session.flush()
+    return user
+
+def _material(session, course_code, level=100, department_id=None):
+    material = Material(title=f"{course_code} notes", course_code=course_code,
+                        department_id=department_id or session.department.id,
+                        level=level, visibility_scope=VisibilityScope.DEPARTMENT, file_path="blobs/x",
+                        uploaded_by=session.student.id)
+    session.add(material)
+    session.commit()
+    return material
+
+def _enroll(session, user, course_code, status):
+    enrollment = Enrollment(user_id=user.id, course_id=session.courses[course_code].id, status=status)
+    session.add(enrollment)
+    session.commit()
+    return enrollment
+
+def _shelf(session, user):
+    return sorted(session.scalars(
+        select(Material.title).join(ShelfEntry, ShelfEntry.material_id == Material.id)
+        .where(ShelfEntry.user_id == user.id)
+    ))
+
+def test_active_and_carry_over_courses_fill_the_shelf(session):
+    student = session.student
+    for code in ("CS101", "CS201", "CS301"):
+        _material(session, code)
+    _enroll(session, student, "CS101", EnrollmentStatus.CARRY_OVER)
+    _enroll(session, student, "CS201", EnrollmentStatus.ACTIVE)
+    _enroll(session, student, "CS301", EnrollmentStatus.COMPLETED)
+
+    assert _shelf(session, student) == ["CS101 notes", "CS201 notes"]
+
+def test_material_changes_refresh_entries(session):
+    student = session.student
+    _enroll(session, student, "CS201", EnrollmentStatus.ACTIVE)
+    material = _material(session, "CS201")
+    assert _shelf(session, student) == ["CS201 notes"]
+
+    material.course_code = "CS301"
+    session.commit()
+    assert _shelf(session, student) == []
+
+    material.course_code = "CS201"
+    session.commit()
+    session.delete(material)
+    session.commit()
+    assert session.scalars(select(ShelfEntry)).all() == []
+
+def test_course_codes_match_within_the_department_only(session):
+    other_department = Department(name="General Studies", code="GS")
+    session.add(other_department)
+    session.flush()
+    _material(session, "CS101", department_id=other_department.id)
+    _enroll(session, session.student, "CS101", EnrollmentStatus.ACTIVE)
+    assert _shelf(session, session.student) == []
+
+    shelf.rebuild(session.connection())
+    assert _shelf(session, session.student) == []
+
+    own = _material(session, "CS101")
+    assert _shelf(session, session.student) == ["CS101 notes"]
+    own.department_id = other_department.id
+    session.commit()
+    assert _shelf(session, session.student) == []
+
+def test_enrollment_changes_refresh_entries(session):
+    student = session.student
+    _material(session, "CS101")
+    enrollment = _enroll(session, student, "CS101", EnrollmentStatus.ACTIVE)
+    duplicate = _enroll(session, student, "CS101", EnrollmentStatus.CARRY_OVER)
+    assert _shelf(session, student) == ["CS101 notes"]
+
+    enrollment.status = EnrollmentStatus.COMPLETED
+    session.commit()
+    assert _shelf(session, student) == ["CS101 notes"]
+
+    session.delete(duplicate)
+    session.commit()
+    assert _shelf(session, student) == []
+
+def test_course_inserts_and_deletes_refresh_entries(session):
+    _material(session, "CS401", level=400)
+    course = Course(course_code="CS401", department_id=session.department.id, level=400, title="CS401")
+    session.add(course)
+    session.add(Enrollment(user_id=session.student.id, course=course, status=EnrollmentStatus.ACTIVE))
+    session.commit()
+    assert _shelf(session, session.student) == ["CS401 notes"]
+
+    session.delete(course)
+    session.commit()
+    assert _shelf(session, session.student) == []
+
+def test_bulk_inserted_materials_need_an_explicit_refresh(session):
+    _enroll(session, session.student, "CS201", EnrollmentStatus.ACTIVE)
+    material_id = uuid.uuid4()
+    session.execute(insert(Material), [dict(
+        id=material_id, title="CS201 bulk", course_code="CS201", department_id=session.department.id, level=200,
+        visibility_scope=VisibilityScope.DEPARTMENT, file_path="blobs/x", uploaded_by=session.student.id,
+    )])
+    assert _shelf(session, session.student) == []
+
+    shelf.refresh_materials(session.connection(), [material_id])
+    assert _shelf(session, session.student) == ["CS201 bulk"]
+
+def test_rebuild_matches_incremental_state(session):
+    other = _user(session, level=100)
+    _material(session, "CS101")
+    _material(session, "CS201")
+    _enroll(session, session.student, "CS201", EnrollmentStatus.ACTIVE)
+    _enroll(session, other, "CS101", EnrollmentStatus.CARRY_OVER)
+    incremental = sorted(session.execute(select(ShelfEntry.user_id, ShelfEntry.material_id)).all())
+
+    shelf.rebuild(session.connection())
+    assert sorted(session.execute(select(ShelfEntry.user_id, ShelfEntry.material_id)).all()) == incremental
+
+def test_shelf_endpoint_falls_back_to_level_without_enrollments(session):
+    enrolled, unenrolled = session.student, _user(session, level=300)
+    _material(session, "CS101", level=100)
+    _material(session, "CS301", level=300)
+    _enroll(session, enrolled, "CS101", EnrollmentStatus.CARRY_OVER)
+
+    async def test_db():
+        db = ThreadedSession(Session(session.get_bind()))
+        try:
+            yield db
+        finally:
+            await db.close()
+
+    def context(user):
+        return UserContext(user_id=str(user.id), role="student", department_id=str(user.department_id),
+                           level=user.level)
+
+    def titles(context):
+        app.dependency_overrides[get_current_user] = lambda: context
+        return [m["title"] for m in client.get("/shelf/").json()]
+
+    enrolled, unenrolled = context(enrolled), context(unenrolled)
+    statements = []
+    event.listen(session.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    app.dependency_overrides[get_read_db] = test_db
+    try:
+        with TestClient(app) as client:
+            assert titles(enrolled) == ["CS101 notes"]
+            assert titles(unenrolled) == ["CS301 notes"]
+    finally:
+        app.dependency_overrides.clear()
+    # The enrollment check is part of the shelf query, not a separate round trip
+    assert len(statements) == 2
@@ -0,0 +1,54 @@
+import asyncio
+import hashlib
+import io
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from app.services import storage
+
+@pytest.fixture(autouse=True)
+def small_chunks(storage_dir, monkeypatch):
+    monkeypatch.setattr(storage, "UPLOAD_CHUNK_SIZE", 1024)
+
+def _upload(data: bytes, filename="notes.pdf", size=None) -> UploadFile:
+    return UploadFile(io.BytesIO(data), filename=filename, size=size)
+
+def test_stage_upload_records_size_and_sha256(storage_dir):
+    data = bytes(range(256)) * 50
+    staged = asyncio.run(storage.stage_upload(_upload(data)))
+
+    assert staged.size_bytes == len(data)
+    assert staged.sha256 == hashlib.sha256(data).hexdigest()
+    with open(staged.path, "rb") as f:
+        assert f.read() == data
+
+def test_place_blob_moves_into_sharded_path(storage_dir):
+    staged = asyncio.run(storage.stage_upload(_upload(b"lecture")))
+    asyncio.run(storage.place_blob(staged, storage.blob_key(staged.sha256)))
+    path = storage_dir / storage.blob_key(staged.sha256)
+
+    assert path.relative_to(storage_dir).parts == ("blobs", staged.sha256[:2], staged.sha256[2:4], staged.sha256)
+    assert path.read_bytes() == b"lecture"
+    assert not any(p.name.startswith(storage.STAGING_PREFIX) for p in storage_dir.iterdir())
+
+def test_place_blob_drops_duplicate_content(storage_dir):
+    first = asyncio.run(storage.stage_upload(_upload(b"same")))
+    second = asyncio.run(storage.stage_upload(_upload(b"same")))
+    path = storage.blob_key(first.sha256)
+    asyncio.run(storage.place_blob(first, path))
+    asyncio.run(storage.place_blob(second, path))
+
+    assert sorted(p.name for p in storage_dir.rglob("*") if p.is_file()) == [first.sha256]
+
+def test_declared_size_over_limit_is_rejected_before_writing(storage_dir):
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(storage.stage_upload(_upload(b"x" * 10, size=10), max_bytes=5))
+    assert exc.value.status_code == 413
+    assert list(storage_dir.iterdir()) == []
+
+def test_streamed_size_over_limit_leaves_no_partial_file(storage_dir):
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(storage.stage_upload(_upload(b"x" * 5000), max_bytes=3000))
+    assert exc.value.status_code == 413
+    assert list(storage_dir.iterdir()) == []
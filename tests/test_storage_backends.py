@@ -0,0 +1,139 @@
+import asyncio
+import io
+import shutil
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import UploadFile
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.services import storage
+
+class _Missing(Exception):
+    response = {"Error": {"Code": "404"}}
+
+class _Body(io.BytesIO):
+    def iter_chunks(self, chunk_size):
+        while chunk := self.read(chunk_size):
+            yield chunk
+
+class FakeS3Client:
+    """The handful of boto3 S3 client calls the backend uses, backed by a directory."""
+
+    def __init__(self, root, page_size=2):
+        self.root = root
+        self.page_size = page_size
+
+    def _path(self, bucket, key):
+        return self.root / bucket / key
+
+    def head_object(self, Bucket, Key):
+        path = self._path(Bucket, Key)
+        if not path.is_file():
+            raise _Missing()
+        st = path.stat()
+        return {"ContentLength": st.st_size, "LastModified": datetime.fromtimestamp(st.st_mtime, timezone.utc)}
+
+    def upload_file(self, filename, bucket, key):
+        path = self._path(bucket, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(filename, path)
+
+    def get_object(self, Bucket, Key, Range):
+        start, end = (int(n) for n in Range.removeprefix("bytes=").split("-"))
+        with self._path(Bucket, Key).open("rb") as f:
+            f.seek(start)
+            return {"Body": _Body(f.read(end - start + 1))}
+
+    def delete_object(self, Bucket, Key):
+        self._path(Bucket, Key).unlink()
+
+    def list_objects_v2(self, Bucket, Prefix, ContinuationToken=None):
+        base = self.root / Bucket
+        keys = sorted(p.relative_to(base).as_posix() for p in base.rglob("*") if p.is_file())
+        keys = [k for k in keys if k.startswith(Prefix)]
+        start = int(ContinuationToken or 0)
+        page = keys[start:start + self.page_size]
+        result = {
+            "Contents": [{"Key": k, "LastModified": self.head_object(Bucket, k)["LastModified"]} for k in page],
+            "IsTruncated": start + self.page_size < len(keys),
+        }
+        if result["IsTruncated"]:
+            result["NextContinuationToken"] = str(start + self.page_size)
+        return result
+
+@pytest.fixture
+def s3(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "STORAGE_DIR", tmp_path / "staging")
+    backend = storage.S3StorageBackend("materials", prefix="prod/", client=FakeS3Client(tmp_path / "s3"))
+    monkeypatch.setattr(storage, "_backend", backend)
+    return backend
+
+def _place(data: bytes) -> str:
+    staged = asyncio.run(storage.stage_upload(UploadFile(io.BytesIO(data), filename="f.pdf")))
+    key = storage.blob_key(staged.sha256)
+    asyncio.run(storage.place_blob(staged, key))
+    return key
+
+def test_backends_must_implement_every_operation():
+    class Partial(storage.StorageBackend):
+        def put(self, staged_path, key):
+            pass
+
+    with pytest.raises(TypeError, match="stat"):
+        Partial()
+
+def test_s3_backend_round_trip(s3, tmp_path):
+    key = _place(b"0123456789")
+
+    assert (tmp_path / "s3" / "materials" / "prod" / key).read_bytes() == b"0123456789"
+    assert list((tmp_path / "staging").iterdir()) == []
+    assert s3.stat(key).size == 10
+    assert b"".join(s3.read_range(key, 2, 5)) == b"2345"
+    assert list(s3.read_range(key, 5, 4)) == []
+    assert s3.delete(key) == 10
+    assert s3.stat(key) is None
+    assert s3.delete(key) == 0
+
+def test_s3_backend_lists_across_pages(s3):
+    keys = {_place(bytes([n])) for n in range(5)}
+    assert {key for key, _ in s3.list(storage.BLOB_PREFIX)} == keys
+
+def test_s3_backend_drops_duplicate_uploads(s3, tmp_path):
+    _place(b"same")
+    _place(b"same")
+    assert len([p for p in (tmp_path / "s3").rglob("*") if p.is_file()]) == 1
+    assert list((tmp_path / "staging").iterdir()) == []
+
+def _client():
+    async def download(request):
+        return await storage.stream_file(
+            "blobs/ab/cd/abcd", request.headers, etag='"abcd"', media_type="application/pdf", filename="notes.pdf"
+        )
+    return TestClient(Starlette(routes=[Route("/file", download)]))
+
+@pytest.mark.parametrize("mode, header, value", [
+    ("x-accel-redirect", "x-accel-redirect", "/protected-storage/blobs/ab/cd/abcd"),
+    ("x-sendfile", "x-sendfile", "{root}/blobs/ab/cd/abcd"),
+])
+def test_download_offload_hands_off_to_proxy(tmp_path, monkeypatch, mode, header, value):
+    monkeypatch.setattr(storage, "STORAGE_DIR", tmp_path)
+    monkeypatch.setattr(storage, "_backend", storage.LocalStorageBackend(tmp_path))
+    monkeypatch.setattr(storage, "DOWNLOAD_OFFLOAD", mode)
+
+    with _client() as client:
+        r = client.get("/file")
+        assert r.status_code == 200
+        assert r.content == b""
+        assert r.headers[header] == value.format(root=tmp_path)
+        assert r.headers["etag"] == '"abcd"'
+        assert r.headers["content-type"] == "application/pdf"
+        assert "notes.pdf" in r.headers["content-disposition"]
+
+        assert client.get("/file", headers={"If-None-Match": '"abcd"'}).status_code == 304
+
+def test_x_sendfile_is_not_used_for_remote_backends(s3, monkeypatch):
+    monkeypatch.setattr(storage, "DOWNLOAD_OFFLOAD", "x-sendfile")
+    assert storage._offload_header(s3, "blobs/ab/cd/abcd") is None
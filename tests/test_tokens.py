@@ -0,0 +1,145 @@
+import asyncio
+import json
+import time
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app.database import Base
+from app.dependencies import get_current_user
+from app.models.models import Department, TokenRevocation, User, UserRole
+from app.policies.base import Role, UserContext
+from app.services import tokens
+from app.services.tokens import InvalidToken, KeyRing, authenticate_token, decode_token, issue_token, revoke_token
+
+def _context(level=200):
+    return UserContext(user_id=str(uuid.uuid4()), role=Role.STUDENT, department_id=str(uuid.uuid4()), level=level)
+
+@pytest.fixture(autouse=True)
+def revocations(monkeypatch):
+    revocations = tokens.RevocationList()
+    monkeypatch.setattr(tokens, "revocations", revocations)
+    return revocations
+
+def test_claims_round_trip_into_user_context():
+    context = _context()
+    assert authenticate_token(issue_token(context)) == context
+
+def test_current_user_from_bearer_token_needs_no_database():
+    context = _context()
+    user = asyncio.run(get_current_user(db=None, authorization=f"Bearer {issue_token(context)}", x_user_id=None))
+    assert user == context
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(get_current_user(db=None, authorization="Basic abc", x_user_id=None))
+    assert exc.value.status_code == 401
+
+def test_user_id_header_is_off_by_default():
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(get_current_user(db=None, authorization=None, x_user_id=str(uuid.uuid4())))
+    assert exc.value.status_code == 401
+
+def test_tampered_token_is_rejected():
+    header, claims, signature = issue_token(_context(level=100)).split(".")
+    forged = tokens._b64encode(tokens._b64decode(claims).replace(b'"level": 100', b'"level": 500'))
+    with pytest.raises(InvalidToken, match="signature"):
+        decode_token(f"{header}.{forged}.{signature}")
+    with pytest.raises(InvalidToken, match="Malformed"):
+        decode_token("not-a-token")
+
+def test_unhashable_kid_is_rejected():
+    for kid in ({}, [], None, 1):
+        header = tokens._b64encode(json.dumps({"alg": "HS256", "kid": kid}).encode())
+        with pytest.raises(InvalidToken, match="Unknown signing key"):
+            decode_token(f"{header}.e30.AAAA")
+
+def test_expired_token_is_rejected():
+    token = issue_token(_context(), ttl=60, now=1_000_000)
+    assert decode_token(token, now=1_000_000 + 60)
+    with pytest.raises(InvalidToken, match="expired"):
+        decode_token(token, now=1_000_000 + 60 + tokens.JWT_LEEWAY + 1)
+
+def test_key_rotation():
+    old = KeyRing({"k1": b"first secret"}, "k1")
+    rotated = KeyRing({"k1": b"first secret", "k2": b"second secret"}, "k2")
+    retired = KeyRing({"k2": b"second secret"}, "k2")
+    token = issue_token(_context(), keys=old)
+
+    assert decode_token(token, keys=rotated)
+    assert decode_token(issue_token(_context(), keys=rotated), keys=retired)
+    with pytest.raises(InvalidToken, match="Unknown signing key"):
+        decode_token(token, keys=retired)
+    with pytest.raises(ValueError):
+        KeyRing({"k1": b"secret"}, "k3")
+    assert tokens.parse_keys("k1:a, k2:b") == {"k1": b"a", "k2": b"b"}
+
+def test_missing_keys_need_the_ephemeral_flag():
+    with pytest.raises(ValueError, match="JWT_KEYS is not set"):
+        KeyRing({})
+    ephemeral = KeyRing({}, ephemeral=True)
+    assert decode_token(issue_token(_context(), keys=ephemeral), keys=ephemeral)
+
+def test_revoked_token_is_rejected():
+    context = _context()
+    token, other = issue_token(context), issue_token(context)
+    revoke_token(token)
+
+    with pytest.raises(InvalidToken, match="revoked"):
+        authenticate_token(token)
+    assert authenticate_token(other) == context
+
+def test_changing_user_attributes_revokes_outstanding_tokens(revocations, monkeypatch):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        department = Department(name="Computer Science", code="CS")
+        session.add(department)
+        session.flush()
+        user = User(email="s@school.edu", password_hash="x", role=UserRole.STUDENT,
+                    department_id=department.id, level=100)
+        session.add(user)
+        session.commit()
+        context = UserContext(user_id=str(user.id), role=Role.STUDENT, department_id=str(department.id), level=100)
+        token = issue_token(context, now=time.time() - 1)
+
+        # A rolled-back change revokes nothing
+        user.level = 200
+        session.flush()
+        session.rollback()
+        assert authenticate_token(token) == context
+        assert len(revocations) == 0
+
+        user.level = 200
+        session.commit()
+        with pytest.raises(InvalidToken, match="revoked"):
+            authenticate_token(token)
+        assert len(revocations) == 1
+        # The replacement token, issued in the same second as the change, is accepted
+        replacement = UserContext(user_id=str(user.id), role=Role.STUDENT, department_id=str(department.id), level=200)
+        assert authenticate_token(issue_token(replacement)) == replacement
+
+        # Another process picks the revocation up from token_revocations
+        other_process = tokens.RevocationList()
+        monkeypatch.setattr(tokens, "revocations", other_process)
+        assert authenticate_token(token)
+        other_process.sync(session)
+        with pytest.raises(InvalidToken, match="revoked"):
+            authenticate_token(token)
+
+def test_logout_is_shared_through_the_database(revocations):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    token = issue_token(_context())
+    with Session(engine) as session:
+        tokens.record_revocation(session, revoke_token(token))
+        tokens.record_revocation(session, tokens.RevocationList(clock=lambda: 0).revoke("old", expires_at=0))
+        session.commit()
+
+        other_process = tokens.RevocationList()
+        other_process.sync(session)
+        assert other_process.is_revoked(decode_token(token))
+        # Writing a revocation purges rows no token could still need
+        assert session.scalars(select(TokenRevocation.key)).all() == [f"jti:{decode_token(token)['jti']}"]
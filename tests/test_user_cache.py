@@ -0,0 +1,96 @@
+
+from app.models.models import Department, User, UserRole
+from app.policies.base import UserContext, Role
+from app.services.user_cache import LocalCacheBackend, UserContextCache, user_context_cache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def _context(user_id="u1", level=1):
+    return UserContext(user_id=user_id, role=Role.STUDENT, department_id="CS", level=level)
+
+def test_hit_and_miss_counters():
+    cache = UserContextCache(maxsize=10, ttl=60)
+    assert cache.get("u1") is None
+    cache.set("u1", _context())
+    assert cache.get("u1") == _context()
+    assert cache.stats() == {"hits": 1, "misses": 1, "invalidations": 0, "size": 1}
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = UserContextCache(maxsize=10, ttl=60, clock=clock)
+    cache.set("u1", _context())
+    clock.now = 59
+    assert cache.get("u1") is not None
+    clock.now = 61
+    assert cache.get("u1") is None
+
+def test_least_recently_used_entry_is_evicted():
+    cache = UserContextCache(maxsize=2, ttl=60)
+    cache.set("u1", _context("u1"))
+    cache.set("u2", _context("u2"))
+    cache.get("u1")
+    cache.set("u3", _context("u3"))
+    assert cache.get("u2") is None
+    assert cache.get("u1") is not None
+    assert cache.get("u3") is not None
+
+def test_shared_backend_fills_local_tier_and_is_invalidated():
+    backend = LocalCacheBackend()
+    writer = UserContextCache(backend=backend)
+    reader = UserContextCache(backend=backend)
+
+    writer.set("u1", _context(level=2))
+    assert reader.get("u1") == _context(level=2)
+
+    writer.invalidate("u1")
+    other = UserContextCache(backend=backend)
+    assert other.get("u1") is None
+
+def _seed_user(session) -> User:
+    dept = Department(name="Computer Science", code="CS")
+    session.add(dept)
+    session.flush()
+    user = User(email="s@school.edu", password_hash="x", role=UserRole.STUDENT, department_id=dept.id, level=100)
+    session.add(user)
+    session.commit()
+    return user
+
+def test_changing_level_invalidates_cached_context(session):
+    user = _seed_user(session)
+    user_context_cache.set(str(user.id), _context(str(user.id), level=100))
+
+    user.level = 200
+    session.commit()
+
+    assert user_context_cache.get(str(user.id)) is None
+
+def test_context_is_cached_again_only_after_commit(session):
+    user = _seed_user(session)
+    user.level = 200
+    session.flush()
+    # A reader filling the cache between flush and commit still sees the old level
+    user_context_cache.set(str(user.id), _context(str(user.id), level=100))
+    session.commit()
+    assert user_context_cache.get(str(user.id)) is None
+
+    user_context_cache.set(str(user.id), _context(str(user.id), level=200))
+    user.level = 300
+    session.flush()
+    session.rollback()
+    assert user_context_cache.get(str(user.id)).level == 200
+    user_context_cache.invalidate(str(user.id))
+
+def test_unrelated_change_keeps_cached_context(session):
+    user = _seed_user(session)
+    user_context_cache.set(str(user.id), _context(str(user.id), level=100))
+
+    user.email = "renamed@school.edu"
+    session.commit()
+
+    assert user_context_cache.get(str(user.id)) is not None
+    user_context_cache.invalidate(str(user.id))